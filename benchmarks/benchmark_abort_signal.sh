@@ -0,0 +1,6 @@
+#!/bin/bash
+
+cd ~/spotmicroai
+export PYTHONPATH=.
+
+venv/bin/python3 benchmarks/benchmark_abort_signal/benchmark_abort_signal.py
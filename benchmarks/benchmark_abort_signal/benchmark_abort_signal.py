@@ -0,0 +1,123 @@
+#!/home/pi/spotmicroai/venv/bin/python3 -u
+
+import logging
+import multiprocessing
+import os
+import time
+
+from spotmicroai.utilities.log import Logger
+from spotmicroai.utilities.latency import LatencyHistogram
+from spotmicroai.utilities.status_board import StatusBoard
+from spotmicroai.utilities.heartbeat import Heartbeat
+from spotmicroai.abort_controller.abort_signal import AbortSignal
+from spotmicroai.hal.hal import load_hal, HAL_ENVIRONMENT_VARIABLE, SIMULATED
+import spotmicroai.abort_controller.abort_controller as abort_controller
+import spotmicroai.utilities.queues as queues
+
+log = Logger().setup_logger('Benchmark abort signal')
+
+ABORTS = 1000
+
+# Aborts are rare, leave the abort controller idle between two of them like on the robot
+ABORT_PERIOD = 0.002
+
+# Background traffic on the abort controller queue, what the queue path can get stuck behind
+QUEUED_ACTIVATIONS = 8
+
+HIGH = 1
+LOW = 0
+
+
+def process_abort_controller(communication_queues, pin_changes):
+    # Simulated GPIO telling the benchmark when the pin changed, so it runs on any Linux box
+    os.environ[HAL_ENVIRONMENT_VARIABLE] = SIMULATED
+    load_hal().gpio().observer = lambda port, value, changed_at: pin_changes.send((value, changed_at))
+
+    # One line per abort would be the benchmark's own noise
+    abort_controller.log.setLevel(logging.WARNING)
+
+    abort = abort_controller.AbortController(communication_queues)
+    # No motion loop beating here, keep the dead man switch from cutting the servos in the middle of a round
+    abort._dead_man_switch.deadline = float('inf')
+    abort.do_process_events_from_queue()
+
+
+def wait_for_pin(pin_changes, value):
+    while True:
+        changed_value, changed_at = pin_changes.recv()
+        if changed_value == value:
+            return changed_at
+
+
+def benchmark(name, abort, communication_queues, pin_changes, busy):
+    latency = LatencyHistogram()
+
+    for count in range(ABORTS):
+        communication_queues[queues.ABORT_CONTROLLER].put((queues.ABORT_CONTROLLER_ACTION_ACTIVATE,
+                                                           communication_queues[queues.ABORT_SIGNAL].trips()))
+        wait_for_pin(pin_changes, LOW)
+
+        if busy:
+            for activation in range(QUEUED_ACTIVATIONS):
+                communication_queues[queues.ABORT_CONTROLLER].put(queues.ABORT_CONTROLLER_ACTION_ACTIVATE)
+
+        time.sleep(ABORT_PERIOD)
+
+        start = time.monotonic()
+        abort()
+        latency.add(wait_for_pin(pin_changes, HIGH) - start)
+
+        # Whatever the queued activations did after the abort, start the next round from a known state
+        time.sleep(ABORT_PERIOD)
+        while pin_changes.poll():
+            pin_changes.recv()
+
+    summary = latency.summary()
+    log.info(name + ': ' + str(summary['count']) + ' aborts, trip to OE pin p50/p95/p99/max ' +
+             str(summary['p50_ms']) + '/' + str(summary['p95_ms']) + '/' + str(summary['p99_ms']) + '/' +
+             str(summary['max_ms']) + ' ms')
+
+
+def main():
+    communication_queues = {queues.ABORT_CONTROLLER: multiprocessing.Queue(10),
+                            queues.ABORT_SIGNAL: AbortSignal(create=True),
+                            queues.MOTION_HEARTBEAT: Heartbeat(create=True),
+                            queues.STATUS_BOARD: StatusBoard(create=True)}
+
+    pin_changes, pin_changes_sender = multiprocessing.Pipe(duplex=False)
+
+    abort_controller = multiprocessing.Process(target=process_abort_controller,
+                                               args=(communication_queues, pin_changes_sender))
+    abort_controller.daemon = True
+    abort_controller.start()
+
+    try:
+        # Initial abort of the controller
+        wait_for_pin(pin_changes, HIGH)
+
+        def queue_abort():
+            communication_queues[queues.ABORT_CONTROLLER].put(queues.ABORT_CONTROLLER_ACTION_ABORT)
+
+        trip = communication_queues[queues.ABORT_SIGNAL].trip
+
+        log.info('Benchmarking ' + str(ABORTS) + ' aborts, idle abort controller')
+        benchmark('Abort controller queue', queue_abort, communication_queues, pin_changes, False)
+        benchmark('Abort signal', trip, communication_queues, pin_changes, False)
+
+        log.info('Benchmarking ' + str(ABORTS) + ' aborts, ' + str(QUEUED_ACTIVATIONS) +
+                 ' messages in the abort controller queue')
+        benchmark('Abort controller queue', queue_abort, communication_queues, pin_changes, True)
+        benchmark('Abort signal', trip, communication_queues, pin_changes, True)
+
+    finally:
+        abort_controller.terminate()
+        abort_controller.join()
+
+        for name, queue in communication_queues.items():
+            queue.close()
+            if name in (queues.STATUS_BOARD, queues.ABORT_SIGNAL, queues.MOTION_HEARTBEAT):
+                queue.unlink()
+
+
+if __name__ == '__main__':
+    main()
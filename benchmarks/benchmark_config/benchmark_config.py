@@ -0,0 +1,63 @@
+#!/home/pi/spotmicroai/venv/bin/python3 -u
+
+import time
+
+import jmespath
+
+from spotmicroai.utilities.log import Logger
+from spotmicroai.utilities.config import Config
+
+log = Logger().setup_logger('Benchmark configuration')
+
+EVENTS = 2000
+
+# The rest angles body_move_body_up_and_down_analog used to look up on every joystick event
+LEGS_AND_FEET = ('rear_leg_left', 'rear_feet_left', 'rear_leg_right', 'rear_feet_right',
+                 'front_leg_left', 'front_feet_left', 'front_leg_right', 'front_feet_right')
+
+REST_ANGLES = [Config.MOTION_CONTROLLER_SERVOS_REAR_LEG_LEFT_REST_ANGLE,
+               Config.MOTION_CONTROLLER_SERVOS_REAR_FEET_LEFT_REST_ANGLE,
+               Config.MOTION_CONTROLLER_SERVOS_REAR_LEG_RIGHT_REST_ANGLE,
+               Config.MOTION_CONTROLLER_SERVOS_REAR_FEET_RIGHT_REST_ANGLE,
+               Config.MOTION_CONTROLLER_SERVOS_FRONT_LEG_LEFT_REST_ANGLE,
+               Config.MOTION_CONTROLLER_SERVOS_FRONT_FEET_LEFT_REST_ANGLE,
+               Config.MOTION_CONTROLLER_SERVOS_FRONT_LEG_RIGHT_REST_ANGLE,
+               Config.MOTION_CONTROLLER_SERVOS_FRONT_FEET_RIGHT_REST_ANGLE]
+
+
+def previous_get(values, search_pattern):
+    # Config.get before the configuration was compiled: the debug string searched a second time
+    # even with debug disabled, then the real search
+    log.debug(search_pattern + ': ' + str(jmespath.search(search_pattern, values)))
+    return jmespath.search(search_pattern, values)
+
+
+def report(name, elapsed):
+    log.info('{:<36}'.format(name) + '{:10.2f}'.format(elapsed / EVENTS * 1000000) + ' us/event')
+
+
+def main():
+    config = Config()
+
+    start = time.perf_counter()
+    for event in range(EVENTS):
+        for search_pattern in REST_ANGLES:
+            previous_get(config.values, search_pattern)
+    report('jmespath.search per lookup', time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for event in range(EVENTS):
+        for search_pattern in REST_ANGLES:
+            config.get(search_pattern)
+    report('Config.get, cached expressions', time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for event in range(EVENTS):
+        servos = Config().servos
+        for name in LEGS_AND_FEET:
+            servos[name].rest_angle
+    report('Compiled configuration attributes', time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    main()
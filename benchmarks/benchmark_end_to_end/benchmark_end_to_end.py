@@ -0,0 +1,355 @@
+#!/home/pi/spotmicroai/venv/bin/python3 -u
+
+import bisect
+import datetime
+import json
+import math
+import multiprocessing
+import os
+import platform
+import sys
+import threading
+import time
+
+from spotmicroai.utilities.log import Logger
+from spotmicroai.utilities.config import Config
+from spotmicroai.utilities.latency import LatencyHistogram
+import spotmicroai.utilities.queues as queues
+import spotmicroai.utilities.status_board as status_board
+from spotmicroai.hal.hal import load_hal, HAL_ENVIRONMENT_VARIABLE, SIMULATED
+from spotmicroai.hal.simulated import DEFAULT_JOYSTICK_SCRIPT
+from spotmicroai.motion_controller.motion_controller import MotionController, CONTROL_LOOP_FREQUENCY
+from spotmicroai.motion_controller.pca9685_frame_writer import PCA9685_LED0_ON_L
+from spotmicroai.remote_controller.remote_controller import RemoteControllerController, JS_EVENT, \
+    JS_EVENT_AXIS, JS_EVENT_BUTTON
+import spotmicroai.main as spotmicroai
+
+log = Logger().setup_logger('Benchmark end to end')
+
+# Joystick events written to the simulated device node, to the servo register writes they cause in move().
+# Every process of main.py runs as it does on the robot, only the devices are simulated.
+
+# Time for the last update of a scenario to reach the servos before it is analyzed
+SETTLE_TIME = 0.5
+
+STARTUP_TIMEOUT = 10
+
+# The arm only follows the sticks while tl is held, its release waits for the last stick update to be applied
+ARM_RELEASE_DELAY = 0.05
+
+# Isolated stick nudges on an otherwise quiet robot: wakeup of every process on the way
+IDLE_EVENTS = 40
+IDLE_EVENT_PERIOD = 0.25
+
+# A stick swept back and forth reports way faster than the motion loop ticks
+SWEEP_DURATION = 4
+SWEEP_EVENT_PERIOD = 0.002
+SWEEP_FREQUENCY = 0.5
+
+# Body left and right as fast as two thumbs go
+MASHING_PRESSES = 80
+MASHING_PRESS_PERIOD = 0.06
+MASHING_HOLD = 0.03
+
+ARM_DURATION = 4
+ARM_EVENT_PERIOD = 0.002
+ARM_FREQUENCY = 0.5
+
+
+class Event:
+
+    def __init__(self, at, name, value, moves=True):
+        # Seconds from the start of the scenario, the joystick axis or button, and whether the servos must follow
+        self.at = at
+        self.name = name
+        self.value = value
+        self.moves = moves
+        self.injected_at = None
+
+
+def idle_events():
+    return [Event(count * IDLE_EVENT_PERIOD, 'rx', 0.5 if count % 2 else -0.5) for count in range(IDLE_EVENTS)]
+
+
+def sweep_events(axes, duration, period, frequency):
+    events = []
+    for tick in range(int(duration / period)):
+        at = tick * period
+        for axis, phase in axes:
+            events.append(Event(at, axis, round(math.sin(2 * math.pi * frequency * at + phase), 3)))
+    # Ends on full deflection, out of the deadzone and past the filters: the last update must reach the servos
+    events.append(Event(duration, axes[0][0], 1.0))
+    return events
+
+
+def analog_stick_sweep_events():
+    return sweep_events((('ry', 0.0),), SWEEP_DURATION, SWEEP_EVENT_PERIOD, SWEEP_FREQUENCY)
+
+
+def button_mashing_events():
+    events = []
+    for press in range(MASHING_PRESSES):
+        # Alternate sides, the same button twice would ask for the position the body already has
+        button = 'b' if press % 2 else 'x'
+        events.append(Event(press * MASHING_PRESS_PERIOD, button, 1))
+        events.append(Event(press * MASHING_PRESS_PERIOD + MASHING_HOLD, button, 0, moves=False))
+    return events
+
+
+def arm_control_events():
+    # Rotation and lift together, the arm only listens while tl is held
+    events = [Event(0.0, 'tl', 1, moves=False)]
+    for event in sweep_events((('lx', 0.0), ('ly', math.pi / 2)), ARM_DURATION, ARM_EVENT_PERIOD,
+                              ARM_FREQUENCY):
+        event.at += ARM_EVENT_PERIOD
+        events.append(event)
+    # Let go once the last stick update was applied, released in the same read it would be ignored
+    events.append(Event(ARM_DURATION + ARM_EVENT_PERIOD + ARM_RELEASE_DELAY, 'tl', 0, moves=False))
+    return events
+
+
+SCENARIOS = (('idle', idle_events),
+             ('analog_stick_sweep', analog_stick_sweep_events),
+             ('button_mashing', button_mashing_events),
+             ('arm_control', arm_control_events))
+
+
+def process_motion_controller(communication_queues, servo_writes):
+    motion = MotionController(communication_queues)
+
+    # Every servo register write, with the joystick read behind the state it carries
+    def observer(address, data, written_at):
+        if data[0] >= PCA9685_LED0_ON_L:
+            servo_writes.send((written_at, motion.last_input_time))
+
+    load_hal().i2c().observer = observer
+    motion.do_process_events_from_queues()
+
+
+def process_remote_controller_controller(communication_queues, joystick_path):
+    remote_controller = RemoteControllerController(communication_queues)
+    joystick_path.send(load_hal().joysticks[-1].path)
+    remote_controller.do_process_events_from_queues()
+
+
+class Joystick:
+    # Writes js_event records to the simulated device node, as the kernel would for a gamepad
+
+    def __init__(self, path):
+        self._fifo = os.open(path, os.O_WRONLY)
+        self._start = time.monotonic()
+        self._axes = DEFAULT_JOYSTICK_SCRIPT['axes']
+        self._buttons = DEFAULT_JOYSTICK_SCRIPT['buttons']
+
+    def send(self, name, value):
+        now = time.monotonic()
+        milliseconds = int((now - self._start) * 1000) & 0xFFFFFFFF
+
+        if name in self._axes:
+            record = JS_EVENT.pack(milliseconds, int(value * 32767), JS_EVENT_AXIS, self._axes.index(name))
+        else:
+            record = JS_EVENT.pack(milliseconds, int(value), JS_EVENT_BUTTON, self._buttons.index(name))
+
+        os.write(self._fifo, record)
+        return now
+
+    def press(self, button):
+        # Released right away, the mailbox counts the press even when the motion loop never sees it held
+        self.send(button, 1)
+        self.send(button, 0)
+
+    def close(self):
+        os.close(self._fifo)
+
+
+class ServoWrites:
+    # Drains the motion controller's register writes as they happen, the pipe must never fill up
+
+    def __init__(self, connection):
+        self._connection = connection
+        self._writes = []
+        self._lock = threading.Lock()
+
+        self._thread = threading.Thread(target=self._drain, daemon=True)
+        self._thread.start()
+
+    def _drain(self):
+        while True:
+            try:
+                write = self._connection.recv()
+            except EOFError:
+                return
+            with self._lock:
+                self._writes.append(write)
+
+    def take(self):
+        with self._lock:
+            writes, self._writes = self._writes, []
+        return writes
+
+
+def wait_for_status(board, component, status):
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while board.get(component)[0] != status:
+        if time.monotonic() > deadline:
+            raise TimeoutError(component + ' never got to ' + status_board.STATUS_NAMES[status])
+        time.sleep(0.01)
+
+
+def inject(joystick, events):
+    start = time.monotonic()
+    for event in events:
+        delay = start + event.at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        event.injected_at = joystick.send(event.name, event.value)
+
+    time.sleep(SETTLE_TIME)
+
+
+def analyze(events, writes, control_period):
+    """
+    A register write carries the state of the newest event injected before the remote controller read it.
+    Its first write gives the latency of that event. Stick positions overtaken by a newer one before reaching
+    the servos were coalesced, on purpose: the motion controller only takes the newest state. A button press
+    that never reached the servos, or a moving event not followed by any write, was dropped. A write is stale
+    when it carries an event older than a moving one injected at least a control period earlier.
+    """
+    injected_at = [event.injected_at for event in events]
+    moving_injected_at = [event.injected_at for event in events if event.moves]
+
+    latency = LatencyHistogram()
+    motion_latency = LatencyHistogram()
+    delivered = [False] * len(events)
+    newest_delivered = -1
+    stale_writes = 0
+
+    for written_at, input_time in writes:
+        newest = bisect.bisect_right(injected_at, input_time) - 1
+        if newest < 0:
+            continue
+
+        if not delivered[newest]:
+            delivered[newest] = True
+            latency.add(written_at - events[newest].injected_at)
+            motion_latency.add(written_at - input_time)
+        newest_delivered = max(newest_delivered, newest)
+
+        newer_moving = bisect.bisect_right(moving_injected_at, written_at - control_period)
+        if newer_moving and moving_injected_at[newer_moving - 1] > events[newest].injected_at:
+            stale_writes += 1
+
+    axes = DEFAULT_JOYSTICK_SCRIPT['axes']
+    coalesced = sum(1 for index, event in enumerate(events)
+                    if not delivered[index] and index < newest_delivered and event.name in axes)
+    dropped = sum(1 for index, event in enumerate(events)
+                  if event.moves and not delivered[index] and (index > newest_delivered or event.name not in axes))
+
+    duration = (events[-1].injected_at - events[0].injected_at) or 1.0
+    in_scenario = [write for write in writes if write[0] <= events[-1].injected_at + control_period] or writes
+
+    return {'events': len(events),
+            'moving_events': len(moving_injected_at),
+            'servo_writes': len(writes),
+            'events_per_second': round(len(events) / duration, 1),
+            'servo_writes_per_second': round(len(in_scenario) / duration, 1),
+            'delivered': sum(delivered),
+            'coalesced': coalesced,
+            'dropped': dropped,
+            'stale_writes': stale_writes,
+            'latency': latency.summary(),
+            'motion_controller_latency': motion_latency.summary()}
+
+
+def run_scenario(name, events, joystick, servo_writes, control_period):
+    # Body back to rest, then nothing left from the previous scenario
+    joystick.press('a')
+    time.sleep(SETTLE_TIME)
+    servo_writes.take()
+
+    inject(joystick, events)
+    result = analyze(events, servo_writes.take(), control_period)
+
+    latency = result['latency']
+    log.info(name + ': ' + str(result['events']) + ' events, ' + str(result['servo_writes']) +
+             ' servo writes, event to servo write p50/p95/p99/max ' + str(latency['p50_ms']) + '/' +
+             str(latency['p95_ms']) + '/' + str(latency['p99_ms']) + '/' + str(latency['max_ms']) + ' ms, ' +
+             str(result['coalesced']) + ' coalesced, ' + str(result['dropped']) + ' dropped, ' +
+             str(result['stale_writes']) + ' stale writes')
+
+    return result
+
+
+def main():
+    results_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+        'logs', 'benchmark_end_to_end_' + datetime.datetime.now().strftime('%Y%m%d_%H%M%S') + '.json')
+
+    # Simulated devices in every process, and a joystick driven by the benchmark instead of a script
+    os.environ[HAL_ENVIRONMENT_VARIABLE] = SIMULATED
+    Config().hal = Config().hal._replace(joystick_script=None)
+
+    control_loop_frequency = Config().motion_controller.control_loop_frequency or CONTROL_LOOP_FREQUENCY
+    control_period = 1.0 / control_loop_frequency
+
+    communication_queues = spotmicroai.create_controllers_queues()
+    board = communication_queues[queues.STATUS_BOARD]
+
+    servo_writes_receiver, servo_writes_sender = multiprocessing.Pipe(duplex=False)
+    joystick_path_receiver, joystick_path_sender = multiprocessing.Pipe(duplex=False)
+
+    controllers = [multiprocessing.Process(target=spotmicroai.process_abort_controller, args=(communication_queues,)),
+                   multiprocessing.Process(target=process_motion_controller,
+                                           args=(communication_queues, servo_writes_sender)),
+                   multiprocessing.Process(target=process_remote_controller_controller,
+                                           args=(communication_queues, joystick_path_sender)),
+                   multiprocessing.Process(target=spotmicroai.process_output_lcd_screen_controller,
+                                           args=(communication_queues,))]
+
+    for controller in controllers:
+        controller.daemon = True
+        controller.start()
+
+    joystick = None
+    try:
+        servo_writes = ServoWrites(servo_writes_receiver)
+        joystick = Joystick(joystick_path_receiver.recv())
+
+        wait_for_status(board, status_board.REMOTE_CONTROLLER_CONTROLLER, status_board.STATUS_OK)
+        joystick.press('start')
+        wait_for_status(board, status_board.ABORT_CONTROLLER, status_board.STATUS_ON)
+
+        results = {'date': datetime.datetime.now().isoformat(timespec='seconds'),
+                   'host': platform.node(),
+                   'machine': platform.machine(),
+                   'python': platform.python_version(),
+                   'cpus': os.cpu_count(),
+                   'control_loop_frequency': control_loop_frequency,
+                   'i2c_transaction_latency': Config().hal.i2c_transaction_latency,
+                   'i2c_byte_latency': Config().hal.i2c_byte_latency,
+                   'scenarios': {}}
+
+        for name, scenario_events in SCENARIOS:
+            log.info('Running the ' + name + ' scenario')
+            results['scenarios'][name] = run_scenario(name, scenario_events(), joystick, servo_writes,
+                                                      control_period)
+
+    finally:
+        if joystick is not None:
+            joystick.close()
+
+        for controller in controllers:
+            controller.terminate()
+        for controller in controllers:
+            controller.join()
+
+        spotmicroai.close_controllers_queues(communication_queues)
+
+    os.makedirs(os.path.dirname(results_path) or '.', exist_ok=True)
+    with open(results_path, 'w') as results_file:
+        json.dump(results, results_file, indent=4)
+
+    log.info('Results written to ' + results_path)
+
+
+if __name__ == '__main__':
+    main()
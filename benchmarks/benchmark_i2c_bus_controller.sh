@@ -0,0 +1,6 @@
+#!/bin/bash
+
+cd ~/spotmicroai
+export PYTHONPATH=.
+
+venv/bin/python3 benchmarks/benchmark_i2c_bus_controller/benchmark_i2c_bus_controller.py
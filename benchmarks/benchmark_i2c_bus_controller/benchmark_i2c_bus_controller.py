@@ -0,0 +1,215 @@
+#!/home/pi/spotmicroai/venv/bin/python3 -u
+
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+
+from spotmicroai.utilities.log import Logger
+from spotmicroai.utilities.config import Config
+from spotmicroai.utilities.latency import LatencyHistogram
+import spotmicroai.utilities.queues as queues
+from spotmicroai.hal.hal import HAL_ENVIRONMENT_VARIABLE, SIMULATED
+from spotmicroai.hal.simulated import SimulatedI2CBus, SimulatedSMBus, SimulatedPCA9685, SimulatedLCD
+from spotmicroai.lcd_screen_controller.LCD_16x2_I2C_driver import lcd
+from spotmicroai.motion_controller.pca9685_frame_writer import PCA9685FrameWriter
+from spotmicroai.motion_controller.motion_controller import CONTROL_LOOP_FREQUENCY
+from spotmicroai.i2c_bus_controller.i2c_bus import I2CBusChannels, I2CBusSMBus, create_i2c_bus_client
+from spotmicroai.i2c_bus_controller.i2c_bus_controller import I2CBusController
+
+log = Logger().setup_logger('Benchmark I2C bus controller')
+
+# Servo frames written at the motion loop frequency while the LCD screen redraws both lines back to back,
+# the motion controller and the LCD screen sharing the bus as they do today, then through the I2C bus controller.
+# Devices are simulated, one wire for every process: transactions take the time the latency model says and
+# never overlap.
+
+DURATION = 5
+
+# Channels moved every tick on each board, a leg sweeping: one 17 bytes auto-increment write per board
+MOVING_CHANNELS = 4
+
+LCD_LINES = ('SpotMicro  47C  ', 'Wireless Ctrl OK')
+
+
+class SharedI2CBus(SimulatedI2CBus):
+    # The bus of one process among several on the same wire: the adapter lock of the kernel serializes them
+
+    def __init__(self, lock, transaction_latency, byte_latency):
+        super().__init__(transaction_latency, byte_latency)
+        self._lock = lock
+
+        # For the wire, what the I2C bus controller reports as queue wait
+        self.wait = LatencyHistogram()
+
+    def _transaction(self, size):
+        waiting_since = time.monotonic()
+        with self._lock:
+            self.wait.add(time.monotonic() - waiting_since)
+            super()._transaction(size)
+
+
+class SharedSMBus(SimulatedSMBus):
+    # A whole LCD sequence in one transaction, what the driver does through the i2c-dev node on the robot
+
+    def write_bytes(self, address, data):
+        self.bus.write(address, data)
+
+
+def process_i2c_bus_controller(communication_queues):
+    i2c_bus_controller = I2CBusController(communication_queues)
+    i2c_bus_controller.do_process_events_from_queues()
+
+
+def process_servos(communication_queues, lock, duration, results):
+    hal_config = Config().hal
+
+    if lock is not None:
+        i2c = SharedI2CBus(lock, hal_config.i2c_transaction_latency, hal_config.i2c_byte_latency)
+    else:
+        i2c = create_i2c_bus_client(communication_queues, queues.MOTION_CONTROLLER)
+
+    frame_writers = []
+    for board in Config().boards.values():
+        pca9685 = SimulatedPCA9685(i2c, board.address, board.reference_clock_speed)
+        pca9685.frequency = board.frequency
+        frame_writers.append(PCA9685FrameWriter(pca9685))
+
+    frame_latency = LatencyHistogram()
+    period = 1.0 / (Config().motion_controller.control_loop_frequency or CONTROL_LOOP_FREQUENCY)
+
+    deadline = time.monotonic()
+    end = deadline + duration
+    tick = 0
+    while deadline < end:
+        deadline += period
+        time.sleep(max(0.0, deadline - time.monotonic()))
+        tick += 1
+
+        started_at = time.monotonic()
+        for frame_writer in frame_writers:
+            frame_writer.set_ticks(range(MOVING_CHANNELS), [200 + (tick + channel) % 200 for channel in
+                                                            range(MOVING_CHANNELS)])
+            frame_writer.flush()
+        frame_latency.add(time.monotonic() - started_at)
+
+    # Frame writes as the motion loop sees them, and the time their transactions waited for the bus
+    result = {'frame_write': frame_latency.summary()}
+    if lock is not None:
+        result['bus_wait'] = i2c.wait.summary()
+    else:
+        result['i2c_bus_controller'] = i2c.statistics()
+        result['bus_wait'] = result['i2c_bus_controller']['servos']['wait']
+
+    results.send(result)
+
+
+def process_lcd_screen(communication_queues, lock, stop):
+    hal_config = Config().hal
+    address = Config().lcd_screen_controller.address
+
+    if lock is not None:
+        bus = SharedI2CBus(lock, hal_config.i2c_transaction_latency, hal_config.i2c_byte_latency)
+        bus.attach(address, SimulatedLCD())
+        smbus = SharedSMBus(bus)
+    else:
+        smbus = I2CBusSMBus(create_i2c_bus_client(communication_queues, queues.LCD_SCREEN_CONTROLLER))
+
+    screen = lcd(address=address, bus=smbus)
+
+    redraws = 0
+    while not stop.is_set():
+        # Every line different from what the screen shows, as much traffic as the screen can get
+        for line, text in enumerate(LCD_LINES):
+            screen.lcd_display_string(text[redraws % len(text):] + text[:redraws % len(text)], line + 1)
+        redraws += 1
+
+
+def run_scenario(name, arbitrated, lcd_load, duration):
+    communication_queues = {}
+    lock = None
+    if arbitrated:
+        communication_queues[queues.I2C_BUS_CONTROLLER] = I2CBusChannels()
+    else:
+        lock = multiprocessing.Lock()
+
+    results_receiver, results_sender = multiprocessing.Pipe(duplex=False)
+    stop = multiprocessing.Event()
+
+    processes = []
+    if arbitrated:
+        processes.append(multiprocessing.Process(target=process_i2c_bus_controller, args=(communication_queues,),
+                                                 name=queues.I2C_BUS_CONTROLLER))
+    if lcd_load:
+        processes.append(multiprocessing.Process(target=process_lcd_screen, args=(communication_queues, lock, stop),
+                                                 name=queues.LCD_SCREEN_CONTROLLER))
+    servos = multiprocessing.Process(target=process_servos,
+                                     args=(communication_queues, lock, duration, results_sender),
+                                     name=queues.MOTION_CONTROLLER)
+    processes.append(servos)
+
+    for process in processes:
+        process.daemon = True
+        process.start()
+
+    try:
+        result = results_receiver.recv()
+    finally:
+        stop.set()
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+        if arbitrated:
+            communication_queues[queues.I2C_BUS_CONTROLLER].close()
+
+    frame_write = result['frame_write']
+    bus_wait = result['bus_wait']
+    log.info(name + ': servo frame write p50/p99/max ' + str(frame_write['p50_ms']) + '/' +
+             str(frame_write['p99_ms']) + '/' + str(frame_write['max_ms']) + ' ms, waiting for the bus ' +
+             str(bus_wait['p50_ms']) + '/' + str(bus_wait['p99_ms']) + '/' + str(bus_wait['max_ms']) + ' ms')
+
+    return result
+
+
+SCENARIOS = (('shared_bus', False, False),
+             ('shared_bus_lcd_load', False, True),
+             ('i2c_bus_controller', True, False),
+             ('i2c_bus_controller_lcd_load', True, True))
+
+
+def main():
+    results_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+        'logs', 'benchmark_i2c_bus_controller_' + datetime.datetime.now().strftime('%Y%m%d_%H%M%S') + '.json')
+    duration = float(sys.argv[2]) if len(sys.argv) > 2 else DURATION
+
+    # The I2C bus controller puts the simulated devices of the configuration on its bus
+    os.environ[HAL_ENVIRONMENT_VARIABLE] = SIMULATED
+
+    results = {'date': datetime.datetime.now().isoformat(timespec='seconds'),
+               'host': platform.node(),
+               'machine': platform.machine(),
+               'python': platform.python_version(),
+               'cpus': os.cpu_count(),
+               'duration': duration,
+               'i2c_transaction_latency': Config().hal.i2c_transaction_latency,
+               'i2c_byte_latency': Config().hal.i2c_byte_latency,
+               'lcd_chunk_size': Config().i2c_bus_controller.lcd_chunk_size,
+               'scenarios': {}}
+
+    for name, arbitrated, lcd_load in SCENARIOS:
+        log.info('Running the ' + name + ' scenario')
+        results['scenarios'][name] = run_scenario(name, arbitrated, lcd_load, duration)
+
+    os.makedirs(os.path.dirname(results_path) or '.', exist_ok=True)
+    with open(results_path, 'w') as results_file:
+        json.dump(results, results_file, indent=4)
+
+    log.info('Results written to ' + results_path)
+
+
+if __name__ == '__main__':
+    main()
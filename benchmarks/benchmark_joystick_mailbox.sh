@@ -0,0 +1,6 @@
+#!/bin/bash
+
+cd ~/spotmicroai
+export PYTHONPATH=.
+
+venv/bin/python3 benchmarks/benchmark_joystick_mailbox/benchmark_joystick_mailbox.py
@@ -0,0 +1,244 @@
+#!/home/pi/spotmicroai/venv/bin/python3 -u
+
+import multiprocessing
+import queue
+import time
+
+from spotmicroai.utilities.log import Logger
+from spotmicroai.utilities.latency import LatencyHistogram
+from spotmicroai.utilities.joystick_mailbox import JoystickMailbox, AXES, BUTTONS
+
+log = Logger().setup_logger('Benchmark joystick mailbox')
+
+ROUND_TRIPS = 5000
+
+# Stick moving: the joystick reports an event every millisecond while the motion loop ticks at 100Hz
+STICK_EVENTS = 2000
+STICK_EVENT_PERIOD = 0.001
+MOTION_LOOP_PERIOD = 0.01
+
+STOP = -1.0
+
+
+def joystick_states(round_trip):
+    # What the remote controller holds for a gamepad: every axis and button it reports
+    axis_states = {axis: 0.0 for axis in AXES[:8]}
+    button_states = {button: 0 for button in BUTTONS[13:28]}
+    axis_states['lx'] = round_trip
+    return axis_states, button_states
+
+
+def queue_echo(requests, responses):
+    while True:
+        event = requests.get()
+        responses.put(event)
+        if event['lx'] == STOP:
+            return
+
+
+def mailbox_echo(requests, responses):
+    while True:
+        event = requests.read_newer()
+        if event is None:
+            time.sleep(0)
+            continue
+
+        responses.publish({'lx': event['lx']}, {})
+        if event['lx'] == STOP:
+            return
+
+
+def benchmark_queue():
+    requests = multiprocessing.Queue(1)
+    responses = multiprocessing.Queue(1)
+    echo = multiprocessing.Process(target=queue_echo, args=(requests, responses))
+    echo.start()
+
+    round_trip_latency = LatencyHistogram()
+    send_latency = LatencyHistogram()
+
+    for round_trip in range(ROUND_TRIPS):
+        axis_states, button_states = joystick_states(round_trip)
+
+        start = time.perf_counter()
+        # The remote controller merged both dictionaries into a fresh one for every event
+        states = {}
+        states.update(button_states)
+        states.update(axis_states)
+        requests.put(states)
+        send_latency.add(time.perf_counter() - start)
+
+        responses.get()
+        round_trip_latency.add(time.perf_counter() - start)
+
+    requests.put({'lx': STOP})
+    responses.get()
+    echo.join()
+
+    return round_trip_latency, send_latency
+
+
+def benchmark_mailbox():
+    requests = JoystickMailbox(create=True)
+    responses = JoystickMailbox(create=True)
+    echo = multiprocessing.Process(target=mailbox_echo, args=(requests, responses))
+    echo.start()
+
+    round_trip_latency = LatencyHistogram()
+    send_latency = LatencyHistogram()
+
+    try:
+        for round_trip in range(ROUND_TRIPS):
+            axis_states, button_states = joystick_states(round_trip)
+
+            start = time.perf_counter()
+            requests.publish(axis_states, button_states)
+            send_latency.add(time.perf_counter() - start)
+
+            while responses.read_newer() is None:
+                time.sleep(0)
+            round_trip_latency.add(time.perf_counter() - start)
+
+        requests.publish({'lx': STOP}, {})
+        echo.join()
+
+    finally:
+        for mailbox in (requests, responses):
+            mailbox.close()
+            mailbox.unlink()
+
+    return round_trip_latency, send_latency
+
+
+def queue_motion_loop(requests, results):
+    # Control loop consumer: each tick drains the queue and keeps the newest state
+    received = []
+    while True:
+        time.sleep(MOTION_LOOP_PERIOD)
+        event = None
+        while True:
+            try:
+                event = requests.get_nowait()
+            except queue.Empty:
+                break
+        if event is None:
+            continue
+        if event['lx'] == STOP:
+            results.put(received)
+            return
+        received.append((int(event['lx']), time.monotonic()))
+
+
+def mailbox_motion_loop(requests, results):
+    received = []
+    while True:
+        time.sleep(MOTION_LOOP_PERIOD)
+        event = requests.read_newer()
+        if event is None:
+            continue
+        if event['lx'] == STOP:
+            results.put(received)
+            return
+        received.append((int(event['lx']), time.monotonic()))
+
+
+def stick_events(send):
+    # Events are produced on schedule, their age counts from when the joystick reported them
+    scheduled = []
+    blocked = LatencyHistogram()
+
+    start = time.monotonic()
+    for event in range(STICK_EVENTS):
+        event_time = start + event * STICK_EVENT_PERIOD
+        now = time.monotonic()
+        if event_time > now:
+            time.sleep(event_time - now)
+        scheduled.append(event_time)
+
+        axis_states, button_states = joystick_states(event)
+        send_start = time.monotonic()
+        send(axis_states, button_states)
+        blocked.add(time.monotonic() - send_start)
+
+    return scheduled, blocked
+
+
+def benchmark_queue_stick():
+    requests = multiprocessing.Queue(1)
+    results = multiprocessing.Queue()
+    motion_loop = multiprocessing.Process(target=queue_motion_loop, args=(requests, results))
+    motion_loop.start()
+
+    def send(axis_states, button_states):
+        states = {}
+        states.update(button_states)
+        states.update(axis_states)
+        requests.put(states)
+
+    scheduled, blocked = stick_events(send)
+    requests.put({'lx': STOP})
+    received = results.get()
+    motion_loop.join()
+
+    return stick_age(scheduled, received), blocked
+
+
+def benchmark_mailbox_stick():
+    requests = JoystickMailbox(create=True)
+    results = multiprocessing.Queue()
+    motion_loop = multiprocessing.Process(target=mailbox_motion_loop, args=(requests, results))
+    motion_loop.start()
+
+    try:
+        scheduled, blocked = stick_events(requests.publish)
+        requests.publish({'lx': STOP}, {})
+        received = results.get()
+        motion_loop.join()
+
+    finally:
+        requests.close()
+        requests.unlink()
+
+    return stick_age(scheduled, received), blocked
+
+
+def stick_age(scheduled, received):
+    age = LatencyHistogram()
+    for event, received_time in received:
+        age.add(received_time - scheduled[event])
+    return age
+
+
+def report_stick(name, age, blocked):
+    age = age.summary()
+    blocked = blocked.summary()
+
+    log.info(name + ': ' + str(age['count']) + ' states seen by the motion loop, ' +
+             'age p50/p99/max ' + str(age['p50_ms']) + '/' + str(age['p99_ms']) + '/' + str(age['max_ms']) + ' ms, ' +
+             'remote controller blocked mean/max ' + str(blocked['mean_ms']) + '/' + str(blocked['max_ms']) + ' ms')
+
+
+def report(name, round_trip_latency, send_latency):
+    round_trip = round_trip_latency.summary()
+    send = send_latency.summary()
+
+    log.info(name + ': round trip p50/p95/p99/max ' + str(round_trip['p50_ms']) + '/' + str(round_trip['p95_ms']) +
+             '/' + str(round_trip['p99_ms']) + '/' + str(round_trip['max_ms']) + ' ms, ' +
+             'sender side mean/p99 ' + str(send['mean_ms']) + '/' + str(send['p99_ms']) + ' ms')
+
+
+def main():
+    log.info('Benchmarking ' + str(ROUND_TRIPS) + ' joystick state round trips between two processes')
+
+    report('multiprocessing.Queue(1)', *benchmark_queue())
+    report('Shared memory mailbox', *benchmark_mailbox())
+
+    log.info('Benchmarking ' + str(STICK_EVENTS) + ' stick events, one per ' + str(STICK_EVENT_PERIOD * 1000) +
+             ' ms, read by a ' + str(int(1 / MOTION_LOOP_PERIOD)) + 'Hz motion loop')
+
+    report_stick('multiprocessing.Queue(1)', *benchmark_queue_stick())
+    report_stick('Shared memory mailbox', *benchmark_mailbox_stick())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/home/pi/spotmicroai/venv/bin/python3 -u
+
+import platform
+import time
+
+import numpy as np
+
+from spotmicroai.utilities.log import Logger
+from spotmicroai.motion_controller.kinematics import Kinematics, BodyPose, LEGS
+from spotmicroai.motion_controller.pose_cache import PoseCache
+
+log = Logger().setup_logger('Benchmark kinematics')
+
+# Random body poses solved in batches, from one pose per call, what the motion controller does on a joystick
+# event, to whole trajectories at once
+BATCH_SIZES = (1, 10, 100, 1000, 10000)
+POSES = 10000
+
+# Height in millimeters, roll, pitch and yaw in radians, x and y shifts in millimeters
+POSE_RANGES = np.array([[120.0, 210.0],
+                        [-0.3, 0.3],
+                        [-0.3, 0.3],
+                        [-0.3, 0.3],
+                        [-40.0, 40.0],
+                        [-40.0, 40.0]])
+
+# Poses of a stick held at a few positions, the filtered axis wandering around each of them, in millimeters
+STICK_POSITIONS = 20
+STICK_NOISE = 0.5
+GRID_STEPS = (0.5, 1.0, 2.0, 5.0)
+
+
+def random_poses(count, generator):
+    return POSE_RANGES[:, 0] + generator.random((count, len(BodyPose._fields))) * np.ptp(POSE_RANGES, axis=1)
+
+
+def main():
+    leg_kinematics = Kinematics()
+    poses = random_poses(POSES, np.random.default_rng(0))
+
+    log.info('NumPy ' + np.__version__ + ' on ' + platform.machine())
+
+    for batch_size in BATCH_SIZES:
+        batches = poses.reshape(-1, batch_size, len(BodyPose._fields))
+
+        start = time.perf_counter()
+        for batch in batches:
+            leg_kinematics.servo_angles(batch)
+        elapsed = time.perf_counter() - start
+
+        log.info('{:>6}'.format(batch_size) + ' poses per call: ' + '{:10.0f}'.format(POSES / elapsed) +
+                 ' solves/s, ' + '{:8.2f}'.format(elapsed / POSES * 1000000) + ' us/pose')
+
+    # Forward kinematics of the solved angles puts the feet back where the poses asked them
+    feet = leg_kinematics.feet_positions(poses)
+    angles, reachable = leg_kinematics.leg_angles(feet)
+    error = np.linalg.norm(leg_kinematics.leg_feet(angles) - feet, axis=-1)[reachable]
+
+    log.info('{:.1%}'.format(reachable.mean()) + ' of the poses reachable by all ' + str(len(LEGS)) +
+             ' legs, round trip error ' + '{:.2e}'.format(error.max()) + ' mm at most')
+
+    # One pose per event as the motion controller solves them, through the pose cache
+    generator = np.random.default_rng(1)
+    positions = random_poses(STICK_POSITIONS, generator)
+    held = positions[generator.integers(0, STICK_POSITIONS, POSES)]
+    held[:, [0, 4, 5]] += generator.normal(0.0, STICK_NOISE, (POSES, 3))
+    held = [BodyPose(*pose) for pose in held.tolist()]
+
+    start = time.perf_counter()
+    for pose in held:
+        leg_kinematics.servo_angles(pose)
+    log.info('Held stick, no cache: ' + '{:8.2f}'.format((time.perf_counter() - start) / POSES * 1000000) + ' us/pose')
+
+    for step in GRID_STEPS:
+        pose_cache = PoseCache(leg_kinematics, height_step=step, shift_step=step)
+
+        start = time.perf_counter()
+        for pose in held:
+            pose_cache.servo_angles(pose)
+        elapsed = time.perf_counter() - start
+
+        statistics = pose_cache.statistics()
+        log.info('Held stick, ' + '{:3.1f}'.format(step) + ' mm grid: ' + '{:8.2f}'.format(elapsed / POSES * 1000000) +
+                 ' us/pose, hit ratio ' + '{:.1%}'.format(statistics['hit_ratio']) + ', ' +
+                 str(statistics['entries']) + ' entries')
+
+
+if __name__ == '__main__':
+    main()
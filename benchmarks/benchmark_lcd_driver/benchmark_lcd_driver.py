@@ -0,0 +1,109 @@
+#!/home/pi/spotmicroai/venv/bin/python3 -u
+
+import time
+
+from spotmicroai.utilities.log import Logger
+from spotmicroai.lcd_screen_controller.LCD_16x2_I2C_driver import lcd, En, Rs, I2C_BLOCK_MAX
+
+log = Logger().setup_logger('Benchmark LCD driver')
+
+# Standard mode I2C: a byte and its ACK are 9 clocks, start/stop add about one more byte
+I2C_CLOCK = 100000
+I2C_BYTE_TIME = 9 / I2C_CLOCK
+
+TEXT = 'SpotMicro  47C  ' + 'Wireless Ctrl OK'
+REPEATS = 20
+
+
+class FakeSMBus:
+    # Counts the traffic, models the time it takes on the wire and decodes what a HD44780 behind a
+    # PCF8574 would end up showing, to check both paths draw the same thing
+
+    def __init__(self):
+        self.transactions = 0
+        self.bus_time = 0.0
+
+        self.ddram = {}
+        self._address = 0
+        self._state = 0
+        self._nibbles = []
+
+    def _transaction(self, data):
+        self.transactions += 1
+        # address byte + data bytes + start/stop
+        self.bus_time += (len(data) + 2) * I2C_BYTE_TIME
+        for state in data:
+            self._output(state)
+
+    def _output(self, state):
+        # The HD44780 latches a nibble when EN falls
+        if self._state & En and not state & En:
+            self._nibbles.append((self._state & 0xF0, self._state & Rs))
+            if len(self._nibbles) == 2:
+                (high, rs), (low, _) = self._nibbles
+                self._nibbles = []
+                self._byte(high | (low >> 4), rs)
+        self._state = state
+
+    def _byte(self, value, rs):
+        if rs:
+            self.ddram[self._address] = value
+            self._address += 1
+        elif value & 0x80:
+            self._address = value & 0x7F
+
+    def write_byte(self, addr, value):
+        self._transaction([value])
+
+    def write_i2c_block_data(self, addr, cmd, data):
+        assert len(data) <= I2C_BLOCK_MAX
+        self._transaction([cmd] + list(data))
+
+    def reset_counters(self):
+        self.transactions = 0
+        self.bus_time = 0.0
+
+
+def legacy_display_string(screen, string, line):
+    # What lcd_display_string did: one lcd_write per character, 6 transactions and the sleeps in between
+    screen.lcd_write(0x80 if line == 1 else 0xC0)
+    for char in string:
+        screen.lcd_write(ord(char), Rs)
+
+
+def run(name, display_string):
+    bus = FakeSMBus()
+    screen = lcd(bus=bus)
+    bus.reset_counters()
+
+    start = time.perf_counter()
+    for repeat in range(REPEATS):
+        display_string(screen, TEXT[:16], 1)
+        display_string(screen, TEXT[16:], 2)
+    python_time = time.perf_counter() - start
+
+    characters = REPEATS * len(TEXT)
+
+    # Sleeps and bus transfers don't overlap on the real thing, the bus is the only part not measured
+    total_time = python_time + bus.bus_time
+
+    log.info(name + ': ' + '{:.0f}'.format(characters / total_time) + ' chars/s, ' +
+             '{:.2f}'.format(bus.transactions / characters) + ' transactions/char, ' +
+             '{:.3f}'.format(python_time / characters * 1000) + ' ms/char in python (sleeps included), ' +
+             '{:.3f}'.format(bus.bus_time / characters * 1000) + ' ms/char on the bus')
+
+    return bytes(bus.ddram.get(address, 0x20) for address in list(range(0x00, 0x10)) + list(range(0x40, 0x50)))
+
+
+def main():
+    log.info('Writing ' + str(REPEATS) + ' times both rows of a 16x2 screen at ' + str(I2C_CLOCK // 1000) + 'kHz')
+
+    legacy = run('Per nibble writes', legacy_display_string)
+    bulk = run('Coalesced sequence', lambda screen, string, line: screen.lcd_display_string(string, line))
+
+    if legacy != bulk or legacy.decode() != TEXT:
+        log.error('Screen content differs: ' + repr(legacy) + ' / ' + repr(bulk))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+#!/home/pi/spotmicroai/venv/bin/python3 -u
+
+import json
+import random
+import time
+
+from spotmicroai.utilities.log import Logger
+from spotmicroai.motion_controller.pca9685_frame_writer import PCA9685FrameWriter, angle_to_ticks, \
+    PCA9685_LED0_ON_L, PCA9685_BYTES_PER_CHANNEL
+
+log = Logger().setup_logger('Benchmark PCA9685 frame writer')
+
+POSES = 10000
+
+
+class InMemoryI2CDevice:
+    # Stand-in for adafruit_bus_device.i2c_device.I2CDevice that only counts the traffic
+
+    def __init__(self):
+        self.registers = bytearray(256)
+        self.transactions = 0
+        self.bytes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def write(self, buffer):
+        self.transactions += 1
+        self.bytes += len(buffer)
+        register = buffer[0]
+        self.registers[register:register + len(buffer) - 1] = buffer[1:]
+
+    def write_then_readinto(self, out_buffer, in_buffer):
+        self.transactions += 1
+        self.bytes += len(out_buffer) + len(in_buffer)
+        register = out_buffer[0]
+        in_buffer[:] = self.registers[register:register + len(in_buffer)]
+
+    def reset_counters(self):
+        self.transactions = 0
+        self.bytes = 0
+
+
+def load_servos(configuration_file='spotmicroai.default'):
+    with open(configuration_file) as json_file:
+        values = json.load(json_file)
+
+    boards = {}
+    for board_name, board in values['motion_controller'][0]['boards'][0].items():
+        boards[int(board_name[len('pca9685_'):])] = board[0]
+
+    servos = []
+    for servo_name, servo in values['motion_controller'][0]['servos'][0].items():
+        servos.append((servo_name, servo[0]))
+
+    return boards, servos
+
+
+def frequency_of(board):
+    # What adafruit_pca9685 reports back after setting the frequency
+    prescale = int(board['reference_clock_speed'] / 4096.0 / board['frequency'] + 0.5) - 1
+    return board['reference_clock_speed'] / 4096 / (prescale + 1)
+
+
+def legacy_move(devices, frequencies, servos, pose):
+    # Per servo path: adafruit writes pwm_regs[channel] = (0, ticks) as its own transaction
+    for (servo_name, servo), angle in zip(servos, pose):
+        ticks = angle_to_ticks(angle, servo['min_pulse'], servo['max_pulse'], frequencies[servo['pca9685']])
+        register = PCA9685_LED0_ON_L + servo['channel'] * PCA9685_BYTES_PER_CHANNEL
+        with devices[servo['pca9685']] as i2c:
+            i2c.write(bytes([register, 0x00, 0x00, ticks & 0xFF, (ticks >> 8) & 0x0F]))
+
+
+def frame_move(frame_writers, servos, pose):
+    for (servo_name, servo), angle in zip(servos, pose):
+        frame_writers[servo['pca9685']].set_angle(servo['channel'], angle, servo['min_pulse'], servo['max_pulse'])
+
+    for frame_writer in frame_writers.values():
+        frame_writer.flush()
+
+
+def report(name, devices, elapsed):
+    transactions = sum(device.transactions for device in devices.values())
+    total_bytes = sum(device.bytes for device in devices.values())
+
+    log.info(name + ': ' + '{:.2f}'.format(transactions / POSES) + ' transactions/pose, ' +
+             '{:.2f}'.format(total_bytes / POSES) + ' bytes/pose, ' +
+             '{:.1f}'.format(elapsed / POSES * 1000000) + ' us/pose (python side only)')
+
+    for board, device in sorted(devices.items()):
+        log.info('    pca9685_' + str(board) + ': ' + '{:.2f}'.format(device.transactions / POSES) +
+                 ' transactions/pose, ' + '{:.2f}'.format(device.bytes / POSES) + ' bytes/pose')
+
+
+def main():
+    boards, servos = load_servos()
+    frequencies = {board: frequency_of(settings) for board, settings in boards.items()}
+
+    log.info('Benchmarking ' + str(POSES) + ' poses of ' + str(len(servos)) + ' servos on ' +
+             str(len(boards)) + ' PCA9685 board(s)')
+
+    random.seed(0)
+    poses = [[random.randint(0, 180) for _ in servos] for _ in range(POSES)]
+
+    legacy_devices = {board: InMemoryI2CDevice() for board in boards}
+    start = time.perf_counter()
+    for pose in poses:
+        legacy_move(legacy_devices, frequencies, servos, pose)
+    report('Per servo writes', legacy_devices, time.perf_counter() - start)
+
+    frame_devices = {board: InMemoryI2CDevice() for board in boards}
+    frame_writers = {board: PCA9685FrameWriter(None, i2c_device=frame_devices[board], frequency=frequencies[board])
+                     for board in boards}
+    for device in frame_devices.values():
+        device.reset_counters()
+
+    start = time.perf_counter()
+    for pose in poses:
+        frame_move(frame_writers, servos, pose)
+    report('Frame writes', frame_devices, time.perf_counter() - start)
+
+    for board in boards:
+        legacy = legacy_devices[board].registers[PCA9685_LED0_ON_L:PCA9685_LED0_ON_L + 64]
+        frame = frame_devices[board].registers[PCA9685_LED0_ON_L:PCA9685_LED0_ON_L + 64]
+        if legacy != frame:
+            log.error('pca9685_' + str(board) + ' registers differ between both paths')
+
+    # Analog stick up and down: only the 8 leg and feet servos follow the stick, the rest keep their angle
+    analog_poses = []
+    for pose in range(POSES):
+        raw_value = random.uniform(-1, 1)
+        analog_poses.append([90 + int(raw_value * 40) if '_leg_' in servo_name or '_feet_' in servo_name else 90
+                             for servo_name, servo in servos])
+
+    for device in frame_devices.values():
+        device.reset_counters()
+    for frame_writer in frame_writers.values():
+        frame_writer.writes_issued = frame_writer.writes_skipped = frame_writer.transactions = 0
+
+    start = time.perf_counter()
+    for pose in analog_poses:
+        frame_move(frame_writers, servos, pose)
+    report('Frame writes, analog stick poses', frame_devices, time.perf_counter() - start)
+
+    writes_issued = sum(frame_writer.writes_issued for frame_writer in frame_writers.values())
+    writes_skipped = sum(frame_writer.writes_skipped for frame_writer in frame_writers.values())
+    log.info('    ' + '{:.2f}'.format(writes_issued / POSES) + ' channel writes issued/pose, ' +
+             '{:.2f}'.format(writes_skipped / POSES) + ' skipped/pose')
+
+
+if __name__ == '__main__':
+    main()
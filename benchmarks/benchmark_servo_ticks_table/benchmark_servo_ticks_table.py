@@ -0,0 +1,126 @@
+#!/home/pi/spotmicroai/venv/bin/python3 -u
+
+import json
+import random
+import time
+
+import numpy as np
+
+from spotmicroai.utilities.log import Logger
+from spotmicroai.motion_controller.pca9685_frame_writer import angle_to_ticks
+import spotmicroai.motion_controller.joint_table as joint_table
+
+log = Logger().setup_logger('Benchmark servo ticks table')
+
+POSES = 20000
+
+
+class PWMChannel:
+    # Enough of adafruit_pca9685.PWMChannel for adafruit_motor.servo, without the I2C write
+
+    def __init__(self, frequency):
+        self.frequency = frequency
+        self.ticks = 0
+        self._duty_cycle = 0
+
+    @property
+    def duty_cycle(self):
+        return self._duty_cycle
+
+    @duty_cycle.setter
+    def duty_cycle(self, value):
+        self._duty_cycle = value
+        self.ticks = 0x1000 if value == 0xFFFF else (value + 1) >> 4
+
+
+def load_joint_table(configuration_file='spotmicroai.default'):
+    with open(configuration_file) as json_file:
+        values = json.load(json_file)
+
+    motion_controller = values['motion_controller'][0]
+
+    frequencies = {}
+    for board_name, board in motion_controller['boards'][0].items():
+        board = board[0]
+        prescale = int(board['reference_clock_speed'] / 4096.0 / board['frequency'] + 0.5) - 1
+        frequencies[int(board_name[len('pca9685_'):])] = board['reference_clock_speed'] / 4096 / (prescale + 1)
+
+    joints = joint_table.JointTable()
+    for joint, joint_name in enumerate(joint_table.JOINTS):
+        servo = motion_controller['servos'][0][joint_name][0]
+        joints.set_joint(joint, servo['pca9685'], servo['channel'], servo['min_pulse'], servo['max_pulse'],
+                         servo['rest_angle'])
+
+    frequency = np.array([frequencies[board] for board in joints.board])
+
+    return joints, frequency
+
+
+def report(name, elapsed):
+    log.info('{:<28}'.format(name) + '{:8.2f}'.format(elapsed / POSES * 1000000) + ' us/pose, ' +
+             '{:6.3f}'.format(elapsed / POSES / len(joint_table.JOINTS) * 1000000) + ' us/servo')
+
+
+def main():
+    joints, frequency = load_joint_table()
+
+    start = time.perf_counter()
+    joints.build_ticks_table(frequency)
+    log.info('Built ' + str(joints.ticks_table.shape[0]) + ' tables of ' + str(joints.ticks_table.shape[1]) +
+             ' entries (' + str(joints.ticks_table.nbytes) + ' bytes) in ' +
+             '{:.2f}'.format((time.perf_counter() - start) * 1000) + ' ms')
+
+    random.seed(0)
+    poses = [np.array([random.randint(0, 1800) / 10 for _ in joint_table.JOINTS]) for _ in range(POSES)]
+    pose_lists = [pose.tolist() for pose in poses]
+
+    try:
+        from adafruit_motor import servo
+
+        channels = [PWMChannel(float(frequency[joint])) for joint in range(len(joint_table.JOINTS))]
+        servos = [servo.Servo(channels[joint], min_pulse=int(joints.min_pulse[joint]), max_pulse=int(joints.max_pulse[joint]))
+                  for joint in range(len(joint_table.JOINTS))]
+
+        start = time.perf_counter()
+        for pose in pose_lists:
+            for joint_servo, angle in zip(servos, pose):
+                joint_servo.angle = angle
+        report('adafruit_motor servo.angle', time.perf_counter() - start)
+
+    except ImportError:
+        channels = None
+        log.info('adafruit_motor is not installed, skipping the adafruit path')
+
+    min_pulse = joints.min_pulse.tolist()
+    max_pulse = joints.max_pulse.tolist()
+    frequencies = frequency.tolist()
+
+    start = time.perf_counter()
+    for pose in pose_lists:
+        for joint, angle in enumerate(pose):
+            angle_to_ticks(angle, min_pulse[joint], max_pulse[joint], frequencies[joint])
+    report('angle_to_ticks per servo', time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for pose in poses:
+        joints.command[:] = pose
+        joints.ticks()
+    report('ticks table gather', time.perf_counter() - start)
+
+    mismatches = 0
+    for pose in pose_lists[:1000]:
+        joints.command[:] = pose
+        ticks = joints.ticks().tolist()
+        for joint, angle in enumerate(pose):
+            if ticks[joint] != angle_to_ticks(angle, min_pulse[joint], max_pulse[joint], frequencies[joint]):
+                mismatches += 1
+            if channels:
+                servos[joint].angle = angle
+                if ticks[joint] != channels[joint].ticks:
+                    mismatches += 1
+
+    log.info(str(mismatches) + ' mismatches between the ticks table and the reference paths')
+
+
+if __name__ == '__main__':
+    main()
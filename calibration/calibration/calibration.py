@@ -12,6 +12,7 @@ import RPi.GPIO as GPIO
 
 from spotmicroai.utilities.log import Logger
 from spotmicroai.utilities.config import Config
+from spotmicroai.hal.i2c_journal import load_i2c_journal, JournaledI2C
 
 log = Logger().setup_logger('CALIBRATE SERVOS')
 
@@ -27,6 +28,11 @@ GPIO.output(gpio_port, False)
 
 i2c = busio.I2C(SCL, SDA)
 
+# Shares the bus with the robot's controllers, its transactions go to the same journal
+i2c_journal = load_i2c_journal('calibration')
+if i2c_journal:
+    i2c = JournaledI2C(i2c, i2c_journal)
+
 while True:
     options = {
         0: 'rear_shoulder_left   - PCA[' + str(Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_SHOULDER_LEFT_PCA9685)) + '] CHANNEL[' + str(Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_SHOULDER_LEFT_CHANNEL)) + ']  - ANGLE[' + str(Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_SHOULDER_LEFT_REST_ANGLE)) + ']',
@@ -0,0 +1,206 @@
+#!/home/pi/spotmicroai/venv/bin/python3 -u
+
+import argparse
+import glob
+import heapq
+import json
+import os
+import sys
+
+from spotmicroai.utilities.config import Config
+from spotmicroai.utilities.latency import LatencyHistogram
+from spotmicroai.hal.i2c_journal import read_journal, KINDS, ERROR, NO_REGISTER
+
+# Offline analysis of the I2C journals: how busy the bus was, who used it, and when controllers got in each
+# other's way. Journaling must be enabled in ~/spotmicroai.json: "i2c_journal": [{"enabled": true}]
+# Times are from the monotonic clock, analyze the journals of a single boot together.
+
+
+class Transaction:
+    __slots__ = ('start', 'end', 'length', 'address', 'register', 'kind', 'controller', 'contended')
+
+    def __init__(self, controller, start, end, length, address, register, kind):
+        self.controller = controller
+        self.start = start
+        self.end = end
+        self.length = length
+        self.address = address
+        self.register = register
+        self.kind = kind
+        self.contended = False
+
+
+def load_transactions(paths):
+    # Every segment is in time order already, merged into one timeline
+    segments = []
+    for path in paths:
+        try:
+            controller, pid, records = read_journal(path)
+        except ValueError as e:
+            print(str(e), file=sys.stderr)
+            continue
+        segments.append([Transaction(controller, *record) for record in records])
+
+    return list(heapq.merge(*segments, key=lambda transaction: transaction.start))
+
+
+def analyze(transactions):
+    """
+    Utilization is the share of the time at least one transaction was in flight. A contention window is
+    the time transactions of two controllers were in flight together: one of them waited for the bus, its
+    latency includes the other one's transfer.
+    """
+    span = transactions[-1].end - transactions[0].start if transactions else 0.0
+
+    busy_time = 0.0
+    busy_until = None
+    busy_since = None
+
+    contention_windows = []
+    contending_pairs = {}
+    active = []
+
+    for transaction in transactions:
+        # Union of the transaction intervals
+        if busy_until is None or transaction.start > busy_until:
+            if busy_until is not None:
+                busy_time += busy_until - busy_since
+            busy_since = transaction.start
+            busy_until = transaction.end
+        else:
+            busy_until = max(busy_until, transaction.end)
+
+        active = [other for other in active if other.end > transaction.start]
+        for other in active:
+            if other.controller != transaction.controller:
+                window_end = min(other.end, transaction.end)
+                contention_windows.append((transaction.start, window_end))
+                transaction.contended = other.contended = True
+
+                pair = ' / '.join(sorted((other.controller, transaction.controller)))
+                contending_pairs[pair] = contending_pairs.get(pair, 0) + 1
+        active.append(transaction)
+
+    if busy_until is not None:
+        busy_time += busy_until - busy_since
+
+    controllers = {}
+    devices = {}
+    for transaction in transactions:
+        latency = transaction.end - transaction.start
+
+        controller = controllers.setdefault(transaction.controller, {
+            'transactions': 0, 'bytes': 0, 'errors': 0,
+            'latency': LatencyHistogram(), 'latency_contended': LatencyHistogram(),
+            'latency_alone': LatencyHistogram()})
+        controller['transactions'] += 1
+        controller['bytes'] += transaction.length
+        controller['errors'] += 1 if transaction.kind & ERROR else 0
+        controller['latency'].add(latency)
+        controller['latency_contended' if transaction.contended else 'latency_alone'].add(latency)
+
+        device = devices.setdefault('0x%02x' % transaction.address, {
+            'transactions': 0, 'bytes': 0, 'controllers': set(), 'kinds': {}, 'registers': {},
+            'latency': LatencyHistogram()})
+        device['transactions'] += 1
+        device['bytes'] += transaction.length
+        device['controllers'].add(transaction.controller)
+        kind = KINDS.get(transaction.kind & ~(ERROR | NO_REGISTER), 'unknown')
+        device['kinds'][kind] = device['kinds'].get(kind, 0) + 1
+        if not transaction.kind & NO_REGISTER:
+            register = '0x%02x' % transaction.register
+            device['registers'][register] = device['registers'].get(register, 0) + 1
+        device['latency'].add(latency)
+
+    for controller in controllers.values():
+        for histogram in ('latency', 'latency_contended', 'latency_alone'):
+            controller[histogram] = controller[histogram].summary()
+
+    for device in devices.values():
+        device['bytes_per_second'] = round(device['bytes'] / span, 1) if span else 0.0
+        device['controllers'] = sorted(device['controllers'])
+        # The busiest registers only, a PCA9685 frame writer starts its blocks on a handful of them
+        device['registers'] = dict(sorted(device['registers'].items(), key=lambda item: -item[1])[:8])
+        device['latency'] = device['latency'].summary()
+
+    contention_time = 0.0
+    longest_contention = 0.0
+    for window_start, window_end in contention_windows:
+        contention_time += window_end - window_start
+        longest_contention = max(longest_contention, window_end - window_start)
+
+    return {'transactions': len(transactions),
+            'span_s': round(span, 3),
+            'busy_s': round(busy_time, 3),
+            'utilization': round(busy_time / span, 4) if span else 0.0,
+            'controllers': controllers,
+            'devices': devices,
+            'contention': {'windows': len(contention_windows),
+                           'time_ms': round(contention_time * 1000, 3),
+                           'longest_ms': round(longest_contention * 1000, 3),
+                           'pairs': contending_pairs}}
+
+
+def latency_line(summary):
+    return (str(summary['count']) + ' transactions, p50/p95/p99/max ' + str(summary['p50_ms']) + '/' +
+            str(summary['p95_ms']) + '/' + str(summary['p99_ms']) + '/' + str(summary['max_ms']) + ' ms')
+
+
+def print_analysis(analysis):
+    print(str(analysis['transactions']) + ' transactions over ' + str(analysis['span_s']) + ' s, bus busy ' +
+          str(analysis['busy_s']) + ' s (' + str(round(analysis['utilization'] * 100, 2)) + '%)')
+
+    print()
+    print('Controllers')
+    for name, controller in analysis['controllers'].items():
+        print('  ' + name + ': ' + str(controller['bytes']) + ' bytes, ' + str(controller['errors']) + ' errors')
+        print('    latency           ' + latency_line(controller['latency']))
+        print('    sharing the bus   ' + latency_line(controller['latency_contended']))
+        print('    bus to themselves ' + latency_line(controller['latency_alone']))
+
+    print()
+    print('Devices')
+    for address, device in sorted(analysis['devices'].items()):
+        print('  ' + address + ' (' + ', '.join(device['controllers']) + '): ' + str(device['bytes']) + ' bytes, ' +
+              str(device['bytes_per_second']) + ' bytes/s, ' +
+              ', '.join(str(count) + ' ' + kind for kind, count in device['kinds'].items()))
+        print('    latency ' + latency_line(device['latency']))
+
+    contention = analysis['contention']
+    print()
+    print('Contention: ' + str(contention['windows']) + ' windows, ' + str(contention['time_ms']) + ' ms in total, ' +
+          'longest ' + str(contention['longest_ms']) + ' ms')
+    for pair, count in contention['pairs'].items():
+        print('  ' + pair + ': ' + str(count))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SpotMicro I2C journal analyzer')
+    parser.add_argument('journals', nargs='*',
+                        help='journal segments or directories, the configured journal directory by default')
+    parser.add_argument('--json', action='store_true', help='analysis as JSON')
+    arguments = parser.parse_args()
+
+    paths = []
+    for journal in arguments.journals or [os.path.expanduser(Config().i2c_journal.directory)]:
+        if os.path.isdir(journal):
+            paths.extend(sorted(glob.glob(os.path.join(journal, '*.journal'))))
+        else:
+            paths.append(journal)
+
+    transactions = load_transactions(paths)
+    if not transactions:
+        print('No I2C transactions journaled in ' + ', '.join(arguments.journals or paths or ['the journal directory']),
+              file=sys.stderr)
+        sys.exit(1)
+
+    analysis = analyze(transactions)
+
+    if arguments.json:
+        print(json.dumps(analysis, indent=4))
+    else:
+        print_analysis(analysis)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+#!/home/pi/spotmicroai/venv/bin/python3 -u
+
+from spotmicroai.utilities.log import Logger
+from spotmicroai.utilities.config import AxisFilterConfig
+from spotmicroai.remote_controller.axis_filter import AxisFilter
+from spotmicroai.remote_controller.remote_controller import RemoteControllerController, JS_EVENT, \
+    JS_EVENT_AXIS, FILTER_SETTLE_INTERVAL
+
+log = Logger().setup_logger('Testing axis filter')
+
+# The stick filters of spotmicroai.default
+STICK_FILTER = AxisFilterConfig(deadzone=0.05, hysteresis=0.02, min_cutoff=5.0, beta=0.5, threshold=0.01)
+
+RY = 4
+
+
+def create_remote_controller():
+    # Just the state process_events and settle_filters need, no device, queues or signals
+    remote_controller = RemoteControllerController.__new__(RemoteControllerController)
+    remote_controller.axis_map = ('lx', 'ly', 'lz', 'rx', 'ry', 'rz')
+    remote_controller.button_map = ()
+    remote_controller.axis_states = {axis: 0.0 for axis in remote_controller.axis_map}
+    remote_controller.button_states = {}
+    remote_controller.button_presses = {}
+    remote_controller._axis_filters = {'ry': AxisFilter.from_config(STICK_FILTER)}
+    remote_controller.axis_updates = 0
+    remote_controller.suppressed_axis_updates = 0
+    return remote_controller
+
+
+def ramp(start, end, events, interval_ms):
+    # Axis events of a stick pushed from start to end, as the kernel reports them
+    return b''.join(JS_EVENT.pack(event * interval_ms, int((start + (end - start) * event / events) * 32767),
+                                  JS_EVENT_AXIS, RY) for event in range(1, events + 1))
+
+
+def test_held_stick_settles_where_it_is():
+    remote_controller = create_remote_controller()
+
+    remote_controller.process_events(ramp(0.0, 0.5, 10, 4))
+    # The low-pass still lags behind the stick when the events stop
+    assert remote_controller.axis_states['ry'] < 0.4
+
+    for step in range(100):
+        if not remote_controller._axis_filters['ry'].settling:
+            break
+        remote_controller.settle_filters(FILTER_SETTLE_INTERVAL)
+
+    assert not remote_controller._axis_filters['ry'].settling
+    # 0.5 rescaled after the 0.05 deadzone
+    assert remote_controller.axis_states['ry'] == 0.474
+
+
+def test_settled_filters_stay_quiet():
+    axis_filter = AxisFilter.from_config(STICK_FILTER)
+
+    assert axis_filter.settle(FILTER_SETTLE_INTERVAL) is None
+
+    # Full deflection and centre are never filtered, nothing to catch up with
+    assert axis_filter.update(1.0, 0.004) == 1.0
+    assert not axis_filter.settling
+    assert axis_filter.update(0.0, 0.008) == 0.0
+    assert not axis_filter.settling
+    assert axis_filter.settle(FILTER_SETTLE_INTERVAL) is None
+
+
+if __name__ == '__main__':
+    for test in (test_held_stick_settles_where_it_is, test_settled_filters_stay_quiet):
+        test()
+        log.info(test.__name__ + ' OK')
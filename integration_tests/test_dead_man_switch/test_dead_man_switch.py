@@ -0,0 +1,215 @@
+#!/home/pi/spotmicroai/venv/bin/python3 -u
+
+import threading
+
+from spotmicroai.utilities.log import Logger
+from spotmicroai.utilities.heartbeat import Heartbeat
+from spotmicroai.utilities.status_board import StatusBoard
+import spotmicroai.utilities.status_board as status_board
+from spotmicroai.abort_controller.abort_signal import AbortSignal
+from spotmicroai.abort_controller.abort_controller import AbortController
+from spotmicroai.abort_controller.dead_man_switch import DeadManSwitch
+from spotmicroai.hal.simulated import SimulatedGPIO
+
+log = Logger().setup_logger('Testing dead man switch')
+
+GPIO_PORT = 17
+PERIOD = 0.01
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+def create_abort_controller(clock, heartbeat, abort_signal, board):
+    # Just the state activate_servos, abort and check_motion_heartbeat need, no queues, threads or signals
+    gpio = SimulatedGPIO(clock=clock)
+
+    abort_controller = AbortController.__new__(AbortController)
+    abort_controller.gpio_port = GPIO_PORT
+    abort_controller._gpio = gpio
+    abort_controller._gpio_lock = threading.RLock()
+    abort_controller._abort_signal = abort_signal
+    abort_controller._status_board = board
+    abort_controller._heartbeat = heartbeat
+    abort_controller._dead_man_switch = DeadManSwitch(deadline=0.1, jitter_budget=0.02, late_beats=3, clock=clock)
+
+    return abort_controller, gpio
+
+
+def with_abort_controller(test):
+    def run():
+        clock = FakeClock()
+        heartbeat = Heartbeat(create=True)
+        abort_signal = AbortSignal(create=True)
+        board = StatusBoard(create=True)
+        try:
+            abort_controller, gpio = create_abort_controller(clock, heartbeat, abort_signal, board)
+            test(clock, heartbeat, abort_controller, gpio, board)
+        finally:
+            for shared in (heartbeat, abort_signal, board):
+                shared.close()
+                shared.unlink()
+
+    run.__name__ = test.__name__
+    return run
+
+
+def beat(clock, heartbeat, jitter=0.0, loop_time=0.002):
+    clock.advance(PERIOD + jitter)
+    heartbeat.beat(clock(), loop_time, jitter)
+
+
+def test_heartbeat_reads_back_the_last_beat():
+    heartbeat = Heartbeat(create=True)
+    try:
+        assert heartbeat.read() is None
+
+        heartbeat.beat(12.5, 0.003, 0.0004)
+        heartbeat.beat(12.51, 0.004, 0.0005)
+
+        state = heartbeat.read()
+        assert state.beats == 2
+        assert state.beat_at == 12.51
+        assert state.loop_time == 0.004
+        assert state.jitter == 0.0005
+    finally:
+        heartbeat.close()
+        heartbeat.unlink()
+
+
+def test_disarmed_switch_never_trips():
+    clock = FakeClock()
+    dead_man_switch = DeadManSwitch(deadline=0.1, clock=clock)
+
+    clock.advance(10)
+    assert dead_man_switch.check(None) is None
+
+
+def test_trips_when_heartbeats_stop():
+    clock = FakeClock()
+    heartbeat = Heartbeat(create=True)
+    try:
+        dead_man_switch = DeadManSwitch(deadline=0.1, clock=clock)
+        dead_man_switch.arm()
+
+        for tick in range(50):
+            beat(clock, heartbeat)
+            assert dead_man_switch.check(heartbeat.read()) is None
+
+        clock.advance(0.099)
+        assert dead_man_switch.check(heartbeat.read()) is None
+
+        clock.advance(0.002)
+        assert 'no motion loop heartbeat' in dead_man_switch.check(heartbeat.read())
+        assert dead_man_switch.trips == 1
+
+        # Tripped once, disarmed until the servos are powered again
+        clock.advance(1)
+        assert dead_man_switch.check(heartbeat.read()) is None
+    finally:
+        heartbeat.close()
+        heartbeat.unlink()
+
+
+def test_deadline_counts_from_arming():
+    # A motion loop that died before the servos were powered: its last beat is old, the deadline still applies
+    clock = FakeClock()
+    heartbeat = Heartbeat(create=True)
+    try:
+        beat(clock, heartbeat)
+        clock.advance(5)
+
+        dead_man_switch = DeadManSwitch(deadline=0.1, clock=clock)
+        dead_man_switch.arm()
+        assert dead_man_switch.check(heartbeat.read()) is None
+
+        clock.advance(0.05)
+        assert dead_man_switch.check(heartbeat.read()) is None
+
+        clock.advance(0.06)
+        assert dead_man_switch.check(heartbeat.read()) is not None
+    finally:
+        heartbeat.close()
+        heartbeat.unlink()
+
+
+def test_trips_after_consecutive_late_beats_only():
+    clock = FakeClock()
+    heartbeat = Heartbeat(create=True)
+    try:
+        dead_man_switch = DeadManSwitch(deadline=0.1, jitter_budget=0.02, late_beats=3, clock=clock)
+        dead_man_switch.arm()
+
+        # Isolated late ticks are tolerated
+        for tick in range(10):
+            beat(clock, heartbeat, jitter=0.001 if tick % 2 else 0.03)
+            assert dead_man_switch.check(heartbeat.read()) is None
+
+        # Same beat seen twice counts once
+        beat(clock, heartbeat, jitter=0.03)
+        assert dead_man_switch.check(heartbeat.read()) is None
+        assert dead_man_switch.check(heartbeat.read()) is None
+        beat(clock, heartbeat, jitter=0.03)
+        assert dead_man_switch.check(heartbeat.read()) is None
+
+        beat(clock, heartbeat, jitter=0.03, loop_time=0.04)
+        reason = dead_man_switch.check(heartbeat.read())
+        assert '3 motion loop ticks in a row' in reason
+        assert 'loop time 40.0 ms' in reason
+    finally:
+        heartbeat.close()
+        heartbeat.unlink()
+
+
+@with_abort_controller
+def test_abort_controller_cuts_the_servos_when_the_motion_loop_hangs(clock, heartbeat, abort_controller, gpio,
+                                                                      board):
+    abort_controller.activate_servos(0)
+    assert gpio.pins[GPIO_PORT] == gpio.LOW
+    assert board.get(status_board.ABORT_CONTROLLER)[0] == status_board.STATUS_ON
+
+    for tick in range(20):
+        beat(clock, heartbeat)
+        assert not abort_controller.check_motion_heartbeat()
+    assert gpio.pins[GPIO_PORT] == gpio.LOW
+
+    # move() stuck in an I2C write
+    clock.advance(0.2)
+    assert abort_controller.check_motion_heartbeat()
+    assert gpio.pins[GPIO_PORT] == gpio.HIGH
+    assert board.get(status_board.ABORT_CONTROLLER)[0] == status_board.STATUS_OFF
+
+    # Powering the servos again gives the loop a fresh deadline
+    abort_controller.activate_servos(0)
+    beat(clock, heartbeat)
+    assert not abort_controller.check_motion_heartbeat()
+    assert gpio.pins[GPIO_PORT] == gpio.LOW
+
+
+@with_abort_controller
+def test_abort_controller_ignores_the_heartbeat_while_the_servos_are_cut(clock, heartbeat, abort_controller, gpio,
+                                                                        board):
+    abort_controller.abort()
+
+    clock.advance(10)
+    assert not abort_controller.check_motion_heartbeat()
+    assert gpio.pins[GPIO_PORT] == gpio.HIGH
+
+
+if __name__ == '__main__':
+    for test in (test_heartbeat_reads_back_the_last_beat, test_disarmed_switch_never_trips,
+                 test_trips_when_heartbeats_stop, test_deadline_counts_from_arming,
+                 test_trips_after_consecutive_late_beats_only,
+                 test_abort_controller_cuts_the_servos_when_the_motion_loop_hangs,
+                 test_abort_controller_ignores_the_heartbeat_while_the_servos_are_cut):
+        test()
+        log.info(test.__name__ + ' OK')
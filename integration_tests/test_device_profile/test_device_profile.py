@@ -0,0 +1,129 @@
+#!/home/pi/spotmicroai/venv/bin/python3 -u
+
+import os
+import tempfile
+
+from spotmicroai.utilities.log import Logger
+from spotmicroai.remote_controller.device_profile import DeviceProfiles, JSIOCGNAME, JSIOCGAXES, \
+    JSIOCGBUTTONS, JSIOCGAXMAP, JSIOCGBTNMAP
+from spotmicroai.remote_controller.device_watcher import PollingDeviceWatcher
+from spotmicroai.remote_controller.remote_controller import RemoteControllerController, JS_EVENT
+
+log = Logger().setup_logger('Testing device profile')
+
+GAMEPAD_NAME = 'Wireless Controller'
+GAMEPAD_AXES = [0x00, 0x01, 0x02, 0x03, 0x04, 0x05, 0x10, 0x11]
+GAMEPAD_BUTTONS = [0x130, 0x131, 0x133, 0x134, 0x136, 0x137, 0x138, 0x139, 0x13a, 0x13b, 0x13c, 0x13d, 0x13e]
+
+
+class FakeJoystick:
+    # Answers the joystick ioctls from a script instead of the driver and counts them
+
+    def __init__(self, name, axes, buttons):
+        self.name = name
+        self.axes = axes
+        self.buttons = buttons
+        self.calls = []
+
+    def ioctl(self, fd, request, buf):
+        self.calls.append(request)
+
+        if request == JSIOCGNAME(len(buf)):
+            name = self.name.encode('utf-8')[:len(buf) - 1]
+            buf[:len(name)] = type(buf)(buf.typecode, name)
+        elif request == JSIOCGAXES:
+            buf[0] = len(self.axes)
+        elif request == JSIOCGBUTTONS:
+            buf[0] = len(self.buttons)
+        elif request == JSIOCGAXMAP:
+            buf[:len(self.axes)] = type(buf)(buf.typecode, self.axes)
+        elif request == JSIOCGBTNMAP:
+            buf[:len(self.buttons)] = type(buf)(buf.typecode, self.buttons)
+        else:
+            raise OSError('Unexpected ioctl 0x%x' % request)
+
+        return 0
+
+
+def create_remote_controller(joystick, directory):
+    # Just the state check_for_connected_devices and process_events need, no queues or signals
+    remote_controller = RemoteControllerController.__new__(RemoteControllerController)
+    remote_controller.connected_device = False
+    remote_controller.axis_states = {}
+    remote_controller.button_states = {}
+    remote_controller.button_presses = {}
+    remote_controller.axis_map = []
+    remote_controller.button_map = []
+    remote_controller.jsdev = None
+    remote_controller._axis_filters = {}
+    remote_controller.axis_updates = 0
+    remote_controller.suppressed_axis_updates = 0
+    remote_controller._device_profiles = DeviceProfiles(ioctl=joystick.ioctl)
+    remote_controller._device_watcher = PollingDeviceWatcher('js0', directory)
+    return remote_controller
+
+
+def test_profile_is_read_once_per_device():
+    joystick = FakeJoystick(GAMEPAD_NAME, GAMEPAD_AXES, GAMEPAD_BUTTONS)
+    profiles = DeviceProfiles(ioctl=joystick.ioctl)
+
+    profile = profiles.load(None)
+    assert profile.name == GAMEPAD_NAME
+    assert profile.axis_map == ('lx', 'ly', 'lz', 'rx', 'ry', 'rz', 'hat0x', 'hat0y')
+    assert profile.button_map[:4] == ('a', 'b', 'x', 'y')
+    assert profile.button_map[9] == 'start'
+    assert len(joystick.calls) == 5
+
+    joystick.calls.clear()
+    assert profiles.load(None) is profile
+    assert joystick.calls == [JSIOCGNAME(64)]
+    assert (profiles.hits, profiles.misses) == (1, 1)
+
+
+def test_profiles_are_kept_per_device_name():
+    joystick = FakeJoystick(GAMEPAD_NAME, GAMEPAD_AXES, GAMEPAD_BUTTONS)
+    profiles = DeviceProfiles(ioctl=joystick.ioctl)
+    gamepad = profiles.load(None)
+
+    joystick.name = 'Flight Stick'
+    joystick.axes = [0x00, 0x01, 0x06, 0x30]
+    joystick.buttons = [0x120, 0x121]
+    flight_stick = profiles.load(None)
+
+    assert flight_stick.axis_map == ('lx', 'ly', 'trottle', 'unknown(0x30)')
+    assert flight_stick.button_map == ('trigger', 'thumb')
+
+    joystick.name = GAMEPAD_NAME
+    assert profiles.load(None) is gamepad
+    assert (profiles.hits, profiles.misses) == (1, 2)
+
+
+def test_maps_do_not_grow_on_reconnect():
+    joystick = FakeJoystick(GAMEPAD_NAME, GAMEPAD_AXES, GAMEPAD_BUTTONS)
+
+    with tempfile.TemporaryDirectory() as directory:
+        open(os.path.join(directory, 'js0'), 'w').close()
+        remote_controller = create_remote_controller(joystick, directory)
+
+        try:
+            for reconnect in range(3):
+                remote_controller.check_for_connected_devices()
+                assert remote_controller.connected_device
+                assert len(remote_controller.axis_map) == len(GAMEPAD_AXES)
+                assert len(remote_controller.button_map) == len(GAMEPAD_BUTTONS)
+
+            # Event numbers still land on the right names after the reconnects
+            events = JS_EVENT.pack(0, 1, 0x01, 9) + JS_EVENT.pack(0, -32767, 0x02, 4)
+            assert remote_controller.process_events(events)
+            assert remote_controller.button_states['start'] == 1
+            assert remote_controller.axis_states['ry'] == -1.0
+
+        finally:
+            os.close(remote_controller.jsdev)
+
+
+if __name__ == '__main__':
+    for test in (test_profile_is_read_once_per_device, test_profiles_are_kept_per_device_name,
+                 test_maps_do_not_grow_on_reconnect):
+        test()
+        log.info(test.__name__ + ' OK')
@@ -0,0 +1,99 @@
+#!/home/pi/spotmicroai/venv/bin/python3 -u
+
+import os
+import tempfile
+import threading
+import time
+
+from spotmicroai.utilities.log import Logger
+from spotmicroai.remote_controller.device_watcher import create_device_watcher, PollingDeviceWatcher, \
+    InotifyDeviceWatcher
+
+log = Logger().setup_logger('Testing device watcher')
+
+DEVICE = 'js0'
+
+
+def create_device_later(directory, delay):
+    def create_device():
+        time.sleep(delay)
+        open(os.path.join(directory, DEVICE), 'w').close()
+
+    thread = threading.Thread(target=create_device)
+    thread.start()
+    return thread
+
+
+def remove_device_later(directory, delay):
+    def remove_device():
+        time.sleep(delay)
+        os.remove(os.path.join(directory, DEVICE))
+
+    thread = threading.Thread(target=remove_device)
+    thread.start()
+    return thread
+
+
+def check_watcher(watcher_class):
+    with tempfile.TemporaryDirectory() as directory:
+        watcher = watcher_class(DEVICE, directory)
+        try:
+            assert not watcher.is_present()
+            assert watcher.wait(present=True, timeout=0.05) is False
+
+            # Other devices coming and going don't count
+            open(os.path.join(directory, 'event0'), 'w').close()
+            assert watcher.wait(present=True, timeout=0.05) is False
+
+            thread = create_device_later(directory, 0.2)
+            start = time.monotonic()
+            assert watcher.wait(present=True, timeout=5) is True
+            appeared = time.monotonic() - start
+            thread.join()
+            assert watcher.is_present()
+
+            # Already there, no waiting at all
+            assert watcher.wait(present=True, timeout=0) is True
+
+            thread = remove_device_later(directory, 0.2)
+            assert watcher.wait(present=False, timeout=5) is False
+            thread.join()
+            assert not watcher.is_present()
+
+            return appeared
+
+        finally:
+            watcher.close()
+
+
+def test_polling_device_watcher():
+    appeared = check_watcher(PollingDeviceWatcher)
+    assert appeared < 0.2 + 0.5
+
+
+def test_inotify_device_watcher():
+    appeared = check_watcher(InotifyDeviceWatcher)
+    assert appeared < 0.2 + 0.05
+
+
+def test_create_device_watcher_prefers_inotify():
+    with tempfile.TemporaryDirectory() as directory:
+        watcher = create_device_watcher(DEVICE, directory)
+        try:
+            assert isinstance(watcher, InotifyDeviceWatcher)
+        finally:
+            watcher.close()
+
+
+def test_create_device_watcher_falls_back_to_polling():
+    # inotify refuses to watch a directory that doesn't exist, polling copes until it shows up
+    with tempfile.TemporaryDirectory() as directory:
+        watcher = create_device_watcher(DEVICE, os.path.join(directory, 'missing'))
+        assert type(watcher) is PollingDeviceWatcher
+
+
+if __name__ == '__main__':
+    for test in (test_polling_device_watcher, test_inotify_device_watcher,
+                 test_create_device_watcher_prefers_inotify, test_create_device_watcher_falls_back_to_polling):
+        test()
+        log.info(test.__name__ + ' OK')
@@ -1,12 +1,20 @@
 import signal
-import RPi.GPIO as GPIO
+import threading
+import time
 import sys
 from spotmicroai.utilities.log import Logger
 from spotmicroai.utilities.config import Config
+from spotmicroai.hal.hal import load_hal
+from spotmicroai.utilities.latency import LatencyHistogram
+from spotmicroai.abort_controller.dead_man_switch import DeadManSwitch
 import spotmicroai.utilities.queues as queues
+import spotmicroai.utilities.status_board as status_board
 
 log = Logger().setup_logger('Abort controller')
 
+# A few checks per motion loop period, so the dead man switch sees most of the beats
+HEARTBEAT_CHECK_INTERVAL = 0.005
+
 
 class AbortController:
     gpio_port = None
@@ -17,24 +25,43 @@ class AbortController:
 
             log.debug('Starting controller...')
 
+            # Before anything that can fail, the handler below reports to it
+            self._status_board = communication_queues[queues.STATUS_BOARD]
+
+            # The pin and the dead man switch are driven from the queue loop, the fast path and the watchdog threads
+            self._gpio_lock = threading.RLock()
+
             signal.signal(signal.SIGINT, self.exit_gracefully)
             signal.signal(signal.SIGTERM, self.exit_gracefully)
 
-            self.gpio_port = Config().get(Config.ABORT_CONTROLLER_GPIO_PORT)
+            self.gpio_port = Config().abort_controller.gpio_port
 
-            GPIO.setmode(GPIO.BCM)
-            GPIO.setup(self.gpio_port, GPIO.OUT)
+            self._gpio = load_hal().gpio()
+            self._gpio.setmode(self._gpio.BCM)
+            self._gpio.setup(self.gpio_port, self._gpio.OUT)
 
             self._abort_queue = communication_queues[queues.ABORT_CONTROLLER]
-            self._lcd_screen_queue = communication_queues[queues.LCD_SCREEN_CONTROLLER]
+            self._abort_signal = communication_queues[queues.ABORT_SIGNAL]
+            self._heartbeat = communication_queues[queues.MOTION_HEARTBEAT]
+
+            self._dead_man_switch = DeadManSwitch.from_config(Config().abort_controller.dead_man_switch)
+
+            # Trip to pin driven, measured on the fast path
+            self.abort_latency = LatencyHistogram()
 
             self.abort()
+            # Trips from before the controller was up are covered by the abort above, not timed
+            self._abort_signal.acknowledge(self._abort_signal.trips())
+
+            self._abort_signal_thread = threading.Thread(target=self.do_process_abort_signal, daemon=True)
+            self._abort_signal_thread.start()
 
-            self._lcd_screen_queue.put(queues.LCD_SCREEN_SHOW_ABORT_CONTROLLER_OK_ON)
+            self._heartbeat_thread = threading.Thread(target=self.do_watch_motion_heartbeat, daemon=True)
+            self._heartbeat_thread.start()
 
         except Exception as e:
             log.error('Abort controller initialization problem', e)
-            self._lcd_screen_queue.put(queues.LCD_SCREEN_SHOW_ABORT_CONTROLLER_NOK)
+            self._status_board.set(status_board.ABORT_CONTROLLER, status_board.STATUS_NOK)
             try:
                 self.abort()
             finally:
@@ -53,6 +80,9 @@ class AbortController:
             while True:
                 event = self._abort_queue.get()
 
+                if isinstance(event, tuple) and event[0] == queues.ABORT_CONTROLLER_ACTION_ACTIVATE:
+                    self.activate_servos(event[1])
+
                 if event == queues.ABORT_CONTROLLER_ACTION_ACTIVATE:
                     self.activate_servos()
 
@@ -63,10 +93,65 @@ class AbortController:
             log.error('Unknown problem while processing the queue of the abort controller', e)
             sys.exit(1)
 
-    def activate_servos(self):
-        self._lcd_screen_queue.put(queues.LCD_SCREEN_SHOW_ABORT_CONTROLLER_OK_ON)
-        GPIO.output(self.gpio_port, GPIO.LOW)
+    def do_process_abort_signal(self):
+
+        try:
+            while True:
+                trips, tripped_at = self._abort_signal.wait()
+
+                self.abort()
+                self.abort_latency.add(time.monotonic() - tripped_at)
+                self._abort_signal.acknowledge(trips)
+
+                latency = self.abort_latency.summary()
+                log.info('Abort signal handled in ' + str(round((time.monotonic() - tripped_at) * 1000, 3)) + ' ms, ' +
+                         str(latency['count']) + ' aborts, p50/p99/max ' + str(latency['p50_ms']) + '/' +
+                         str(latency['p99_ms']) + '/' + str(latency['max_ms']) + ' ms')
+
+        except Exception as e:
+            log.error('Unknown problem while waiting for the abort signal', e)
+            self.abort()
+
+    def do_watch_motion_heartbeat(self):
+
+        try:
+            while True:
+                time.sleep(HEARTBEAT_CHECK_INTERVAL)
+                self.check_motion_heartbeat()
+
+        except Exception as e:
+            log.error('Unknown problem while watching the motion loop heartbeat', e)
+            self.abort()
+
+    def check_motion_heartbeat(self):
+        with self._gpio_lock:
+            reason = self._dead_man_switch.check(self._heartbeat.read())
+            if reason is None:
+                return False
+
+            self.abort()
+
+        log.error('Dead man switch, servos cut: ' + reason)
+        return True
+
+    def abort_latency_statistics(self):
+        return self.abort_latency.summary()
+
+    def activate_servos(self, trips=None):
+        with self._gpio_lock:
+            # Requested before an abort that is already handled or on its way, the abort wins
+            if trips is not None and (self._abort_signal.trips() - trips) & 0xFFFFFFFF:
+                log.info('Activation requested before the last abort, ignored')
+                return
+
+            self._gpio.output(self.gpio_port, self._gpio.LOW)
+            self._dead_man_switch.arm()
+            # Under the lock, the status always follows the last pin change
+            self._status_board.set(status_board.ABORT_CONTROLLER, status_board.STATUS_ON)
 
     def abort(self):
-        self._lcd_screen_queue.put(queues.LCD_SCREEN_SHOW_ABORT_CONTROLLER_OK_OFF)
-        GPIO.output(self.gpio_port, GPIO.HIGH)
+        # Cut the servos first, then tell, both under the lock so no activation slips in between
+        with self._gpio_lock:
+            self._gpio.output(self.gpio_port, self._gpio.HIGH)
+            self._dead_man_switch.disarm()
+            self._status_board.set(status_board.ABORT_CONTROLLER, status_board.STATUS_OFF)
@@ -0,0 +1,85 @@
+import multiprocessing
+import os
+import select
+import struct
+import time
+from multiprocessing import shared_memory
+
+# Trips so far, trips handled by the abort controller, monotonic time of the last trip
+_ABORT_SIGNAL = struct.Struct('<IId')
+
+ABORT_SIGNAL_SIZE = _ABORT_SIGNAL.size
+
+
+class AbortSignal:
+    """
+    Fast path to cut the servos: any process can trip() it and the abort controller, blocked on the wakeup pipe,
+    drives the OE pin right away. Nothing is pickled and it never waits behind other messages.
+
+    The shared memory keeps the trip count and time, so the abort controller measures how long each abort took
+    and activations requested before a later trip can be told apart and refused.
+    """
+
+    def __init__(self, name=None, create=False, wakeup=None):
+        self._shared_memory = shared_memory.SharedMemory(name=name, create=create, size=ABORT_SIGNAL_SIZE)
+        self._buffer = self._shared_memory.buf
+
+        if create:
+            self._buffer[:ABORT_SIGNAL_SIZE] = bytes(ABORT_SIGNAL_SIZE)
+
+        # Connections travel to the other processes whatever the start method, the pipe fds alone would not
+        self._wakeup_reader, self._wakeup_writer = wakeup if wakeup is not None else multiprocessing.Pipe(duplex=False)
+        os.set_blocking(self._wakeup_writer.fileno(), False)
+
+    def __reduce__(self):
+        return self.__class__, (self._shared_memory.name, False, (self._wakeup_reader, self._wakeup_writer))
+
+    def trip(self):
+        # Only the trip fields, the handled count belongs to the abort controller
+        trips = _ABORT_SIGNAL.unpack_from(self._buffer)[0]
+        struct.pack_into('<d', self._buffer, 8, time.monotonic())
+        struct.pack_into('<I', self._buffer, 0, (trips + 1) & 0xFFFFFFFF)
+
+        try:
+            os.write(self._wakeup_writer.fileno(), b'\x00')
+        except BlockingIOError:
+            # Pipe full of wakeups nobody read yet, one more changes nothing
+            pass
+
+    def trips(self):
+        return _ABORT_SIGNAL.unpack_from(self._buffer)[0]
+
+    def is_tripped(self):
+        trips, handled, tripped_at = _ABORT_SIGNAL.unpack_from(self._buffer)
+        return trips != handled
+
+    def wait(self, timeout=None):
+        # Abort controller side: blocks until tripped, returns the trip count and the time of the last trip,
+        # (None, None) on timeout
+        while not self.is_tripped():
+            readable, _, _ = select.select([self._wakeup_reader.fileno()], [], [], timeout)
+            if not readable:
+                return None, None
+            self._drain_wakeups()
+
+        trips, handled, tripped_at = _ABORT_SIGNAL.unpack_from(self._buffer)
+        return trips, tripped_at
+
+    def acknowledge(self, trips):
+        # Marks the trips up to this count as handled
+        struct.pack_into('<I', self._buffer, 4, trips)
+
+    def _drain_wakeups(self):
+        os.set_blocking(self._wakeup_reader.fileno(), False)
+        try:
+            while os.read(self._wakeup_reader.fileno(), 64):
+                pass
+        except BlockingIOError:
+            pass
+
+    def close(self):
+        self._buffer = None
+        self._shared_memory.close()
+
+    def unlink(self):
+        self._shared_memory.unlink()
@@ -0,0 +1,80 @@
+import time
+
+# Seconds without a motion loop heartbeat before the servos are cut
+HEARTBEAT_DEADLINE = 0.1
+# How late a tick may start, and how many late ticks in a row the switch tolerates
+JITTER_BUDGET = 0.02
+LATE_BEATS = 3
+
+
+class DeadManSwitch:
+    """
+    Decides from the motion loop heartbeats when the servos must lose power. Armed while the servos are
+    powered, check() gives the reason to cut them, None while the loop is alive and on time:
+     - no beat for longer than the deadline: the loop is hung, e.g. stuck in an I2C write
+     - late_beats beats in a row starting later than the jitter budget: the loop keeps overrunning
+
+    Only the beats check() gets to see are counted, it should run a few times per period of the motion loop.
+    """
+
+    def __init__(self, deadline=HEARTBEAT_DEADLINE, jitter_budget=JITTER_BUDGET, late_beats=LATE_BEATS,
+                 clock=time.monotonic):
+        self.deadline = deadline
+        self.jitter_budget = jitter_budget
+        self.late_beats = late_beats
+
+        self._clock = clock
+
+        self.armed = False
+        self.trips = 0
+        self._armed_at = None
+        self._last_beats = None
+        self._consecutive_late_beats = 0
+
+    @classmethod
+    def from_config(cls, dead_man_switch_config, clock=time.monotonic):
+        return cls(clock=clock, **dead_man_switch_config._asdict())
+
+    def arm(self):
+        # Beats from before the servos were powered don't count, the deadline starts now
+        self.armed = True
+        self._armed_at = self._clock()
+        self._last_beats = None
+        self._consecutive_late_beats = 0
+
+    def disarm(self):
+        self.armed = False
+
+    def check(self, heartbeat):
+        if not self.armed:
+            return None
+
+        now = self._clock()
+
+        if heartbeat is None or heartbeat.beat_at < self._armed_at:
+            silence = now - self._armed_at
+        else:
+            silence = now - heartbeat.beat_at
+
+            if heartbeat.beats != self._last_beats:
+                self._last_beats = heartbeat.beats
+                if heartbeat.jitter > self.jitter_budget:
+                    self._consecutive_late_beats += 1
+                else:
+                    self._consecutive_late_beats = 0
+
+        if silence > self.deadline:
+            return self._trip('no motion loop heartbeat for ' + str(round(silence * 1000, 1)) + ' ms')
+
+        if self._consecutive_late_beats >= self.late_beats:
+            return self._trip(str(self._consecutive_late_beats) + ' motion loop ticks in a row started more than ' +
+                              str(round(self.jitter_budget * 1000, 1)) + ' ms late, last one ' +
+                              str(round(heartbeat.jitter * 1000, 1)) + ' ms, loop time ' +
+                              str(round(heartbeat.loop_time * 1000, 1)) + ' ms')
+
+        return None
+
+    def _trip(self, reason):
+        self.armed = False
+        self.trips += 1
+        return reason
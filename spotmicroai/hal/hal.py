@@ -0,0 +1,45 @@
+import os
+
+from spotmicroai.utilities.log import Logger
+from spotmicroai.utilities.config import Config
+
+log = Logger().setup_logger('HAL')
+
+# Overrides the backend of the configuration, e.g. SPOTMICROAI_HAL=simulated on a development machine
+HAL_ENVIRONMENT_VARIABLE = 'SPOTMICROAI_HAL'
+
+RASPBERRY_PI = 'raspberry_pi'
+SIMULATED = 'simulated'
+
+_hal = None
+
+
+def hal_backend():
+    return os.environ.get(HAL_ENVIRONMENT_VARIABLE) or Config().hal.backend or RASPBERRY_PI
+
+
+def create_hal(backend):
+    if backend == RASPBERRY_PI:
+        from spotmicroai.hal.raspberry_pi import RaspberryPiHAL
+        return RaspberryPiHAL()
+
+    if backend == SIMULATED:
+        from spotmicroai.hal.simulated import SimulatedHAL
+        return SimulatedHAL(Config().hal)
+
+    raise ValueError('Unknown hardware abstraction layer backend: ' + str(backend))
+
+
+def load_hal():
+    """
+    Hardware of this process, the backend picked by the environment or the configuration. Every controller
+    owns its devices in its own process, so the simulated ones live in the process that uses them.
+    """
+    global _hal
+
+    if _hal is None:
+        backend = hal_backend()
+        _hal = create_hal(backend)
+        log.info('Hardware abstraction layer backend: ' + backend)
+
+    return _hal
@@ -0,0 +1,250 @@
+import atexit
+import glob
+import mmap
+import multiprocessing
+import os
+import struct
+import time
+
+from spotmicroai.utilities.log import Logger
+from spotmicroai.utilities.config import Config
+
+log = Logger().setup_logger('I2C journal')
+
+# Every I2C transaction of a process, in fixed size segment files mapped in memory: recording one is a
+# struct.pack_into, no system call. Full segments rotate, the oldest ones of the controller are deleted.
+MAGIC = b'SMI2'
+VERSION = 1
+
+# Magic, version, record size, controller, pid, wall clock and monotonic time when the segment was opened,
+# records written so far, updated after each record
+_HEADER = struct.Struct('<4sHH32sIddQ')
+_COUNT_OFFSET = _HEADER.size - 8
+_COUNT = struct.Struct('<Q')
+HEADER_SIZE = 128
+
+# Monotonic start and end, payload length, address, register (first byte written), kind
+_RECORD = struct.Struct('<ddHBBBxxx')
+
+WRITE = 1
+READ = 2
+WRITE_READ = 3
+KINDS = {WRITE: 'write', READ: 'read', WRITE_READ: 'write_read'}
+# The transaction raised, e.g. nothing answered at the address
+ERROR = 0x80
+# Reads don't send a register
+NO_REGISTER = 0x40
+
+_journal = None
+
+
+class I2CJournal:
+
+    def __init__(self, directory, controller, segment_records=131072, segments=8):
+        self.directory = os.path.expanduser(directory)
+        self.controller = controller
+        self.segment_records = segment_records
+        self.segments = segments
+
+        self.segment = 0
+        self.records = 0
+        self._file = None
+        self._mmap = None
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._open_segment()
+
+    def _segment_path(self, segment):
+        return os.path.join(self.directory, 'i2c_' + self.controller + '_' + str(os.getpid()) + '_' +
+                            '%04d' % segment + '.journal')
+
+    def _open_segment(self):
+        path = self._segment_path(self.segment)
+        size = HEADER_SIZE + self.segment_records * _RECORD.size
+
+        self._file = open(path, 'w+b')
+        self._file.truncate(size)
+        self._mmap = mmap.mmap(self._file.fileno(), size)
+        _HEADER.pack_into(self._mmap, 0, MAGIC, VERSION, _RECORD.size, self.controller.encode('utf-8')[:32],
+                          os.getpid(), time.time(), time.monotonic(), 0)
+        self.records = 0
+
+        # Oldest segments of this controller go, the journal never grows past segments files
+        old_segments = sorted(glob.glob(os.path.join(self.directory, 'i2c_' + self.controller + '_*.journal')),
+                              key=_segment_opened_at)
+        for old_segment in old_segments[:max(0, len(old_segments) - self.segments)]:
+            if old_segment != path:
+                os.remove(old_segment)
+
+    def _close_segment(self):
+        self._mmap.flush()
+        self._mmap.close()
+        self._file.close()
+
+    def record(self, kind, address, data, length, start, end):
+        if self.records == self.segment_records:
+            self._close_segment()
+            self.segment += 1
+            self._open_segment()
+
+        register = data[0] if data else 0
+        if not data:
+            kind |= NO_REGISTER
+
+        _RECORD.pack_into(self._mmap, HEADER_SIZE + self.records * _RECORD.size, start, end, length, address,
+                          register, kind)
+        self.records += 1
+        _COUNT.pack_into(self._mmap, _COUNT_OFFSET, self.records)
+
+    def close(self):
+        if self._mmap is not None:
+            self._close_segment()
+            self._mmap = None
+
+
+def _segment_opened_at(path):
+    try:
+        with open(path, 'rb') as journal_file:
+            return _HEADER.unpack(journal_file.read(_HEADER.size))[5]
+    except (OSError, struct.error):
+        return 0.0
+
+
+def load_i2c_journal(controller=None):
+    """
+    Journal of this process, None unless enabled in the configuration. Named after the calling controller,
+    the name of the process by default.
+    """
+    global _journal
+
+    i2c_journal = Config().i2c_journal
+    if not i2c_journal.enabled:
+        return None
+
+    if _journal is None:
+        controller = controller or multiprocessing.current_process().name
+        _journal = I2CJournal(i2c_journal.directory, controller, i2c_journal.segment_records,
+                              i2c_journal.segments)
+        atexit.register(_journal.close)
+        log.info('Journaling the I2C transactions of ' + controller + ' to ' + _journal.directory)
+
+    return _journal
+
+
+def read_journal(path):
+    # (controller, pid, records) of a segment, records as (start, end, length, address, register, kind)
+    with open(path, 'rb') as journal_file:
+        header = journal_file.read(HEADER_SIZE)
+        magic, version, record_size, controller, pid, wall_time, monotonic_time, count = \
+            _HEADER.unpack_from(header)
+        if magic != MAGIC or version != VERSION or record_size != _RECORD.size:
+            raise ValueError(path + ' is not an I2C journal segment')
+
+        records = journal_file.read(count * _RECORD.size)
+
+    return controller.rstrip(b'\x00').decode('utf-8'), pid, list(_RECORD.iter_unpack(records))
+
+
+class JournaledI2C:
+    # busio.I2C with every transaction journaled, what adafruit_bus_device.I2CDevice and the PCA9685 driver call
+
+    def __init__(self, i2c, journal):
+        self._i2c = i2c
+        self._journal = journal
+
+    def __getattr__(self, name):
+        return getattr(self._i2c, name)
+
+    def __enter__(self):
+        self._i2c.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return self._i2c.__exit__(exc_type, exc_value, traceback)
+
+    def try_lock(self):
+        return self._i2c.try_lock()
+
+    def unlock(self):
+        self._i2c.unlock()
+
+    def writeto(self, address, buffer, *, start=0, end=None):
+        data = bytes(buffer[start:end])
+        kind = WRITE
+        started_at = time.monotonic()
+        try:
+            return self._i2c.writeto(address, buffer, start=start, end=end)
+        except Exception:
+            kind |= ERROR
+            raise
+        finally:
+            self._journal.record(kind, address, data, len(data), started_at, time.monotonic())
+
+    def readfrom_into(self, address, buffer, *, start=0, end=None):
+        length = len(buffer[start:end])
+        kind = READ
+        started_at = time.monotonic()
+        try:
+            return self._i2c.readfrom_into(address, buffer, start=start, end=end)
+        except Exception:
+            kind |= ERROR
+            raise
+        finally:
+            self._journal.record(kind, address, b'', length, started_at, time.monotonic())
+
+    def writeto_then_readfrom(self, address, buffer_out, buffer_in, *, out_start=0, out_end=None, in_start=0,
+                              in_end=None):
+        data = bytes(buffer_out[out_start:out_end])
+        length = len(data) + len(buffer_in[in_start:in_end])
+        kind = WRITE_READ
+        started_at = time.monotonic()
+        try:
+            return self._i2c.writeto_then_readfrom(address, buffer_out, buffer_in, out_start=out_start,
+                                                   out_end=out_end, in_start=in_start, in_end=in_end)
+        except Exception:
+            kind |= ERROR
+            raise
+        finally:
+            self._journal.record(kind, address, data, length, started_at, time.monotonic())
+
+
+class JournaledSMBus:
+    # smbus.SMBus with every transaction journaled, the calls of the LCD driver
+
+    def __init__(self, bus, journal):
+        self._bus = bus
+        self._journal = journal
+
+    def _call(self, kind, address, data, length, call, *args):
+        started_at = time.monotonic()
+        try:
+            return call(address, *args)
+        except Exception:
+            kind |= ERROR
+            raise
+        finally:
+            self._journal.record(kind, address, data, length, started_at, time.monotonic())
+
+    def write_byte(self, address, value):
+        self._call(WRITE, address, bytes((value,)), 1, self._bus.write_byte, value)
+
+    def write_byte_data(self, address, cmd, value):
+        self._call(WRITE, address, bytes((cmd, value)), 2, self._bus.write_byte_data, cmd, value)
+
+    def write_block_data(self, address, cmd, data):
+        self._call(WRITE, address, bytes((cmd,)), len(data) + 2, self._bus.write_block_data, cmd, data)
+
+    def write_i2c_block_data(self, address, cmd, data):
+        self._call(WRITE, address, bytes((cmd,)), len(data) + 1, self._bus.write_i2c_block_data, cmd, data)
+
+    def read_byte(self, address):
+        return self._call(READ, address, b'', 1, self._bus.read_byte)
+
+    def read_byte_data(self, address, cmd):
+        return self._call(WRITE_READ, address, bytes((cmd,)), 2, self._bus.read_byte_data, cmd)
+
+    def read_block_data(self, address, cmd):
+        return self._call(WRITE_READ, address, bytes((cmd,)), 1, self._bus.read_block_data, cmd)
+
+    def close(self):
+        self._bus.close()
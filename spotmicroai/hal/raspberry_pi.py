@@ -0,0 +1,79 @@
+from fcntl import ioctl
+
+from spotmicroai.lcd_screen_controller import LCD_16x2_I2C_driver
+from spotmicroai.hal.hal import RASPBERRY_PI
+from spotmicroai.hal.i2c_journal import load_i2c_journal, JournaledI2C
+from spotmicroai.i2c_bus_controller.i2c_bus import I2CBusSMBus
+
+# The hardware libraries are imported when a device is asked for, they only exist on the Raspberry Pi
+
+
+class LinuxJoystick:
+    # The joystick device node of the configuration, read by the remote controller as it is
+
+    def __init__(self, device):
+        self.path = device
+        self.ioctl = ioctl
+
+    def close(self):
+        pass
+
+
+class BusioI2CBus:
+    # busio.I2C with the write/read/write_then_read of the I2C bus controller, its only user: locked for good
+
+    def __init__(self, i2c):
+        self._i2c = i2c
+        while not self._i2c.try_lock():
+            pass
+
+    def write(self, address, data):
+        self._i2c.writeto(address, data)
+
+    def read(self, address, size):
+        data = bytearray(size)
+        self._i2c.readfrom_into(address, data)
+        return bytes(data)
+
+    def write_then_read(self, address, data, size):
+        read_data = bytearray(size)
+        self._i2c.writeto_then_readfrom(address, data, read_data)
+        return bytes(read_data)
+
+
+class RaspberryPiHAL:
+    name = RASPBERRY_PI
+
+    def i2c(self):
+        import busio
+        from board import SCL, SDA
+        i2c = busio.I2C(SCL, SDA)
+
+        journal = load_i2c_journal()
+        return JournaledI2C(i2c, journal) if journal else i2c
+
+    def i2c_bus(self):
+        return BusioI2CBus(self.i2c())
+
+    def pca9685(self, i2c, address, reference_clock_speed):
+        from adafruit_pca9685 import PCA9685
+        return PCA9685(i2c, address=address, reference_clock_speed=reference_clock_speed)
+
+    def gpio(self):
+        import RPi.GPIO as GPIO
+        return GPIO
+
+    def smbus(self, port=1):
+        import smbus
+        return smbus.SMBus(port)
+
+    def lcd_screen(self, address, i2c=None):
+        # Through the I2C bus controller when given its client, see spotmicroai.i2c_bus_controller.i2c_bus
+        if i2c is not None:
+            return LCD_16x2_I2C_driver.lcd(address=address, bus=I2CBusSMBus(i2c))
+
+        # Without a bus the driver writes straight to the i2c-dev node, its fast path
+        return LCD_16x2_I2C_driver.lcd(address=address, journal=load_i2c_journal())
+
+    def joystick(self, device):
+        return LinuxJoystick(device)
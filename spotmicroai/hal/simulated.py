@@ -0,0 +1,693 @@
+import collections
+import errno
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from spotmicroai.utilities.log import Logger
+from spotmicroai.utilities.config import Config
+from spotmicroai.hal.hal import SIMULATED
+from spotmicroai.hal.i2c_journal import load_i2c_journal, WRITE, READ, WRITE_READ, ERROR
+from spotmicroai.i2c_bus_controller.i2c_bus import I2CBusSMBus
+from spotmicroai.lcd_screen_controller import LCD_16x2_I2C_driver
+from spotmicroai.lcd_screen_controller.LCD_16x2_I2C_driver import En, Rs, LCD_BACKLIGHT
+from spotmicroai.motion_controller.pca9685_frame_writer import PCA9685_MODE1, PCA9685_MODE1_AUTO_INCREMENT, \
+    PCA9685_LED0_ON_L, PCA9685_CHANNELS, PCA9685_BYTES_PER_CHANNEL
+from spotmicroai.remote_controller.device_profile import AXIS_NAMES, BUTTON_NAMES, JSIOCGNAME, JSIOCGAXES, \
+    JSIOCGBUTTONS, JSIOCGAXMAP, JSIOCGBTNMAP
+from spotmicroai.remote_controller.remote_controller import JS_EVENT, JS_EVENT_AXIS, JS_EVENT_BUTTON, JS_EVENT_INIT
+from spotmicroai.remote_controller.session_log import read_session
+
+log = Logger().setup_logger('Simulated HAL')
+
+PCA9685_MODE1_SLEEP = 0x10
+PCA9685_MODE1_ALLCALL = 0x01
+PCA9685_MODE1_RESTART = 0x80
+PCA9685_PRESCALE = 0xFE
+PCA9685_REGISTERS = 256
+
+LCD_DDRAM_SIZE = 0x80
+LCD_CGRAM_SIZE = 0x40
+
+GPIO_HISTORY = 1000
+
+FIFO_FULL_RETRY_INTERVAL = 0.001
+
+# A DS4 like gamepad, idle until the script says otherwise
+DEFAULT_JOYSTICK_SCRIPT = {
+    'name': 'Simulated gamepad',
+    'axes': ['lx', 'ly', 'lz', 'rx', 'ry', 'rz', 'hat0x', 'hat0y'],
+    'buttons': ['a', 'b', 'x', 'y', 'tl', 'tr', 'tl2', 'tr2', 'select', 'start', 'mode', 'thumbl', 'thumbr'],
+    # [seconds since the device was opened, axis or button name, value: -1.0 to 1.0 for axes, 0 or 1 for buttons]
+    'events': [],
+    'repeat': False
+}
+
+
+class SimulatedI2CBus:
+    """
+    I2C bus in memory: devices by address, every transaction charged transaction_latency plus byte_latency
+    per byte, slept for real so timing measured on top of it looks like the hardware. Unknown addresses fail
+    like a missing device does.
+    """
+
+    def __init__(self, transaction_latency=0.0, byte_latency=0.0, sleep=time.sleep):
+        self.transaction_latency = transaction_latency
+        self.byte_latency = byte_latency
+        self._sleep = sleep
+
+        self.devices = {}
+
+        self.transactions = 0
+        self.bytes = 0
+        self.busy_time = 0.0
+
+        # Called with (address, data, time) once a write is done, e.g. to time servo updates from another process
+        self.observer = None
+
+        # Records every transaction when set, see spotmicroai.hal.i2c_journal
+        self.journal = None
+
+    def attach(self, address, device):
+        self.devices[address] = device
+        return device
+
+    def _device(self, address, kind, data, length, started_at):
+        device = self.devices.get(address)
+        if device is None:
+            self._journal(kind | ERROR, address, data, length, started_at)
+            raise OSError(errno.EREMOTEIO, 'Remote I/O error, nothing at 0x%02x' % address)
+        return device
+
+    def _journal(self, kind, address, data, length, started_at):
+        if self.journal is not None:
+            self.journal.record(kind, address, data, length, started_at, time.monotonic())
+
+    def _transaction(self, size):
+        # Address byte included
+        latency = self.transaction_latency + (size + 1) * self.byte_latency
+
+        self.transactions += 1
+        self.bytes += size
+        self.busy_time += latency
+
+        if latency > 0:
+            self._sleep(latency)
+
+    def write(self, address, data):
+        started_at = time.monotonic()
+        device = self._device(address, WRITE, data, len(data), started_at)
+        self._transaction(len(data))
+        device.write(bytes(data))
+        self._journal(WRITE, address, data, len(data), started_at)
+
+        if self.observer is not None:
+            self.observer(address, bytes(data), time.monotonic())
+
+    def read(self, address, size):
+        started_at = time.monotonic()
+        device = self._device(address, READ, b'', size, started_at)
+        self._transaction(size)
+        data = device.read(size)
+        self._journal(READ, address, b'', size, started_at)
+        return data
+
+    def write_then_read(self, address, data, size):
+        # Repeated start, one transaction
+        started_at = time.monotonic()
+        device = self._device(address, WRITE_READ, data, len(data) + size, started_at)
+        self._transaction(len(data) + size)
+        device.write(bytes(data))
+        read_data = device.read(size)
+        self._journal(WRITE_READ, address, data, len(data) + size, started_at)
+        return read_data
+
+    def statistics(self):
+        return {'transactions': self.transactions,
+                'bytes': self.bytes,
+                'busy_time': self.busy_time}
+
+
+class SimulatedI2CDevice:
+    # What adafruit_bus_device.I2CDevice offers to the PCA9685 code
+
+    def __init__(self, bus, address):
+        self.bus = bus
+        self.device_address = address
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def write(self, buf, start=0, end=None):
+        self.bus.write(self.device_address, buf[start:end])
+
+    def readinto(self, buf, start=0, end=None):
+        end = len(buf) if end is None else end
+        buf[start:end] = self.bus.read(self.device_address, end - start)
+
+    def write_then_readinto(self, out_buffer, in_buffer, out_start=0, out_end=None, in_start=0, in_end=None):
+        in_end = len(in_buffer) if in_end is None else in_end
+        in_buffer[in_start:in_end] = self.bus.write_then_read(self.device_address, out_buffer[out_start:out_end],
+                                                              in_end - in_start)
+
+
+class SimulatedSMBus:
+    # What smbus.SMBus offers to the LCD driver, over the simulated bus
+
+    def __init__(self, bus):
+        self.bus = bus
+
+    def write_byte(self, address, value):
+        self.bus.write(address, bytes((value,)))
+
+    def write_byte_data(self, address, cmd, value):
+        self.bus.write(address, bytes((cmd, value)))
+
+    def write_block_data(self, address, cmd, data):
+        # SMBus block write: the count goes on the wire after the command
+        self.bus.write(address, bytes((cmd, len(data))) + bytes(data))
+
+    def write_i2c_block_data(self, address, cmd, data):
+        self.bus.write(address, bytes((cmd,)) + bytes(data))
+
+    def read_byte(self, address):
+        return self.bus.read(address, 1)[0]
+
+    def read_byte_data(self, address, cmd):
+        return self.bus.write_then_read(address, bytes((cmd,)), 1)[0]
+
+    def close(self):
+        pass
+
+
+class SimulatedPCA9685:
+    """
+    PCA9685 register file on the simulated bus, with the part of the adafruit_pca9685.PCA9685 interface the
+    motion controller uses. Register writes go through the bus like the driver's do, so they cost what
+    the latency model says. MODE1 auto-increment is honoured, writes without it only touch one register.
+    """
+
+    def __init__(self, bus, address, reference_clock_speed=25000000):
+        self.bus = bus
+        self.address = address
+        self.reference_clock_speed = reference_clock_speed
+        self.i2c_device = SimulatedI2CDevice(bus, address)
+
+        self.registers = bytearray(PCA9685_REGISTERS)
+        self.registers[PCA9685_MODE1] = PCA9685_MODE1_SLEEP | PCA9685_MODE1_ALLCALL
+        self.registers[PCA9685_PRESCALE] = 0x1E
+        self._pointer = 0
+
+        # Behind the I2C bus controller the registers that count are in its process, this is the driver side
+        if isinstance(bus, SimulatedI2CBus):
+            bus.attach(address, self)
+
+    # Bus side
+
+    def write(self, data):
+        if not data:
+            return
+
+        self._pointer = data[0]
+        for value in data[1:]:
+            self.registers[self._pointer] = value
+            self._advance()
+
+    def read(self, size):
+        data = bytearray()
+        for count in range(size):
+            data.append(self.registers[self._pointer])
+            self._advance()
+        return bytes(data)
+
+    def _advance(self):
+        if self.registers[PCA9685_MODE1] & PCA9685_MODE1_AUTO_INCREMENT:
+            self._pointer = (self._pointer + 1) % PCA9685_REGISTERS
+
+    # Driver side
+
+    def _write_register(self, register, value):
+        with self.i2c_device as i2c:
+            i2c.write(bytes((register, value)))
+
+    def _read_register(self, register):
+        value = bytearray(1)
+        with self.i2c_device as i2c:
+            i2c.write_then_readinto(bytes((register,)), value)
+        return value[0]
+
+    def reset(self):
+        self._write_register(PCA9685_MODE1, 0x00)
+
+    @property
+    def frequency(self):
+        return self.reference_clock_speed / 4096 / self._read_register(PCA9685_PRESCALE)
+
+    @frequency.setter
+    def frequency(self, frequency):
+        # Same sequence as adafruit_pca9685: sleep, prescale, wake up with auto-increment and restart
+        prescale = int(self.reference_clock_speed / 4096.0 / frequency + 0.5)
+        if prescale < 3:
+            raise ValueError('PCA9685 cannot output at the given frequency')
+
+        mode1 = self._read_register(PCA9685_MODE1)
+        self._write_register(PCA9685_MODE1, (mode1 & 0x7F) | PCA9685_MODE1_SLEEP)
+        self._write_register(PCA9685_PRESCALE, prescale)
+        self._write_register(PCA9685_MODE1, mode1)
+        self._write_register(PCA9685_MODE1, mode1 | PCA9685_MODE1_RESTART | PCA9685_MODE1_AUTO_INCREMENT)
+
+    def deinit(self):
+        self.reset()
+
+    def channel_ticks(self, channel):
+        # OFF count of a channel, 0x1000 when it is fully on
+        register = PCA9685_LED0_ON_L + channel * PCA9685_BYTES_PER_CHANNEL
+        if self.registers[register + 1] & 0x10:
+            return 0x1000
+        return self.registers[register + 2] | (self.registers[register + 3] & 0x0F) << 8
+
+    def ticks(self):
+        return [self.channel_ticks(channel) for channel in range(PCA9685_CHANNELS)]
+
+
+class SimulatedLCD:
+    """
+    HD44780 character LCD behind its PCF8574 backpack, fed the PCF8574 output states the driver writes.
+    A falling edge on EN latches the high nibble, two nibbles make an instruction or, with RS, a character
+    for DDRAM or CGRAM. Keeps the character and glyph RAMs so what the screen shows can be read back.
+    """
+
+    def __init__(self, rows=2, columns=16):
+        self.rows = rows
+        self.columns = columns
+
+        self.ddram = bytearray(b' ' * LCD_DDRAM_SIZE)
+        self.cgram = bytearray(LCD_CGRAM_SIZE)
+        self.backlight = False
+        self.display_on = False
+
+        self._address = 0
+        self._cgram_selected = False
+        self._state = 0
+        self._nibble = None
+
+        self.states = 0
+        self.instructions = 0
+        self.characters = 0
+
+    # Bus side
+
+    def write(self, data):
+        for state in data:
+            self._output(state)
+
+    def read(self, size):
+        return bytes((self._state,)) * size
+
+    def _output(self, state):
+        self.states += 1
+        self.backlight = bool(state & LCD_BACKLIGHT)
+
+        if self._state & En and not state & En:
+            self._latch(self._state & 0xF0, self._state & Rs)
+
+        self._state = state
+
+    def _latch(self, nibble, rs):
+        if self._nibble is None:
+            self._nibble = nibble
+            return
+
+        value = self._nibble | nibble >> 4
+        self._nibble = None
+
+        if rs:
+            self._data(value)
+        else:
+            self._instruction(value)
+
+    def _instruction(self, instruction):
+        self.instructions += 1
+
+        if instruction & 0x80:
+            self._cgram_selected = False
+            self._address = instruction & 0x7F
+        elif instruction & 0x40:
+            self._cgram_selected = True
+            self._address = instruction & 0x3F
+        elif instruction & 0x20 or instruction & 0x10:
+            # Function set, cursor shift: the driver only ever uses the defaults
+            pass
+        elif instruction & 0x08:
+            self.display_on = bool(instruction & 0x04)
+        elif instruction & 0x04:
+            # Entry mode, left to right
+            pass
+        elif instruction & 0x02:
+            self._cgram_selected = False
+            self._address = 0
+        elif instruction & 0x01:
+            self.ddram[:] = b' ' * LCD_DDRAM_SIZE
+            self._cgram_selected = False
+            self._address = 0
+
+    def _data(self, value):
+        self.characters += 1
+
+        if self._cgram_selected:
+            self.cgram[self._address] = value
+            self._address = (self._address + 1) % LCD_CGRAM_SIZE
+        else:
+            self.ddram[self._address] = value
+            self._address = (self._address + 1) % LCD_DDRAM_SIZE
+
+    # Test side
+
+    def row_codes(self, row):
+        start = (0x00, 0x40, 0x14, 0x54)[row]
+        return bytes(self.ddram[start:start + self.columns])
+
+    def text(self):
+        # One string per row, custom glyphs shown as their code
+        return [''.join(chr(code) if code >= 0x20 else str(code) for code in self.row_codes(row))
+                for row in range(self.rows)]
+
+    def glyph(self, code):
+        return list(self.cgram[code * 8:code * 8 + 8])
+
+
+class SimulatedGPIO:
+    # The RPi.GPIO calls the abort controller makes, every output recorded with its time
+
+    BCM = 11
+    BOARD = 10
+    OUT = 0
+    IN = 1
+    LOW = 0
+    HIGH = 1
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+
+        self.mode = None
+        self.directions = {}
+        self.pins = {}
+        self.history = collections.deque(maxlen=GPIO_HISTORY)
+
+        # Called with (port, value, time) on every output, e.g. to time the abort path from another process
+        self.observer = None
+
+    def setmode(self, mode):
+        self.mode = mode
+
+    def setup(self, port, direction):
+        self.directions[port] = direction
+
+    def output(self, port, value):
+        value = self.HIGH if value else self.LOW
+        now = self._clock()
+
+        self.pins[port] = value
+        self.history.append((now, port, value))
+
+        if self.observer is not None:
+            self.observer(port, value, now)
+
+    def input(self, port):
+        return self.pins.get(port, self.LOW)
+
+    def cleanup(self):
+        self.directions = {}
+
+
+def _code(codes, name):
+    # Back from the name the device profile gave, including the ones it didn't know
+    if name.startswith('unknown(') and name.endswith(')'):
+        return int(name[len('unknown('):-1], 16)
+    return codes[name]
+
+
+class FifoJoystick:
+    """
+    Joystick device fed by a player thread: a FIFO stands for the device node, so the remote controller opens,
+    selects and reads it exactly like /dev/input/js0, and ioctl answers the calls the driver would.
+    Playback starts when the device is probed for its name, right after it was opened: play_events runs in the
+    player thread and writes the events with _write().
+    """
+
+    def __init__(self, name, axes, buttons, play_events):
+        self.name = name
+        self.axes = list(axes)
+        self.buttons = list(buttons)
+
+        axis_codes = {axis: code for code, axis in AXIS_NAMES.items()}
+        button_codes = {button: code for code, button in BUTTON_NAMES.items()}
+        self._axis_map = [_code(axis_codes, axis) for axis in self.axes]
+        self._button_map = [_code(button_codes, button) for button in self.buttons]
+
+        self._directory = tempfile.mkdtemp(prefix='spotmicroai-js-')
+        self.path = os.path.join(self._directory, 'js0')
+        os.mkfifo(self.path)
+        # Held open for writing from the start, readers never see the end of the file. Not blocking, a player
+        # waiting for a reader that went away must still stop when closed.
+        self._fifo = os.open(self.path, os.O_RDWR | os.O_NONBLOCK)
+
+        self._play_events = play_events
+        self._player = None
+        self._stopped = threading.Event()
+
+        self.events_played = 0
+
+    def ioctl(self, fd, request, buf):
+        if request == JSIOCGNAME(len(buf)):
+            name = self.name.encode('utf-8')[:len(buf) - 1]
+            buf[:len(name)] = type(buf)(buf.typecode, name)
+            self._play()
+        elif request == JSIOCGAXES:
+            buf[0] = len(self.axes)
+        elif request == JSIOCGBUTTONS:
+            buf[0] = len(self.buttons)
+        elif request == JSIOCGAXMAP:
+            buf[:len(self.axes)] = type(buf)(buf.typecode, self._axis_map)
+        elif request == JSIOCGBTNMAP:
+            buf[:len(self.buttons)] = type(buf)(buf.typecode, self._button_map)
+        else:
+            raise OSError(errno.ENOTTY, 'Inappropriate ioctl for device')
+
+        return 0
+
+    def _play(self):
+        if self._player is None:
+            self._player = threading.Thread(target=self._play_events, daemon=True)
+            self._player.start()
+
+    def _write(self, events):
+        # False once closed, the FIFO is full while the remote controller lags behind
+        events = memoryview(events)
+        while events:
+            try:
+                events = events[os.write(self._fifo, events):]
+            except BlockingIOError:
+                if self._stopped.wait(FIFO_FULL_RETRY_INTERVAL):
+                    return False
+        return True
+
+    def close(self):
+        self._stopped.set()
+        if self._player is not None:
+            self._player.join()
+        os.close(self._fifo)
+        shutil.rmtree(self._directory, ignore_errors=True)
+
+
+class ScriptedJoystick(FifoJoystick):
+    """
+    Joystick played from a script, beginning with the initial state events the kernel sends.
+    """
+
+    def __init__(self, script=None):
+        script = script or DEFAULT_JOYSTICK_SCRIPT
+
+        super().__init__(script.get('name', DEFAULT_JOYSTICK_SCRIPT['name']),
+                         script.get('axes', DEFAULT_JOYSTICK_SCRIPT['axes']),
+                         script.get('buttons', DEFAULT_JOYSTICK_SCRIPT['buttons']),
+                         self._play_script)
+
+        self.events = [tuple(event) for event in script.get('events', [])]
+        self.repeat = script.get('repeat', False)
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path) as script_file:
+            return cls(json.load(script_file))
+
+    def _encode(self, start, name, value):
+        milliseconds = int((time.monotonic() - start) * 1000) & 0xFFFFFFFF
+
+        if name in self.axes:
+            return JS_EVENT.pack(milliseconds, int(max(-1.0, min(1.0, value)) * 32767), JS_EVENT_AXIS,
+                                 self.axes.index(name))
+
+        return JS_EVENT.pack(milliseconds, int(value), JS_EVENT_BUTTON, self.buttons.index(name))
+
+    def _play_script(self):
+        start = time.monotonic()
+
+        initial_state = bytearray()
+        for number in range(len(self.axes)):
+            initial_state += JS_EVENT.pack(0, 0, JS_EVENT_AXIS | JS_EVENT_INIT, number)
+        for number in range(len(self.buttons)):
+            initial_state += JS_EVENT.pack(0, 0, JS_EVENT_BUTTON | JS_EVENT_INIT, number)
+        self._write(initial_state)
+
+        while not self._stopped.is_set():
+            for at, name, value in self.events:
+                if self._stopped.wait(max(0.0, start + at - time.monotonic())):
+                    return
+                if not self._write(self._encode(start, name, value)):
+                    return
+                self.events_played += 1
+
+            if not self.repeat or not self.events:
+                return
+
+            start = time.monotonic()
+
+
+class ReplayJoystick(FifoJoystick):
+    """
+    Joystick session recorded by the remote controller, played back from the log as it is streamed from disk.
+    Events keep the timing of their kernel timestamps divided by speed, speed 0 plays them as fast as the
+    remote controller reads. The device is the first one of the session.
+    """
+
+    def __init__(self, path, speed=1.0):
+        self._frames = read_session(path)
+
+        device = None
+        for kind, payload in self._frames:
+            if kind == 'device':
+                device = payload
+                break
+        if device is None:
+            raise ValueError('No joystick in the session log ' + path)
+
+        super().__init__(device['name'], device['axes'], device['buttons'], self._play_session)
+
+        self.speed = speed
+        self.finished = threading.Event()
+
+    def _play_session(self):
+        start = None
+        first_time = 0
+
+        try:
+            for kind, payload in self._frames:
+                if self._stopped.is_set():
+                    return
+                if kind != 'events':
+                    log.debug('Replaying the session with the first joystick, ignoring a reconnection')
+                    continue
+
+                if not self.speed:
+                    if not self._write(payload):
+                        return
+                    self.events_played += len(payload) // JS_EVENT.size
+                    continue
+
+                for offset in range(0, len(payload), JS_EVENT.size):
+                    event_time = JS_EVENT.unpack_from(payload, offset)[0]
+                    if start is None:
+                        start = time.monotonic()
+                        first_time = event_time
+
+                    # Kernel timestamps are milliseconds that wrap around
+                    due = start + ((event_time - first_time) & 0xFFFFFFFF) / 1000.0 / self.speed
+                    if self._stopped.wait(max(0.0, due - time.monotonic())):
+                        return
+
+                    if not self._write(payload[offset:offset + JS_EVENT.size]):
+                        return
+                    self.events_played += 1
+        finally:
+            self.finished.set()
+
+
+class SimulatedHAL:
+    """
+    Every device in memory, for running and measuring the controllers away from the robot.
+    All the simulated I2C devices of the process share one bus and its latency model.
+    """
+
+    name = SIMULATED
+
+    def __init__(self, hal_config):
+        self.bus = SimulatedI2CBus(hal_config.i2c_transaction_latency, hal_config.i2c_byte_latency)
+        self.bus.journal = load_i2c_journal()
+        self.joystick_script = hal_config.joystick_script
+        self.joystick_replay = hal_config.joystick_replay
+        self.joystick_replay_speed = hal_config.joystick_replay_speed
+
+        self._gpio = None
+        self.joysticks = []
+
+    def i2c(self):
+        return self.bus
+
+    def i2c_bus(self):
+        # In the I2C bus controller the devices of the configuration are on its bus from the start, the
+        # controllers only send transactions
+        for board in Config().boards.values():
+            if not isinstance(self.bus.devices.get(board.address), SimulatedPCA9685):
+                SimulatedPCA9685(self.bus, board.address, board.reference_clock_speed)
+
+        lcd_address = Config().lcd_screen_controller.address
+        if lcd_address and not isinstance(self.bus.devices.get(lcd_address), SimulatedLCD):
+            self.bus.attach(lcd_address, SimulatedLCD())
+
+        return self.bus
+
+    def pca9685(self, i2c, address, reference_clock_speed):
+        # Like the chip, the registers survive the driver being created again, which resets MODE1
+        pca9685 = i2c.devices.get(address) if isinstance(i2c, SimulatedI2CBus) else None
+        if not isinstance(pca9685, SimulatedPCA9685):
+            pca9685 = SimulatedPCA9685(i2c, address, reference_clock_speed)
+        pca9685.reference_clock_speed = reference_clock_speed
+        pca9685.reset()
+        return pca9685
+
+    def gpio(self):
+        if self._gpio is None:
+            self._gpio = SimulatedGPIO()
+        return self._gpio
+
+    def smbus(self, port=1):
+        return SimulatedSMBus(self.bus)
+
+    def lcd_screen(self, address, i2c=None):
+        if i2c is not None:
+            return LCD_16x2_I2C_driver.lcd(address=address, bus=I2CBusSMBus(i2c))
+
+        if not isinstance(self.bus.devices.get(address), SimulatedLCD):
+            self.bus.attach(address, SimulatedLCD())
+        return LCD_16x2_I2C_driver.lcd(address=address, bus=self.smbus())
+
+    def joystick(self, device):
+        if self.joystick_replay:
+            log.info('Replaying the joystick session ' + self.joystick_replay + ' at ' +
+                     (str(self.joystick_replay_speed) + 'x' if self.joystick_replay_speed else 'full speed'))
+            joystick = ReplayJoystick(self.joystick_replay, self.joystick_replay_speed)
+        elif self.joystick_script:
+            log.info('Playing the joystick script ' + self.joystick_script)
+            joystick = ScriptedJoystick.from_file(self.joystick_script)
+        else:
+            joystick = ScriptedJoystick()
+
+        self.joysticks.append(joystick)
+        return joystick
@@ -0,0 +1,158 @@
+import errno
+import multiprocessing
+import time
+
+import spotmicroai.utilities.queues as queues
+
+# Every controller sending I2C transactions to the I2C bus controller, served in this order of priority:
+# servo frames never wait behind the LCD screen
+SERVOS = 0
+LCD = 1
+PRIORITIES = ('servos', 'lcd')
+
+CLIENTS = {queues.MOTION_CONTROLLER: SERVOS,
+           queues.LCD_SCREEN_CONTROLLER: LCD}
+
+# Longer than any transaction waits for the bus, the I2C bus controller is gone, e.g. terminated first
+REPLY_TIMEOUT = 1.0
+
+# Requests: sequence, kind, address, bytes written, bytes read, preemptible, monotonic time sent.
+# Replies: sequence, succeeded, result or (errno, message)
+WRITE = 1
+READ = 2
+WRITE_READ = 3
+STATISTICS = 4
+
+
+class I2CBusChannels:
+    """
+    A pipe per client controller to the I2C bus controller, created before the processes start. Each client
+    has a single thread talking on its end, every request gets its reply before the next one is sent.
+    """
+
+    def __init__(self, clients=CLIENTS):
+        self.priorities = dict(clients)
+        self._pipes = {client: multiprocessing.Pipe() for client in clients}
+
+    def controller_ends(self):
+        # (connection, priority) of every client, the I2C bus controller side
+        return [(self._pipes[client][0], priority) for client, priority in self.priorities.items()]
+
+    def client_end(self, client):
+        return self._pipes[client][1]
+
+    def close(self):
+        for controller_end, client_end in self._pipes.values():
+            controller_end.close()
+            client_end.close()
+
+
+class I2CBusClient:
+    """
+    The bus as the controllers see it when the I2C bus controller owns it. Offers what adafruit_bus_device
+    and the PCA9685 driver call on a busio.I2C, and the write/read/write_then_read of the simulated bus.
+    Calls block until the transaction is done on the bus, errors come back as the OSError it raised.
+    """
+
+    def __init__(self, connection, preemptible=False):
+        self._connection = connection
+        # Writes may be split and interleaved with other transactions, only for devices where every byte
+        # stands on its own like the PCF8574 of the LCD screen
+        self.preemptible = preemptible
+
+        self._sequence = 0
+
+    def _request(self, kind, address, data=b'', size=0, preemptible=False):
+        # Replies to requests given up on, or interrupted by a signal handler sending its own, are skipped
+        self._sequence += 1
+        sequence = self._sequence
+        self._connection.send((sequence, kind, address, bytes(data), size, preemptible, time.monotonic()))
+
+        while True:
+            if not self._connection.poll(REPLY_TIMEOUT):
+                raise OSError(errno.ETIMEDOUT, 'No reply from the I2C bus controller')
+            reply_sequence, succeeded, result = self._connection.recv()
+            if reply_sequence == sequence:
+                break
+
+        if not succeeded:
+            raise OSError(*result)
+        return result
+
+    def write(self, address, data):
+        self._request(WRITE, address, data, preemptible=self.preemptible)
+
+    def read(self, address, size):
+        return self._request(READ, address, size=size)
+
+    def write_then_read(self, address, data, size):
+        return self._request(WRITE_READ, address, data, size)
+
+    def statistics(self):
+        # Per priority queue wait and latency of the I2C bus controller
+        return self._request(STATISTICS, 0)
+
+    # busio.I2C
+
+    def try_lock(self):
+        # The I2C bus controller serializes the transactions
+        return True
+
+    def unlock(self):
+        pass
+
+    def writeto(self, address, buffer, *, start=0, end=None):
+        self.write(address, buffer[start:end])
+
+    def readfrom_into(self, address, buffer, *, start=0, end=None):
+        end = len(buffer) if end is None else end
+        buffer[start:end] = self.read(address, end - start)
+
+    def writeto_then_readfrom(self, address, buffer_out, buffer_in, *, out_start=0, out_end=None, in_start=0,
+                              in_end=None):
+        in_end = len(buffer_in) if in_end is None else in_end
+        buffer_in[in_start:in_end] = self.write_then_read(address, buffer_out[out_start:out_end], in_end - in_start)
+
+    def deinit(self):
+        pass
+
+
+class I2CBusSMBus:
+    # What smbus.SMBus offers to the LCD driver, through the I2C bus controller
+
+    def __init__(self, client):
+        self.client = client
+
+    def write_byte(self, address, value):
+        self.client.write(address, bytes((value,)))
+
+    def write_byte_data(self, address, cmd, value):
+        self.client.write(address, bytes((cmd, value)))
+
+    def write_block_data(self, address, cmd, data):
+        self.client.write(address, bytes((cmd, len(data))) + bytes(data))
+
+    def write_i2c_block_data(self, address, cmd, data):
+        self.client.write(address, bytes((cmd,)) + bytes(data))
+
+    def write_bytes(self, address, data):
+        # A whole sequence at once, the I2C bus controller splits it in chunks when the client is preemptible
+        self.client.write(address, data)
+
+    def read_byte(self, address):
+        return self.client.read(address, 1)[0]
+
+    def read_byte_data(self, address, cmd):
+        return self.client.write_then_read(address, bytes((cmd,)), 1)[0]
+
+    def close(self):
+        pass
+
+
+def create_i2c_bus_client(communication_queues, client):
+    # None when the I2C bus controller is off, the controller then opens the bus itself
+    channels = communication_queues.get(queues.I2C_BUS_CONTROLLER)
+    if channels is None:
+        return None
+
+    return I2CBusClient(channels.client_end(client), preemptible=channels.priorities[client] == LCD)
@@ -0,0 +1,199 @@
+import collections
+import errno
+import signal
+import sys
+import time
+from multiprocessing.connection import wait
+
+from spotmicroai.utilities.log import Logger
+from spotmicroai.utilities.config import Config
+from spotmicroai.utilities.latency import LatencyHistogram
+from spotmicroai.hal.hal import load_hal
+import spotmicroai.utilities.queues as queues
+import spotmicroai.i2c_bus_controller.i2c_bus as i2c_bus
+
+log = Logger().setup_logger('I2C bus controller')
+
+LCD_CHUNK_SIZE = 8
+STATISTICS_INTERVAL = 60
+
+
+class Transaction:
+    __slots__ = ('connection', 'sequence', 'kind', 'address', 'data', 'size', 'preemptible', 'submitted_at',
+                 'started_at', 'written')
+
+    def __init__(self, connection, sequence, kind, address, data, size, preemptible, submitted_at):
+        self.connection = connection
+        self.sequence = sequence
+        self.kind = kind
+        self.address = address
+        self.data = data
+        self.size = size
+        self.preemptible = preemptible
+        self.submitted_at = submitted_at
+        self.started_at = None
+        # Bytes of a preemptible write already on the bus
+        self.written = 0
+
+
+class PriorityStatistics:
+
+    def __init__(self):
+        # Sent to the first byte on the bus, and sent to done
+        self.wait = LatencyHistogram()
+        self.latency = LatencyHistogram()
+        self.transactions = 0
+        self.chunks = 0
+        # Times a transaction of this priority had to let a more urgent one through halfway
+        self.preempted = 0
+
+    def summary(self):
+        return {'transactions': self.transactions,
+                'chunks': self.chunks,
+                'preempted': self.preempted,
+                'wait': self.wait.summary(),
+                'latency': self.latency.summary()}
+
+
+class I2CBusController:
+    """
+    The only process on the I2C bus when enabled: the other controllers send it their transactions and wait for
+    the reply. A queue per priority, always served from the most urgent one. Preemptible writes, the LCD screen's,
+    go to the bus chunk by chunk and the queues are looked at again in between, so a servo frame waits for one
+    chunk at most instead of a whole line of the screen.
+    """
+
+    def __init__(self, communication_queues):
+
+        try:
+
+            log.debug('Starting controller...')
+
+            signal.signal(signal.SIGINT, self.exit_gracefully)
+            signal.signal(signal.SIGTERM, self.exit_gracefully)
+
+            self.bus = load_hal().i2c_bus()
+
+            i2c_bus_controller = Config().i2c_bus_controller
+            self.lcd_chunk_size = i2c_bus_controller.lcd_chunk_size or LCD_CHUNK_SIZE
+            self.statistics_interval = i2c_bus_controller.statistics_interval or STATISTICS_INTERVAL
+
+            self._priorities = dict(communication_queues[queues.I2C_BUS_CONTROLLER].controller_ends())
+            self._connections = list(self._priorities)
+
+            self._queues = [collections.deque() for priority in i2c_bus.PRIORITIES]
+            self._statistics = [PriorityStatistics() for priority in i2c_bus.PRIORITIES]
+
+        except Exception as e:
+            log.error('I2C bus controller initialization problem', e)
+            sys.exit(1)
+
+    def exit_gracefully(self, signum, frame):
+        log.info('Terminated')
+        sys.exit(0)
+
+    def do_process_events_from_queues(self):
+
+        next_statistics = time.monotonic() + self.statistics_interval
+
+        try:
+            while self._connections:
+
+                # Only waits when there is nothing queued, otherwise just picks up what arrived meanwhile
+                pending = any(self._queues)
+                for connection in wait(self._connections, timeout=0 if pending else self.statistics_interval):
+                    self.receive(connection)
+
+                self.serve_next()
+
+                if time.monotonic() >= next_statistics:
+                    next_statistics = time.monotonic() + self.statistics_interval
+                    self.log_statistics()
+
+        except Exception as e:
+            log.error('Unknown problem while serving the I2C transactions', e)
+
+    def receive(self, connection):
+        priority = self._priorities[connection]
+
+        try:
+            while connection.poll():
+                sequence, kind, address, data, size, preemptible, submitted_at = connection.recv()
+
+                if kind == i2c_bus.STATISTICS:
+                    connection.send((sequence, True, self.statistics()))
+                    continue
+
+                self._queues[priority].append(Transaction(connection, sequence, kind, address, data, size,
+                                                          preemptible, submitted_at))
+
+        except EOFError:
+            # The client controller is gone
+            self._connections.remove(connection)
+
+    def serve_next(self):
+        for priority, queue in enumerate(self._queues):
+            if queue:
+                break
+        else:
+            return
+
+        transaction = queue[0]
+        statistics = self._statistics[priority]
+
+        now = time.monotonic()
+        if transaction.started_at is None:
+            transaction.started_at = now
+            statistics.wait.add(now - transaction.submitted_at)
+
+            # Less urgent transactions left halfway for this one
+            for lower_priority in range(priority + 1, len(self._queues)):
+                if self._queues[lower_priority] and self._queues[lower_priority][0].started_at is not None:
+                    self._statistics[lower_priority].preempted += 1
+
+        try:
+            if transaction.kind == i2c_bus.WRITE and transaction.preemptible:
+                chunk = transaction.data[transaction.written:transaction.written + self.lcd_chunk_size]
+                self.bus.write(transaction.address, chunk)
+                transaction.written += len(chunk)
+                statistics.chunks += 1
+
+                if transaction.written < len(transaction.data):
+                    # Back to the queues, a servo frame may have arrived meanwhile
+                    return
+
+                result = None
+            elif transaction.kind == i2c_bus.WRITE:
+                result = self.bus.write(transaction.address, transaction.data)
+            elif transaction.kind == i2c_bus.READ:
+                result = self.bus.read(transaction.address, transaction.size)
+            elif transaction.kind == i2c_bus.WRITE_READ:
+                result = self.bus.write_then_read(transaction.address, transaction.data, transaction.size)
+            else:
+                raise ValueError('Unknown I2C transaction kind ' + str(transaction.kind))
+
+            reply = (transaction.sequence, True, result)
+
+        except Exception as e:
+            error = e.errno if isinstance(e, OSError) and e.errno else errno.EIO
+            reply = (transaction.sequence, False, (error, str(e)))
+
+        queue.popleft()
+        statistics.transactions += 1
+        statistics.latency.add(time.monotonic() - transaction.submitted_at)
+
+        try:
+            transaction.connection.send(reply)
+        except (BrokenPipeError, EOFError):
+            pass
+
+    def statistics(self):
+        return {name: statistics.summary() for name, statistics in zip(i2c_bus.PRIORITIES, self._statistics)}
+
+    def log_statistics(self):
+        for name, statistics in self.statistics().items():
+            wait = statistics['wait']
+            log.info(name + ': ' + str(statistics['transactions']) + ' transactions, ' +
+                     str(statistics['preempted']) + ' preempted, queue wait p50/p95/p99/max ' +
+                     str(wait['p50_ms']) + '/' + str(wait['p95_ms']) + '/' + str(wait['p99_ms']) + '/' +
+                     str(wait['max_ms']) + ' ms')
@@ -13,14 +13,43 @@ Made available under GNU GENERAL PUBLIC LICENSE
 """
 #
 #
-import smbus
+import os
+from fcntl import ioctl
 from time import *
 
+from spotmicroai.hal.i2c_journal import JournaledSMBus, WRITE
+
+# linux/i2c-dev.h
+I2C_SLAVE = 0x0703
+
+# SMBus block transfers carry a command byte plus up to 32 data bytes
+I2C_BLOCK_MAX = 32
+
 
 class i2c_device:
-    def __init__(self, addr, port=1):
+    def __init__(self, addr, port=1, bus=None, journal=None):
         self.addr = addr
+        self.fd = None
+        self.journal = journal
+
+        if bus is not None:
+            self.bus = bus
+            return
+
+        # Only on the Raspberry Pi, other buses come from the hardware abstraction layer
+        import smbus
         self.bus = smbus.SMBus(port)
+        if journal is not None:
+            self.bus = JournaledSMBus(self.bus, journal)
+
+        # Plain write() on the i2c-dev node sends any number of bytes as one transaction
+        try:
+            self.fd = os.open('/dev/i2c-' + str(port), os.O_RDWR)
+            ioctl(self.fd, I2C_SLAVE, addr)
+        except OSError:
+            if self.fd is not None:
+                os.close(self.fd)
+            self.fd = None
 
     # Write a single command
     def write_cmd(self, cmd):
@@ -37,6 +66,28 @@ class i2c_device:
         self.bus.write_block_data(self.addr, cmd, data)
         sleep(0.0001)
 
+    # Write a sequence of bytes, each one is a new state of the PCF8574 outputs
+    def write_bytes(self, data):
+        if self.fd is not None:
+            started_at = monotonic()
+            os.write(self.fd, data)
+            if self.journal is not None:
+                self.journal.record(WRITE, self.addr, data, len(data), started_at, monotonic())
+            return
+
+        # Buses taking a whole sequence, e.g. the I2C bus controller's that splits it in chunks itself
+        if hasattr(self.bus, 'write_bytes'):
+            self.bus.write_bytes(self.addr, data)
+            return
+
+        # The command byte of a block write is just one more output state for the PCF8574
+        for start in range(0, len(data), I2C_BLOCK_MAX + 1):
+            chunk = data[start:start + I2C_BLOCK_MAX + 1]
+            if len(chunk) == 1:
+                self.bus.write_byte(self.addr, chunk[0])
+            else:
+                self.bus.write_i2c_block_data(self.addr, chunk[0], list(chunk[1:]))
+
     # Read a single byte
     def read(self):
         return self.bus.read_byte(self.addr)
@@ -102,8 +153,11 @@ Rs = 0b00000001  # Register select bit
 
 class lcd:
     # initializes objects and lcd
-    def __init__(self, address=ADDRESS):
-        self.lcd_device = i2c_device(address)
+    def __init__(self, address=ADDRESS, bus=None, journal=None):
+        self.lcd_device = i2c_device(address, bus=bus, journal=journal)
+
+        # Backlight bit of every state written, the PCF8574 drives it with the data lines
+        self._backlight = LCD_BACKLIGHT
 
         self.lcd_write(0x03)
         self.lcd_write(0x03)
@@ -118,13 +172,13 @@ class lcd:
 
     # clocks EN to latch command
     def lcd_strobe(self, data):
-        self.lcd_device.write_cmd(data | En | LCD_BACKLIGHT)
+        self.lcd_device.write_cmd(data | En | self._backlight)
         sleep(.0005)
-        self.lcd_device.write_cmd(((data & ~En) | LCD_BACKLIGHT))
+        self.lcd_device.write_cmd(((data & ~En) | self._backlight))
         sleep(.0001)
 
     def lcd_write_four_bits(self, data):
-        self.lcd_device.write_cmd(data | LCD_BACKLIGHT)
+        self.lcd_device.write_cmd(data | self._backlight)
         self.lcd_strobe(data)
 
     # write a command to lcd
@@ -138,38 +192,61 @@ class lcd:
         self.lcd_write_four_bits(mode | (charvalue & 0xF0))
         self.lcd_write_four_bits(mode | ((charvalue << 4) & 0xF0))
 
+    # PCF8574 states clocking one byte in: for each nibble data, data with EN high, data with EN low.
+    # At I2C speeds every state lasts longer than the EN pulse and the 37us the HD44780 needs per byte,
+    # so no sleeping in between (clear and home are slower, see lcd_clear)
+    def lcd_encode(self, cmd, mode=0):
+        high = mode | (cmd & 0xF0) | self._backlight
+        low = mode | ((cmd << 4) & 0xF0) | self._backlight
+        return bytes((high, high | En, high, low, low | En, low))
+
+    def lcd_encode_string(self, string, mode=Rs):
+        sequence = bytearray()
+        for char in string:
+            sequence += self.lcd_encode(char if isinstance(char, int) else ord(char), mode)
+        return sequence
+
+    # send a sequence built with lcd_encode in one go
+    def lcd_send(self, sequence):
+        self.lcd_device.write_bytes(sequence)
+
     # put string function
     def lcd_display_string(self, string, line):
         if line == 1:
-            self.lcd_write(0x80)
+            sequence = bytearray(self.lcd_encode(0x80))
         if line == 2:
-            self.lcd_write(0xC0)
+            sequence = bytearray(self.lcd_encode(0xC0))
         if line == 3:
-            self.lcd_write(0x94)
+            sequence = bytearray(self.lcd_encode(0x94))
         if line == 4:
-            self.lcd_write(0xD4)
+            sequence = bytearray(self.lcd_encode(0xD4))
 
-        for char in string:
-            self.lcd_write(ord(char), Rs)
+        sequence += self.lcd_encode_string(string)
+        self.lcd_send(sequence)
 
     # clear lcd and set to home
     def lcd_clear(self):
         self.lcd_write(LCD_CLEARDISPLAY)
         self.lcd_write(LCD_RETURNHOME)
+        sleep(0.002)
 
     # define backlight on/off (lcd.backlight(1); off= lcd.backlight(0)
     def backlight(self, state):  # for state, 1 = on, 0 = off
         if state == 1:
-            self.lcd_device.write_cmd(LCD_BACKLIGHT)
+            self._backlight = LCD_BACKLIGHT
         elif state == 0:
-            self.lcd_device.write_cmd(LCD_NOBACKLIGHT)
+            self._backlight = LCD_NOBACKLIGHT
+        else:
+            return
+
+        self.lcd_device.write_cmd(self._backlight)
 
     # add custom characters (0 - 7)
     def lcd_load_custom_chars(self, fontdata):
-        self.lcd_write(0x40);
+        sequence = bytearray(self.lcd_encode(0x40))
         for char in fontdata:
-            for line in char:
-                self.lcd_write_char(line)
+            sequence += self.lcd_encode_string(char)
+        self.lcd_send(sequence)
 
     def lcd_display_string_pos(self, string, line, pos):
         if line == 1:
@@ -181,7 +258,6 @@ class lcd:
         elif line == 4:
             pos_new = 0x54 + pos
 
-        self.lcd_write(0x80 + pos_new)
-
-        for char in string:
-            self.lcd_write(ord(char), Rs)
+        sequence = bytearray(self.lcd_encode(0x80 + pos_new))
+        sequence += self.lcd_encode_string(string)
+        self.lcd_send(sequence)
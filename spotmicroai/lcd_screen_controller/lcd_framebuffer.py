@@ -0,0 +1,88 @@
+from spotmicroai.lcd_screen_controller.LCD_16x2_I2C_driver import LCD_SETDDRAMADDR, Rs
+
+LCD_ROWS = 2
+LCD_COLUMNS = 16
+
+# DDRAM address of the first cell of each row
+LCD_ROW_ADDRESSES = (0x00, 0x40)
+
+BLANK = ord(' ')
+
+
+class LCDFramebuffer:
+    """
+    What the 2x16 screen should show next to what it is known to show. flush() only sends the cells that
+    differ, moving the cursor just when the next changed cell isn't the one the LCD auto-increments to,
+    all of it as a single transfer.
+    Cells hold character codes, 0 to 7 being the custom glyphs.
+    """
+
+    def __init__(self, screen, rows=LCD_ROWS, columns=LCD_COLUMNS):
+        self.screen = screen
+        self.rows = rows
+        self.columns = columns
+
+        self.frame = [[BLANK] * columns for row in range(rows)]
+        self.invalidate()
+
+        self.flushes = 0
+        self.cells_written = 0
+        self.cursor_moves = 0
+
+    def invalidate(self):
+        # Content of the screen unknown, next flush redraws every cell
+        self._shown = [[None] * self.columns for row in range(self.rows)]
+        self._cursor = None
+
+    def cleared(self):
+        # The screen was cleared behind our back: blank, cursor home
+        self._shown = [[BLANK] * self.columns for row in range(self.rows)]
+        self._cursor = (0, 0)
+
+    def cursor_lost(self):
+        # Something else moved the address counter, e.g. loading custom glyphs into CGRAM
+        self._cursor = None
+
+    def write(self, row, column, codes):
+        for code in codes:
+            if column >= self.columns:
+                break
+            self.frame[row][column] = ord(code) if isinstance(code, str) else code
+            column += 1
+
+    def flush(self):
+        # The whole update, cursor moves included, goes to the screen as one byte sequence
+        sequence = bytearray()
+        cells_written = 0
+
+        for row in range(self.rows):
+            frame_row = self.frame[row]
+            shown_row = self._shown[row]
+
+            for column in range(self.columns):
+                code = frame_row[column]
+                if code == shown_row[column]:
+                    continue
+
+                if self._cursor != (row, column):
+                    sequence += self.screen.lcd_encode(LCD_SETDDRAMADDR | (LCD_ROW_ADDRESSES[row] + column))
+                    self.cursor_moves += 1
+
+                sequence += self.screen.lcd_encode(code, Rs)
+                shown_row[column] = code
+                cells_written += 1
+
+                # The address counter moves to the next cell on its own
+                self._cursor = (row, column + 1)
+
+        if cells_written:
+            self.screen.lcd_send(sequence)
+            self.flushes += 1
+            self.cells_written += cells_written
+
+        return cells_written
+
+    def statistics(self):
+        return {'flushes': self.flushes,
+                'cells_written': self.cells_written,
+                'cursor_moves': self.cursor_moves}
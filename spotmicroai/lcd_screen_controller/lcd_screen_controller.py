@@ -1,17 +1,43 @@
 import signal
 import sys
 import time
-import queue
 
 from spotmicroai.utilities.log import Logger
-from spotmicroai.lcd_screen_controller import LCD_16x2_I2C_driver
+from spotmicroai.lcd_screen_controller.lcd_framebuffer import LCDFramebuffer
 from spotmicroai.utilities.config import Config
 from spotmicroai.utilities.system import System
+from spotmicroai.hal.hal import load_hal
+from spotmicroai.i2c_bus_controller.i2c_bus import create_i2c_bus_client
 
 import spotmicroai.utilities.queues as queues
+import spotmicroai.utilities.status_board as status_board
 
 log = Logger().setup_logger('LCD Screen controller')
 
+# The temperature is the only thing changing on its own, no need to look at it every second
+TEMPERATURE_INTERVAL = 5
+
+STATUS_BOARD_POLL_INTERVAL = 0.1
+
+# Custom glyphs, their position is their character code. There is only memory for 8 in the lcd screen controller
+ICON_EMPTY = 0
+ICON_SUCCESS = 1
+ICON_PCA9685 = 2
+ICON_GPIO = 3
+ICON_REMOTE_CONTROLLER = 4
+ICON_TEMPERATURE = 5
+ICON_PROBLEM = 6
+ICON_SUCCESS_REVERSE = 7
+
+CUSTOM_ICONS = [[0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0],
+                [0x0, 0x1, 0x3, 0x16, 0x1c, 0x8, 0x0, 0x0],
+                [0x1f, 0x11, 0x15, 0x15, 0x15, 0x15, 0x11, 0x1f],
+                [0x4, 0x4, 0x1f, 0x0, 0x0, 0xe, 0x4, 0x4],
+                [0x11, 0xa, 0xe, 0xa, 0xa, 0xe, 0xa, 0x11],
+                [0x18, 0x18, 0x3, 0x4, 0x4, 0x4, 0x3, 0x0],
+                [0x0, 0x1b, 0xe, 0x4, 0xe, 0x1b, 0x0, 0x0],
+                [0x1f, 0x1e, 0x1c, 0x9, 0x3, 0x17, 0x1f]]
+
 
 class LCDScreenController:
     is_alive = False
@@ -22,6 +48,9 @@ class LCDScreenController:
     motion_controller_1 = None
     motion_controller_2 = None
 
+    backlight = None
+    temperature = None
+
     def __init__(self, communication_queues):
         try:
 
@@ -30,13 +59,20 @@ class LCDScreenController:
             signal.signal(signal.SIGINT, self.exit_gracefully)
             signal.signal(signal.SIGTERM, self.exit_gracefully)
 
-            i2c_address = int(Config().get(Config.LCD_SCREEN_CONTROLLER_I2C_ADDRESS), 0)
+            i2c_address = Config().lcd_screen_controller.address
 
-            self.screen = LCD_16x2_I2C_driver.lcd(address=i2c_address)
+            # Behind the servo frames when the I2C bus controller owns the bus
+            i2c = create_i2c_bus_client(communication_queues, queues.LCD_SCREEN_CONTROLLER)
+            self.screen = load_hal().lcd_screen(i2c_address, i2c)
+            self.framebuffer = LCDFramebuffer(self.screen)
 
-            self._lcd_screen_queue = communication_queues[queues.LCD_SCREEN_CONTROLLER]
+            self._status_board = communication_queues[queues.STATUS_BOARD]
+            self._status_version = None
 
             self.screen.lcd_clear()
+            self.framebuffer.cleared()
+            self.load_custom_icons()
+            self.temperature = System().temperature()
             self.update_lcd_creen()
             self.turn_on()
 
@@ -60,130 +96,89 @@ class LCDScreenController:
             return
 
         try:
+            next_temperature = time.monotonic() + TEMPERATURE_INTERVAL
+
             while True:
 
-                try:
-                    event = self._lcd_screen_queue.get(block=True, timeout=1)
+                version = self._status_board.version()
+                if version != self._status_version:
+                    self._status_version = version
+                    self.read_status_board()
 
-                    if event.startswith(queues.LCD_SCREEN_CONTROLLER + ' '):
-                        self.lcd_screen_controller = event[len(queues.LCD_SCREEN_CONTROLLER) + 1:]
+                if time.monotonic() >= next_temperature:
+                    next_temperature = time.monotonic() + TEMPERATURE_INTERVAL
+                    self.temperature = System().temperature()
 
-                    if event.startswith(queues.ABORT_CONTROLLER + ''):
-                        self.abort_controller = event[len(queues.ABORT_CONTROLLER) + 1:]
+                # Only the cells that changed reach the screen, most of the time none
+                self.update_lcd_creen()
 
-                    if event.startswith(queues.REMOTE_CONTROLLER_CONTROLLER + ' '):
-                        self.remote_controller_controller = event[len(queues.REMOTE_CONTROLLER_CONTROLLER + ' '):]
+                time.sleep(STATUS_BOARD_POLL_INTERVAL)
 
-                    if event.startswith('motion_controller_1 '):
-                        self.motion_controller_1 = event[len('motion_controller_1 '):]
+        except Exception as e:
+            log.error('Unknown problem while processing the status board in the lcd screen controller', e)
 
-                    if event.startswith('motion_controller_2 '):
-                        self.motion_controller_2 = event[len('motion_controller_2 '):]
+    def read_status_board(self):
 
-                except queue.Empty as e:
-                    self.update_lcd_creen()
-                    time.sleep(1)
-
-        except Exception as e:
-            log.error('Unknown problem while processing the queue of the lcd screen controller', e)
+        self.lcd_screen_controller = self._status_board.get(status_board.LCD_SCREEN_CONTROLLER)[0]
+        self.abort_controller = self._status_board.get(status_board.ABORT_CONTROLLER)[0]
+        self.remote_controller_controller = self._status_board.get(status_board.REMOTE_CONTROLLER_CONTROLLER)[0]
+        self.motion_controller_1 = self._status_board.get(status_board.MOTION_CONTROLLER_1)[0]
+        self.motion_controller_2 = self._status_board.get(status_board.MOTION_CONTROLLER_2)[0]
 
     def turn_off(self):
         self.screen.lcd_clear()
+        self.framebuffer.cleared()
         time.sleep(0.1)
         self.screen.backlight(0)
+        self.backlight = 0
 
     def turn_on(self):
         self.screen.backlight(1)
+        self.backlight = 1
 
-    def update_lcd_creen(self):  # https://www.quinapalus.com/hd44780udg.html
+    def update_lcd_creen(self):
 
-        if self.lcd_screen_controller == 'ON':
+        if self.lcd_screen_controller == status_board.STATUS_ON and self.backlight != 1:
             self.turn_on()
-        elif self.lcd_screen_controller == 'OFF':
+        elif self.lcd_screen_controller == status_board.STATUS_OFF and self.backlight != 0:
             self.turn_off()
 
-        temperature = System().temperature()
-
-        custom_icons = []
-
-        icon_empty = [0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0]
-        icon_success = [0x0, 0x1, 0x3, 0x16, 0x1c, 0x8, 0x0, 0x0]
-        icon_pca9685 = [0x1f, 0x11, 0x15, 0x15, 0x15, 0x15, 0x11, 0x1f]
-        icon_gpio = [0x4, 0x4, 0x1f, 0x0, 0x0, 0xe, 0x4, 0x4]
-        icon_remote_controller = [0x11, 0xa, 0xe, 0xa, 0xa, 0xe, 0xa, 0x11]
-        icon_temperature = [0x18, 0x18, 0x3, 0x4, 0x4, 0x4, 0x3, 0x0]
-        icon_problem = [0x0, 0x1b, 0xe, 0x4, 0xe, 0x1b, 0x0, 0x0]
-        icon_success_reverse = [0x1f, 0x1e, 0x1c, 0x9, 0x3, 0x17, 0x1f]
-
-        # There is only memory for 7 in the lcd screen controller
-        custom_icons.insert(0, icon_empty)
-        custom_icons.insert(1, icon_success)
-        custom_icons.insert(2, icon_pca9685)
-        custom_icons.insert(3, icon_gpio)
-        custom_icons.insert(4, icon_remote_controller)
-        custom_icons.insert(5, icon_temperature)
-        custom_icons.insert(6, icon_problem)
-        custom_icons.insert(7, icon_success_reverse)
-
-        self.screen.lcd_load_custom_chars(custom_icons)
-
-        self.screen.lcd_write(0x80)  # First line
-
-        for char in 'SpotMicro':
-            self.screen.lcd_write(ord(char), 0b00000001)
-
-        self.screen.lcd_write_char(0)
-        self.screen.lcd_write_char(4)
-        self.screen.lcd_write_char(0)
-        self.screen.lcd_write_char(3)
-        self.screen.lcd_write_char(0)
-        self.screen.lcd_write_char(2)
-        self.screen.lcd_write_char(2)
-
-        # Write next three chars to row 2 directly
-        self.screen.lcd_write(0xC0)  # Second line
-        self.screen.lcd_write_char(0)
-        self.screen.lcd_write_char(0)
-        self.screen.lcd_write_char(0)
-        self.screen.lcd_write_char(0)
-        self.screen.lcd_write_char(0)
-
-        if temperature:
-            for char in temperature.rjust(3, ' '):
-                self.screen.lcd_write(ord(char), 0b00000001)
-            self.screen.lcd_write_char(5)
-        else:
-            self.screen.lcd_write_char(0)
-            self.screen.lcd_write_char(0)
-            self.screen.lcd_write_char(0)
-            self.screen.lcd_write_char(0)
+        self.framebuffer.write(0, 0, 'SpotMicro')
+        self.framebuffer.write(0, 9, [ICON_EMPTY, ICON_REMOTE_CONTROLLER, ICON_EMPTY, ICON_GPIO, ICON_EMPTY,
+                                      ICON_PCA9685, ICON_PCA9685])
 
-        self.screen.lcd_write_char(0)
+        self.framebuffer.write(1, 0, [ICON_EMPTY] * 5)
 
-        if self.remote_controller_controller == 'OK':
-            self.screen.lcd_write_char(1)
-        elif self.remote_controller_controller == 'SEARCHING':
-            self.screen.lcd_write_char(7)
+        if self.temperature:
+            self.framebuffer.write(1, 5, self.temperature.rjust(3, ' ')[:3])
+            self.framebuffer.write(1, 8, [ICON_TEMPERATURE])
         else:
-            self.screen.lcd_write_char(6)
+            self.framebuffer.write(1, 5, [ICON_EMPTY] * 4)
 
-        self.screen.lcd_write_char(0)
+        if self.remote_controller_controller == status_board.STATUS_OK:
+            remote_controller_icon = ICON_SUCCESS
+        elif self.remote_controller_controller == status_board.STATUS_SEARCHING:
+            remote_controller_icon = ICON_SUCCESS_REVERSE
+        else:
+            remote_controller_icon = ICON_PROBLEM
 
-        if self.abort_controller == 'OK ON':
-            self.screen.lcd_write_char(1)
-        elif self.abort_controller == 'OK OFF':
-            self.screen.lcd_write_char(7)
+        if self.abort_controller == status_board.STATUS_ON:
+            abort_controller_icon = ICON_SUCCESS
+        elif self.abort_controller == status_board.STATUS_OFF:
+            abort_controller_icon = ICON_SUCCESS_REVERSE
         else:
-            self.screen.lcd_write_char(6)
+            abort_controller_icon = ICON_PROBLEM
 
-        self.screen.lcd_write_char(0)
+        motion_controller_1_icon = ICON_SUCCESS if self.motion_controller_1 == status_board.STATUS_OK else ICON_PROBLEM
+        motion_controller_2_icon = ICON_SUCCESS if self.motion_controller_2 == status_board.STATUS_OK else ICON_PROBLEM
 
-        if self.motion_controller_1 == 'OK':
-            self.screen.lcd_write_char(1)
-        else:
-            self.screen.lcd_write_char(6)
+        self.framebuffer.write(1, 9, [ICON_EMPTY, remote_controller_icon, ICON_EMPTY, abort_controller_icon,
+                                      ICON_EMPTY, motion_controller_1_icon, motion_controller_2_icon])
 
-        if self.motion_controller_2 == 'OK':
-            self.screen.lcd_write_char(1)
-        else:
-            self.screen.lcd_write_char(6)
+        self.framebuffer.flush()
+
+    def load_custom_icons(self):  # https://www.quinapalus.com/hd44780udg.html
+
+        # The glyphs stay in the CGRAM of the lcd screen controller, loaded once per session
+        self.screen.lcd_load_custom_chars(CUSTOM_ICONS)
+        self.framebuffer.cursor_lost()
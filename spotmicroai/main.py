@@ -3,6 +3,14 @@
 import sys
 
 from spotmicroai.utilities.log import Logger
+from spotmicroai.utilities.config import Config
+from spotmicroai.utilities.joystick_mailbox import JoystickMailbox
+from spotmicroai.utilities.status_board import StatusBoard
+from spotmicroai.utilities.heartbeat import Heartbeat
+from spotmicroai.utilities.trace import TraceBuffer
+from spotmicroai.abort_controller.abort_signal import AbortSignal
+from spotmicroai.i2c_bus_controller.i2c_bus import I2CBusChannels
+import spotmicroai.utilities.queues as queues
 
 import multiprocessing
 
@@ -10,6 +18,7 @@ from spotmicroai.motion_controller.motion_controller import MotionController
 from spotmicroai.abort_controller.abort_controller import AbortController
 from spotmicroai.lcd_screen_controller.lcd_screen_controller import LCDScreenController
 from spotmicroai.remote_controller.remote_controller import RemoteControllerController
+from spotmicroai.i2c_bus_controller.i2c_bus_controller import I2CBusController
 
 log = Logger().setup_logger()
 
@@ -29,6 +38,11 @@ def process_remote_controller_controller(communication_queues):
     remote_controller.do_process_events_from_queues()
 
 
+def process_i2c_bus_controller(communication_queues):
+    i2c_bus_controller = I2CBusController(communication_queues)
+    i2c_bus_controller.do_process_events_from_queues()
+
+
 # Optional
 def process_output_lcd_screen_controller(communication_queues):
     lcd_screen = LCDScreenController(communication_queues)
@@ -36,9 +50,23 @@ def process_output_lcd_screen_controller(communication_queues):
 
 
 def create_controllers_queues():
-    communication_queues = {'abort_controller': multiprocessing.Queue(10),
-                            'motion_controller': multiprocessing.Queue(1),
-                            'lcd_screen_controller': multiprocessing.Queue(10)}
+    # The motion controller only cares about the newest joystick state, it gets a mailbox instead of a queue.
+    # Status for the LCD screen goes to a shared memory board, no controller waits on the screen.
+    # Aborts skip the abort controller queue, any process trips the abort signal.
+    communication_queues = {queues.ABORT_CONTROLLER: multiprocessing.Queue(10),
+                            queues.ABORT_SIGNAL: AbortSignal(create=True),
+                            queues.MOTION_HEARTBEAT: Heartbeat(create=True),
+                            queues.MOTION_CONTROLLER: JoystickMailbox(create=True),
+                            queues.STATUS_BOARD: StatusBoard(create=True)}
+
+    # Stage timings for the tracing tool, the controllers don't take a single timestamp for it when off
+    if Config().trace.enabled:
+        communication_queues[queues.TRACE] = TraceBuffer(create=True, records=Config().trace.records)
+
+    # The motion controller and the LCD screen send their transactions to the I2C bus controller instead of
+    # sharing the bus unaware of each other
+    if Config().i2c_bus_controller.enabled:
+        communication_queues[queues.I2C_BUS_CONTROLLER] = I2CBusChannels()
 
     log.info('Created the communication queues: ' + ', '.join(communication_queues.keys()))
 
@@ -48,9 +76,13 @@ def create_controllers_queues():
 def close_controllers_queues(communication_queues):
     log.info('Closing controller queues')
 
-    for queue in communication_queues.items():
+    for name, queue in communication_queues.items():
         queue.close()
-        queue.join_thread()
+        if name in (queues.MOTION_CONTROLLER, queues.STATUS_BOARD, queues.ABORT_SIGNAL, queues.MOTION_HEARTBEAT,
+                    queues.TRACE):
+            queue.unlink()
+        elif name == queues.ABORT_CONTROLLER:
+            queue.join_thread()
 
 
 def main():
@@ -58,28 +90,42 @@ def main():
 
     # Abort controller
     # Controls the 0E port from PCA9685 to cut the power to the servos conveniently if needed.
-    abort_controller = multiprocessing.Process(target=process_abort_controller, args=(communication_queues,))
+    # Processes are named after their controller, e.g. for the I2C journal
+    abort_controller = multiprocessing.Process(target=process_abort_controller, args=(communication_queues,),
+                                               name=queues.ABORT_CONTROLLER)
     abort_controller.daemon = True  # The daemon dies if the parent process dies
 
+    # I2C bus controller
+    # Serves the I2C transactions of the other controllers, servo frames first
+    i2c_bus_controller = None
+    if queues.I2C_BUS_CONTROLLER in communication_queues:
+        i2c_bus_controller = multiprocessing.Process(target=process_i2c_bus_controller, args=(communication_queues,),
+                                                     name=queues.I2C_BUS_CONTROLLER)
+        i2c_bus_controller.daemon = True
+
     # Start the motion controller
     # Moves the servos
-    motion_controller = multiprocessing.Process(target=process_motion_controller, args=(communication_queues,))
+    motion_controller = multiprocessing.Process(target=process_motion_controller, args=(communication_queues,),
+                                                name=queues.MOTION_CONTROLLER)
     motion_controller.daemon = True
 
     # Activate Bluetooth controller
     # Let you move the dog using the bluetooth paired device
     remote_controller_controller = multiprocessing.Process(target=process_remote_controller_controller,
-                                                           args=(communication_queues,))
+                                                           args=(communication_queues,),
+                                                           name=queues.REMOTE_CONTROLLER_CONTROLLER)
     remote_controller_controller.daemon = True
 
     # Screen
     # Show status of the components in the screen
     lcd_screen_controller = multiprocessing.Process(target=process_output_lcd_screen_controller,
-                                                    args=(communication_queues,))
+                                                    args=(communication_queues,), name=queues.LCD_SCREEN_CONTROLLER)
     lcd_screen_controller.daemon = True
 
     # Start the threads, queues messages are produced and consumed in those
     abort_controller.start()
+    if i2c_bus_controller:
+        i2c_bus_controller.start()
     motion_controller.start()
     remote_controller_controller.start()
     lcd_screen_controller.start()
@@ -88,6 +134,10 @@ def main():
         log.error("SpotMicro can't work without abort_controller")
         sys.exit(1)
 
+    if i2c_bus_controller and not i2c_bus_controller.is_alive():
+        log.error("SpotMicro can't work without i2c_bus_controller")
+        sys.exit(1)
+
     if not motion_controller.is_alive():
         log.error("SpotMicro can't work without motion_controller")
         sys.exit(1)
@@ -101,6 +151,8 @@ def main():
     motion_controller.join()
     remote_controller_controller.join()
     lcd_screen_controller.join()
+    if i2c_bus_controller:
+        i2c_bus_controller.join()
 
     close_controllers_queues(communication_queues)
 
@@ -0,0 +1,84 @@
+import time
+
+from spotmicroai.utilities.log import Logger
+from spotmicroai.utilities.latency import LatencyHistogram
+
+log = Logger().setup_logger('Control loop')
+
+
+class ControlLoop:
+    """
+    Deadline driven loop timing: wait_for_next_tick() sleeps until the next period starts and keeps
+    track of overruns, wake up jitter and the time spent working in each tick.
+    """
+
+    def __init__(self, frequency, statistics_interval=60, clock=time.monotonic, sleep=time.sleep):
+        self.frequency = frequency
+        self.period = 1.0 / frequency
+        self.statistics_interval = statistics_interval
+
+        self._clock = clock
+        self._sleep = sleep
+
+        self.ticks = 0
+        self.overruns = 0
+        self.jitter = LatencyHistogram()
+        self.loop_time = LatencyHistogram()
+
+        # Of the tick just started and of the one before, what the heartbeat reports
+        self.last_jitter = 0.0
+        self.last_loop_time = 0.0
+
+        self._deadline = None
+        self._tick_start = None
+        self._next_statistics = None
+
+    def wait_for_next_tick(self):
+        now = self._clock()
+
+        if self._deadline is None:
+            self._deadline = now
+            self._next_statistics = now + self.statistics_interval
+        else:
+            self.last_loop_time = now - self._tick_start
+            self.loop_time.add(self.last_loop_time)
+
+            if now > self._deadline:
+                self.overruns += 1
+            else:
+                self._sleep(self._deadline - now)
+                now = self._clock()
+
+            self.last_jitter = now - self._deadline
+            self.jitter.add(self.last_jitter)
+
+            # Too late to catch up, skip the missed periods instead of bursting through them
+            if now - self._deadline > self.period:
+                self._deadline = now
+
+        self._tick_start = now
+        self._deadline += self.period
+        self.ticks += 1
+
+        if now >= self._next_statistics:
+            self._next_statistics = now + self.statistics_interval
+            self.log_statistics()
+
+        return now
+
+    def statistics(self):
+        return {'frequency': self.frequency,
+                'ticks': self.ticks,
+                'overruns': self.overruns,
+                'jitter': self.jitter.summary(),
+                'loop_time': self.loop_time.summary()}
+
+    def log_statistics(self):
+        jitter = self.jitter.summary()
+        loop_time = self.loop_time.summary()
+
+        log.info(str(self.frequency) + 'Hz loop, ' + str(self.ticks) + ' ticks, ' + str(self.overruns) + ' overruns, ' +
+                 'jitter p50/p95/p99/max ' + str(jitter['p50_ms']) + '/' + str(jitter['p95_ms']) + '/' +
+                 str(jitter['p99_ms']) + '/' + str(jitter['max_ms']) + ' ms, ' +
+                 'loop time mean/p99/max ' + str(loop_time['mean_ms']) + '/' + str(loop_time['p99_ms']) + '/' +
+                 str(loop_time['max_ms']) + ' ms')
@@ -0,0 +1,86 @@
+import numpy as np
+
+JOINTS = ('rear_shoulder_left', 'rear_leg_left', 'rear_feet_left',
+          'rear_shoulder_right', 'rear_leg_right', 'rear_feet_right',
+          'front_shoulder_left', 'front_leg_left', 'front_feet_left',
+          'front_shoulder_right', 'front_leg_right', 'front_feet_right',
+          'arm_rotation', 'arm_lift', 'arm_range', 'arm_cam_tilt')
+
+REAR_SHOULDER_LEFT, REAR_LEG_LEFT, REAR_FEET_LEFT, \
+    REAR_SHOULDER_RIGHT, REAR_LEG_RIGHT, REAR_FEET_RIGHT, \
+    FRONT_SHOULDER_LEFT, FRONT_LEG_LEFT, FRONT_FEET_LEFT, \
+    FRONT_SHOULDER_RIGHT, FRONT_LEG_RIGHT, FRONT_FEET_RIGHT, \
+    ARM_ROTATION, ARM_LIFT, ARM_RANGE, ARM_CAM_TILT = range(len(JOINTS))
+
+REAR_LEGS = np.array([REAR_SHOULDER_LEFT, REAR_LEG_LEFT, REAR_FEET_LEFT,
+                      REAR_SHOULDER_RIGHT, REAR_LEG_RIGHT, REAR_FEET_RIGHT])
+FRONT_LEGS = np.array([FRONT_SHOULDER_LEFT, FRONT_LEG_LEFT, FRONT_FEET_LEFT,
+                       FRONT_SHOULDER_RIGHT, FRONT_LEG_RIGHT, FRONT_FEET_RIGHT])
+SHOULDERS = np.array([REAR_SHOULDER_LEFT, REAR_SHOULDER_RIGHT, FRONT_SHOULDER_LEFT, FRONT_SHOULDER_RIGHT])
+LEGS_AND_FEET = np.array([REAR_LEG_LEFT, REAR_FEET_LEFT, REAR_LEG_RIGHT, REAR_FEET_RIGHT,
+                          FRONT_LEG_LEFT, FRONT_FEET_LEFT, FRONT_LEG_RIGHT, FRONT_FEET_RIGHT])
+
+SERVO_MIN_ANGLE = 0
+SERVO_MAX_ANGLE = 180
+
+# Entries per degree in the angle to PWM ticks lookup tables
+TICKS_TABLE_RESOLUTION = 10
+
+
+class JointTable:
+    """
+    Servo configuration and commanded angles of all the joints, as arrays indexed by joint id
+    (the position of the joint in JOINTS), so poses are a handful of array operations.
+    """
+
+    def __init__(self):
+        joints = len(JOINTS)
+
+        self.board = np.zeros(joints, dtype=np.int8)
+        self.channel = np.zeros(joints, dtype=np.int8)
+        self.min_pulse = np.zeros(joints, dtype=np.int32)
+        self.max_pulse = np.zeros(joints, dtype=np.int32)
+        self.rest_angle = np.zeros(joints, dtype=np.float64)
+        self.min_angle = np.full(joints, SERVO_MIN_ANGLE, dtype=np.float64)
+        self.max_angle = np.full(joints, SERVO_MAX_ANGLE, dtype=np.float64)
+
+        self.command = np.zeros(joints, dtype=np.float64)
+
+        self.ticks_table = None
+        self._ticks_table_offsets = np.arange(joints) * (SERVO_MAX_ANGLE * TICKS_TABLE_RESOLUTION + 1)
+
+    def set_joint(self, joint, board, channel, min_pulse, max_pulse, rest_angle, min_angle=None, max_angle=None):
+        self.board[joint] = board
+        self.channel[joint] = channel
+        self.min_pulse[joint] = min_pulse
+        self.max_pulse[joint] = max_pulse
+        self.rest_angle[joint] = rest_angle
+        self.min_angle[joint] = SERVO_MIN_ANGLE if min_angle is None else min_angle
+        self.max_angle[joint] = SERVO_MAX_ANGLE if max_angle is None else max_angle
+        self.command[joint] = rest_angle
+
+    def joints_of_board(self, board):
+        return np.flatnonzero(self.board == board)
+
+    def out_of_range(self):
+        return (self.command < self.min_angle) | (self.command > self.max_angle)
+
+    def build_ticks_table(self, frequency):
+        # Ticks of every joint for every angle step between 0 and 180 degrees, computed once with the
+        # integer math of adafruit_motor.servo + adafruit_pca9685 so the hot path is a single gather
+        angles = np.arange(SERVO_MAX_ANGLE * TICKS_TABLE_RESOLUTION + 1) / TICKS_TABLE_RESOLUTION
+
+        min_duty = np.trunc(self.min_pulse * frequency / 1000000 * 0xFFFF)
+        duty_range = np.trunc(self.max_pulse * frequency / 1000000 * 0xFFFF - min_duty)
+
+        duty_cycle = min_duty[:, None] + np.trunc(angles[None, :] / SERVO_MAX_ANGLE * duty_range[:, None])
+
+        self.ticks_table = np.where(duty_cycle >= 0xFFFF, 0x1000,
+                                    (duty_cycle.astype(np.int64) + 1) >> 4).astype(np.uint16)
+
+    def ticks(self):
+        steps = (self.command * TICKS_TABLE_RESOLUTION + 0.5).astype(np.intp)
+        steps.clip(0, SERVO_MAX_ANGLE * TICKS_TABLE_RESOLUTION, out=steps)
+        steps += self._ticks_table_offsets
+
+        return self.ticks_table.ravel().take(steps)
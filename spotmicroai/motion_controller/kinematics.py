@@ -0,0 +1,163 @@
+from typing import NamedTuple
+
+import numpy as np
+
+import spotmicroai.motion_controller.joint_table as joint_table
+
+
+class RobotGeometry(NamedTuple):
+    # Millimeters. Shoulder axes are body_length apart front to back and body_width apart left to right,
+    # the leg hangs shoulder_offset outwards and shoulder_drop below the shoulder axis
+    body_length: float = 207.5
+    body_width: float = 78.0
+    shoulder_offset: float = 60.5
+    shoulder_drop: float = 10.0
+    upper_leg: float = 100.7
+    lower_leg: float = 118.5
+
+
+SPOTMICRO = RobotGeometry()
+
+# Height of the shoulders above the ground when every servo is at its rest angle, feet right under the legs
+NEUTRAL_HEIGHT = 180.0
+
+
+class BodyPose(NamedTuple):
+    # Body center above the feet stance: millimeters, radians, rotations applied yaw, pitch then roll
+    height: float = NEUTRAL_HEIGHT
+    roll: float = 0.0
+    pitch: float = 0.0
+    yaw: float = 0.0
+    x: float = 0.0
+    y: float = 0.0
+
+
+# Legs in the order of their joints in joint_table.JOINTS, each one shoulder, leg and feet
+LEGS = ('rear_left', 'rear_right', 'front_left', 'front_right')
+LEG_JOINTS = np.concatenate((joint_table.REAR_LEGS, joint_table.FRONT_LEGS))
+
+# Front (+1) or rear (-1), left (+1) or right (-1)
+_LEG_ENDS = np.array([-1.0, -1.0, 1.0, 1.0])
+_LEG_SIDES = np.array([1.0, -1.0, 1.0, -1.0])
+
+# Servo degrees per joint degree, the way the poses of the motion controller move the servos: left and right
+# legs mirrored, front and rear shoulders facing each other. A robot assembled otherwise flips signs here.
+DIRECTIONS = np.array([1.0, -1.0, 1.0,
+                       1.0, 1.0, -1.0,
+                       -1.0, -1.0, 1.0,
+                       -1.0, 1.0, -1.0])
+
+
+def _rotations(roll, pitch, yaw):
+    # Body to world rotation matrices, Rz(yaw) Ry(pitch) Rx(roll), one per pose
+    cos_roll, sin_roll = np.cos(roll), np.sin(roll)
+    cos_pitch, sin_pitch = np.cos(pitch), np.sin(pitch)
+    cos_yaw, sin_yaw = np.cos(yaw), np.sin(yaw)
+
+    rotations = np.empty(np.shape(roll) + (3, 3))
+    rotations[..., 0, 0] = cos_yaw * cos_pitch
+    rotations[..., 0, 1] = cos_yaw * sin_pitch * sin_roll - sin_yaw * cos_roll
+    rotations[..., 0, 2] = cos_yaw * sin_pitch * cos_roll + sin_yaw * sin_roll
+    rotations[..., 1, 0] = sin_yaw * cos_pitch
+    rotations[..., 1, 1] = sin_yaw * sin_pitch * sin_roll + cos_yaw * cos_roll
+    rotations[..., 1, 2] = sin_yaw * sin_pitch * cos_roll - cos_yaw * sin_roll
+    rotations[..., 2, 0] = -sin_pitch
+    rotations[..., 2, 1] = cos_pitch * sin_roll
+    rotations[..., 2, 2] = cos_pitch * cos_roll
+
+    return rotations
+
+
+class Kinematics:
+    """
+    Inverse kinematics of the four legs at once. A body pose, or an array of them with the BodyPose fields
+    as last axis, moves the body over feet that stay where the neutral stance put them. Every leg is a
+    shoulder rolling about the body axis then a planar leg and feet, solved in closed form on arrays:
+    thousands of poses cost a few NumPy calls.
+    """
+
+    def __init__(self, rest_angle=None, geometry=SPOTMICRO):
+        self.geometry = geometry
+
+        # Body frame: x forward, y left, z up, from the body center
+        self.shoulders = np.stack((_LEG_ENDS * geometry.body_length / 2,
+                                   _LEG_SIDES * geometry.body_width / 2,
+                                   np.zeros(len(LEGS))), axis=-1)
+
+        # Neutral stance, feet under the legs on the ground at z 0
+        self.feet = self.shoulders + np.stack((np.zeros(len(LEGS)),
+                                               _LEG_SIDES * geometry.shoulder_offset,
+                                               np.zeros(len(LEGS))), axis=-1)
+
+        # Servos at their rest angle hold the neutral stance
+        self.rest_angle = np.full(len(LEG_JOINTS), 90.0) if rest_angle is None else np.asarray(rest_angle, float)
+        self.neutral_angles = self.joint_angles(BodyPose())[0].reshape(len(LEG_JOINTS))
+
+    def feet_positions(self, poses):
+        # Feet relative to their shoulder in the body frame, (..., 4, 3)
+        poses = np.asarray(poses, dtype=np.float64)
+        height, roll, pitch, yaw, x, y = np.moveaxis(poses, -1, 0)
+
+        center = np.stack((x, y, height), axis=-1)
+        rotations = _rotations(roll, pitch, yaw)
+
+        # World to body is the transposed rotation
+        relative = self.feet - center[..., None, :]
+        return np.einsum('...ji,...lj->...li', rotations, relative) - self.shoulders
+
+    def leg_angles(self, feet):
+        """
+        Shoulder, leg and feet angles in radians of feet positions relative to their shoulder, (..., 4, 3),
+        and whether every leg reaches its foot. Shoulders roll about x, 0 with the leg hanging straight down.
+        Legs swing forward from straight down, feet bend back from straight along the leg.
+        """
+        geometry = self.geometry
+        side = _LEG_SIDES
+        foot_x, foot_y, foot_z = feet[..., 0], feet[..., 1], feet[..., 2]
+
+        # Shoulder: the leg plane sits shoulder_offset outwards, the foot is leg_length below in that plane
+        squared_distance = foot_y ** 2 + foot_z ** 2 - geometry.shoulder_offset ** 2
+        reachable = squared_distance > 0
+        leg_length = np.sqrt(np.maximum(squared_distance, 0.0))
+        shoulder = np.arctan2(foot_z, foot_y) - np.arctan2(-leg_length, side * geometry.shoulder_offset)
+        shoulder = (shoulder + np.pi) % (2 * np.pi) - np.pi
+
+        # Leg and feet: two links in the leg plane, from the leg joint to the foot
+        down = leg_length - geometry.shoulder_drop
+        cos_feet = (foot_x ** 2 + down ** 2 - geometry.upper_leg ** 2 - geometry.lower_leg ** 2) / \
+            (2 * geometry.upper_leg * geometry.lower_leg)
+        reachable &= np.abs(cos_feet) <= 1.0
+        feet_angle = np.arccos(np.clip(cos_feet, -1.0, 1.0))
+        leg = np.arctan2(foot_x, down) + np.arctan2(geometry.lower_leg * np.sin(feet_angle),
+                                                    geometry.upper_leg + geometry.lower_leg * np.cos(feet_angle))
+
+        return np.stack((shoulder, leg, feet_angle), axis=-1), reachable.all(axis=-1)
+
+    def joint_angles(self, poses):
+        # (..., 4, 3) radians and (...) reachable of body poses
+        return self.leg_angles(self.feet_positions(poses))
+
+    def servo_angles(self, poses):
+        """
+        Servo degrees of the 12 leg joints, in the order of LEG_JOINTS, and whether each pose is reachable.
+        Unreachable poses still get angles, the legs stretched as far as they go.
+        """
+        angles, reachable = self.joint_angles(poses)
+        angles = angles.reshape(angles.shape[:-2] + (len(LEG_JOINTS),))
+
+        return self.rest_angle + DIRECTIONS * np.degrees(angles - self.neutral_angles), reachable
+
+    def leg_feet(self, angles):
+        # Forward kinematics of leg_angles, feet relative to their shoulder
+        geometry = self.geometry
+        shoulder, leg, feet_angle = np.moveaxis(np.asarray(angles, dtype=np.float64), -1, 0)
+
+        forward = geometry.upper_leg * np.sin(leg) + geometry.lower_leg * np.sin(leg - feet_angle)
+        down = geometry.shoulder_drop + geometry.upper_leg * np.cos(leg) + \
+            geometry.lower_leg * np.cos(leg - feet_angle)
+
+        # Unrolled leg plane, then the shoulder roll
+        lateral = _LEG_SIDES * geometry.shoulder_offset
+        return np.stack((forward,
+                         lateral * np.cos(shoulder) + down * np.sin(shoulder),
+                         lateral * np.sin(shoulder) - down * np.cos(shoulder)), axis=-1)
@@ -1,21 +1,35 @@
 import signal
 import sys
 
-import queue
 import os
-import busio
-from board import SCL, SDA
-from adafruit_pca9685 import PCA9685
-from adafruit_motor import servo
+import numpy as np
 import time
 
 from spotmicroai.utilities.log import Logger
 from spotmicroai.utilities.config import Config
 import spotmicroai.utilities.queues as queues
+import spotmicroai.utilities.status_board as status_board
+import spotmicroai.utilities.trace as trace
 from spotmicroai.utilities.general import General
+from spotmicroai.utilities.latency import LatencyHistogram
+from spotmicroai.hal.hal import load_hal
+from spotmicroai.i2c_bus_controller.i2c_bus import create_i2c_bus_client
+from spotmicroai.motion_controller.pca9685_frame_writer import PCA9685FrameWriter
+from spotmicroai.motion_controller.control_loop import ControlLoop
+import spotmicroai.motion_controller.joint_table as joint_table
+import spotmicroai.motion_controller.kinematics as kinematics
+from spotmicroai.motion_controller.pose_cache import PoseCache
 
 log = Logger().setup_logger('Motion controller')
 
+CONTROL_LOOP_FREQUENCY = 100
+CONTROL_LOOP_STATISTICS_INTERVAL = 60
+INACTIVITY_TIMEOUT = 60
+
+# Analog body moves: lowest shoulder height in millimeters, and how far the body shifts sideways
+BODY_LOWEST_HEIGHT = 120.0
+BODY_LATERAL_SHIFT = 40.0
+
 
 class MotionController:
     boards = 1
@@ -26,6 +40,9 @@ class MotionController:
     pca9685_1 = None
     pca9685_2 = None
 
+    pca9685_1_frame_writer = None
+    pca9685_2_frame_writer = None
+
     pca9685_1_address = None
     pca9685_1_reference_clock_speed = None
     pca9685_1_frequency = None
@@ -33,117 +50,17 @@ class MotionController:
     pca9685_2_reference_clock_speed = None
     pca9685_2_frequency = None
 
-    servo_rear_shoulder_left = None
-    servo_rear_shoulder_left_pca9685 = None
-    servo_rear_shoulder_left_channel = None
-    servo_rear_shoulder_left_min_pulse = None
-    servo_rear_shoulder_left_max_pulse = None
-    servo_rear_shoulder_left_rest_angle = None
-
-    servo_rear_leg_left = None
-    servo_rear_leg_left_pca9685 = None
-    servo_rear_leg_left_channel = None
-    servo_rear_leg_left_min_pulse = None
-    servo_rear_leg_left_max_pulse = None
-    servo_rear_leg_left_rest_angle = None
-
-    servo_rear_feet_left = None
-    servo_rear_feet_left_pca9685 = None
-    servo_rear_feet_left_channel = None
-    servo_rear_feet_left_min_pulse = None
-    servo_rear_feet_left_max_pulse = None
-    servo_rear_feet_left_rest_angle = None
-
-    servo_rear_shoulder_right = None
-    servo_rear_shoulder_right_pca9685 = None
-    servo_rear_shoulder_right_channel = None
-    servo_rear_shoulder_right_min_pulse = None
-    servo_rear_shoulder_right_max_pulse = None
-    servo_rear_shoulder_right_rest_angle = None
-
-    servo_rear_leg_right = None
-    servo_rear_leg_right_pca9685 = None
-    servo_rear_leg_right_channel = None
-    servo_rear_leg_right_min_pulse = None
-    servo_rear_leg_right_max_pulse = None
-    servo_rear_leg_right_rest_angle = None
-
-    servo_rear_feet_right = None
-    servo_rear_feet_right_pca9685 = None
-    servo_rear_feet_right_channel = None
-    servo_rear_feet_right_min_pulse = None
-    servo_rear_feet_right_max_pulse = None
-    servo_rear_feet_right_rest_angle = None
-
-    servo_front_shoulder_left = None
-    servo_front_shoulder_left_pca9685 = None
-    servo_front_shoulder_left_channel = None
-    servo_front_shoulder_left_min_pulse = None
-    servo_front_shoulder_left_max_pulse = None
-    servo_front_shoulder_left_rest_angle = None
-
-    servo_front_leg_left = None
-    servo_front_leg_left_pca9685 = None
-    servo_front_leg_left_channel = None
-    servo_front_leg_left_min_pulse = None
-    servo_front_leg_left_max_pulse = None
-    servo_front_leg_left_rest_angle = None
-
-    servo_front_feet_left = None
-    servo_front_feet_left_pca9685 = None
-    servo_front_feet_left_channel = None
-    servo_front_feet_left_min_pulse = None
-    servo_front_feet_left_max_pulse = None
-    servo_front_feet_left_rest_angle = None
-
-    servo_front_shoulder_right = None
-    servo_front_shoulder_right_pca9685 = None
-    servo_front_shoulder_right_channel = None
-    servo_front_shoulder_right_min_pulse = None
-    servo_front_shoulder_right_max_pulse = None
-    servo_front_shoulder_right_rest_angle = None
-
-    servo_front_leg_right = None
-    servo_front_leg_right_pca9685 = None
-    servo_front_leg_right_channel = None
-    servo_front_leg_right_min_pulse = None
-    servo_front_leg_right_max_pulse = None
-    servo_front_leg_right_rest_angle = None
-
-    servo_front_feet_right = None
-    servo_front_feet_right_pca9685 = None
-    servo_front_feet_right_channel = None
-    servo_front_feet_right_min_pulse = None
-    servo_front_feet_right_max_pulse = None
-    servo_front_feet_right_rest_angle = None
-
-    servo_arm_rotation = None
-    servo_arm_rotation_pca9685 = None
-    servo_arm_rotation_channel = None
-    servo_arm_rotation_min_pulse = None
-    servo_arm_rotation_max_pulse = None
-    servo_arm_rotation_rest_angle = None
-
-    servo_arm_lift = None
-    servo_arm_lift_pca9685 = None
-    servo_arm_lift_channel = None
-    servo_arm_lift_min_pulse = None
-    servo_arm_lift_max_pulse = None
-    servo_arm_lift_rest_angle = None
-
-    servo_arm_range = None
-    servo_arm_range_pca9685 = None
-    servo_arm_range_channel = None
-    servo_arm_range_min_pulse = None
-    servo_arm_range_max_pulse = None
-    servo_arm_range_rest_angle = None
-
-    servo_arm_cam_tilt = None
-    servo_arm_cam_tilt_pca9685 = None
-    servo_arm_cam_tilt_channel = None
-    servo_arm_cam_tilt_min_pulse = None
-    servo_arm_cam_tilt_max_pulse = None
-    servo_arm_cam_tilt_rest_angle = None
+    joints = None
+
+    body_kinematics = None
+    pose_cache = None
+    body_pose = kinematics.BodyPose()
+
+    # When the remote controller read the joystick events behind the newest state applied
+    last_input_time = 0.0
+
+    # Problems in the control loop since the last statistics, only the first one is logged in full
+    loop_errors = 0
 
     def __init__(self, communication_queues):
 
@@ -151,30 +68,53 @@ class MotionController:
 
             log.debug('Starting controller...')
 
+            # Before anything that can fail, the handler below reports to it
+            self._status_board = communication_queues[queues.STATUS_BOARD]
+
             signal.signal(signal.SIGINT, self.exit_gracefully)
             signal.signal(signal.SIGTERM, self.exit_gracefully)
 
-            self.i2c = busio.I2C(SCL, SDA)
+            self._hal = load_hal()
+            # Servo frames go first on the bus when the I2C bus controller owns it
+            self.i2c = create_i2c_bus_client(communication_queues, queues.MOTION_CONTROLLER) or self._hal.i2c()
+            self.joints = joint_table.JointTable()
             self.load_pca9685_boards_configuration()
             self.load_servos_configuration()
 
+            # Body poses solved for the leg joints, the rest angles holding the neutral stance
+            self.body_kinematics = kinematics.Kinematics(self.joints.rest_angle[kinematics.LEG_JOINTS])
+            # The sticks come back to the same few positions, so do their poses
+            self.pose_cache = PoseCache(self.body_kinematics, **Config().motion_controller.pose_cache._asdict())
+
             self._abort_queue = communication_queues[queues.ABORT_CONTROLLER]
-            self._motion_queue = communication_queues[queues.MOTION_CONTROLLER]
-            self._lcd_screen_queue = communication_queues[queues.LCD_SCREEN_CONTROLLER]
+            self._abort_signal = communication_queues[queues.ABORT_SIGNAL]
+            self._heartbeat = communication_queues[queues.MOTION_HEARTBEAT]
+            self._motion_mailbox = communication_queues[queues.MOTION_CONTROLLER]
 
+            self._status_board.set(status_board.MOTION_CONTROLLER_1, status_board.STATUS_OK)
             if self.pca9685_2_address:
-                self._lcd_screen_queue.put('motion_controller_1 OK')
-                self._lcd_screen_queue.put('motion_controller_2 OK')
+                self._status_board.set(status_board.MOTION_CONTROLLER_2, status_board.STATUS_OK)
             else:
-                self._lcd_screen_queue.put('motion_controller_1 OK')
-                self._lcd_screen_queue.put('motion_controller_2 NOK')
+                self._status_board.set(status_board.MOTION_CONTROLLER_2, status_board.STATUS_NOK)
 
             self._previous_event = {}
+            self._scheduled_steps = []
+
+            control_loop_frequency = Config().motion_controller.control_loop_frequency or CONTROL_LOOP_FREQUENCY
+            control_loop_statistics_interval = Config().motion_controller.control_loop_statistics_interval or CONTROL_LOOP_STATISTICS_INTERVAL
+            self._control_loop = ControlLoop(int(control_loop_frequency), int(control_loop_statistics_interval))
+            self.schedule(self._control_loop.statistics_interval, self.log_statistics)
+
+            # Joystick events read by the remote controller to the first register write they cause
+            self.input_latency = LatencyHistogram()
+            self._input_pending = False
+
+            self._tracer = trace.create_tracer(communication_queues, trace.MOTION_CONTROLLER)
 
         except Exception as e:
             log.error('Motion controller initialization problem', e)
-            self._lcd_screen_queue.put('motion_controller_1 NOK')
-            self._lcd_screen_queue.put('motion_controller_2 NOK')
+            self._status_board.set(status_board.MOTION_CONTROLLER_1, status_board.STATUS_NOK)
+            self._status_board.set(status_board.MOTION_CONTROLLER_2, status_board.STATUS_NOK)
             try:
                 self.pca9685_1.deinit()
             finally:
@@ -197,110 +137,200 @@ class MotionController:
 
     def do_process_events_from_queues(self):
 
+        last_event_time = time.monotonic()
+        inactivity_handled = False
+        tracer = self._tracer
+
         while True:
 
-            try:
+            now = self._control_loop.wait_for_next_tick()
+
+            # Every tick, a loop stuck anywhere below stops beating and the abort controller cuts the servos
+            self._heartbeat.beat(now, self._control_loop.last_loop_time, self._control_loop.last_jitter)
 
-                event = self._motion_queue.get(block=True, timeout=60)
+            if tracer:
+                tracer.begin()
 
-                # log.debug(event)
+            try:
 
-                if event['start']:
+                event = self._motion_mailbox.read_newer()
+                if tracer:
+                    tracer.lap(trace.MOTION_MAILBOX_READ)
+
+                if event:
+                    last_event_time = now
+                    inactivity_handled = False
+                    self.last_input_time = self._motion_mailbox.event_time
+                    self._input_pending = True
+                    self.process_event(event)
+                    if tracer:
+                        tracer.lap(trace.MOTION_PROCESS_EVENT)
+
+                elif not inactivity_handled and now - last_event_time >= INACTIVITY_TIMEOUT:
+                    inactivity_handled = True
+                    log.info('Inactivity lasted 60 seconds, shutting down the servos, '
+                             'press start to reactivate')
                     if self.is_activated:
                         self.rest_position()
-                        time.sleep(0.5)
-                        self.deactivate_pca9685_boards()
-                        self._abort_queue.put(queues.ABORT_CONTROLLER_ACTION_ABORT)
-                    else:
-                        self._abort_queue.put(queues.ABORT_CONTROLLER_ACTION_ACTIVATE)
-                        self.activate_pca9685_boards()
-                        self.activate_servos()
-                        self.rest_position()
+                        self.schedule(0.5, self.deactivate_pca9685_boards)
 
-                if not self.is_activated:
-                    log.info('Press START/OPTIONS to enable the servos')
-                    continue
+                self.run_scheduled_steps(now)
+                if tracer:
+                    tracer.lap(trace.MOTION_SCHEDULED_STEPS)
 
-                if event['a']:
-                    self.rest_position()
+                if self.is_activated:
+                    self.move()
 
-                if event['hat0y']:
-                    self.body_move_body_up_and_down(event['hat0y'])
+                if tracer:
+                    # Tagged with the mailbox sequence of the joystick state applied this tick
+                    tracer.commit(self._motion_mailbox.sequence if event else 0)
 
-                if event['hat0x']:
-                    self.body_move_body_left_right(event['hat0x'])
+            except Exception as e:
+                # A fault that persists would fail every tick, the rest are counted in the statistics
+                if not self.loop_errors:
+                    log.error('Unknown problem while processing the queue of the motion controller: ' + repr(e))
+                    log.error(' - Most likely a servo is not able to get to the assigned position')
+                self.loop_errors += 1
+
+    def process_event(self, event):
+
+        # log.debug(event)
+
+        if event['start']:
+            if self.is_activated:
+                self.rest_position()
+                self.schedule(0.5, self.deactivate_pca9685_boards)
+                self.schedule(0.5, self._abort_signal.trip)
+                return
+            else:
+                # With the trips seen so far, an abort tripped meanwhile keeps the servos cut
+                self._abort_queue.put((queues.ABORT_CONTROLLER_ACTION_ACTIVATE, self._abort_signal.trips()))
+                self.activate_pca9685_boards()
+                self.activate_servos()
+                self.rest_position()
 
-                if event['ry']:
-                    self.body_move_body_up_and_down_analog(event['ry'])
+        if not self.is_activated:
+            log.info('Press START/OPTIONS to enable the servos')
+            return
 
-                if event['rx']:
-                    self.body_move_body_left_right_analog(event['rx'])
+        if event['a']:
+            self.rest_position()
 
-                if event['hat0x'] and event['tl2']:
-                    # 2 buttons example
-                    pass
+        if event['hat0y']:
+            self.body_move_body_up_and_down(event['hat0y'])
 
-                if event['y']:
-                    self.standing_position()
+        if event['hat0x']:
+            self.body_move_body_left_right(event['hat0x'])
 
-                if event['b']:
-                    self.body_move_position_right()
+        if event['ry']:
+            self.body_move_body_up_and_down_analog(event['ry'])
 
-                if event['x']:
-                    self.body_move_position_left()
+        if event['rx']:
+            self.body_move_body_left_right_analog(event['rx'])
 
-                if event['tl']:
-                    self.arm_set_rotation(event['lx'])
+        if event['hat0x'] and event['tl2']:
+            # 2 buttons example
+            pass
 
-                if event['tl']:
-                    self.arm_set_lift(event['ly'])
+        if event['y']:
+            self.standing_position()
 
-                if event['tr']:
-                    self.arm_set_range(event['ly'])
+        if event['b']:
+            self.body_move_position_right()
 
-                if event['tr']:
-                    self.arm_set_cam_tilt(event['ry'])
+        if event['x']:
+            self.body_move_position_left()
 
-                self.move()
+        if event['tl']:
+            self.arm_set_rotation(event['lx'])
 
-            except queue.Empty as e:
-                log.info('Inactivity lasted 60 seconds, shutting down the servos, '
-                         'press start to reactivate')
-                if self.is_activated:
-                    self.rest_position()
-                    time.sleep(0.5)
-                    self.deactivate_pca9685_boards()
+        if event['tl']:
+            self.arm_set_lift(event['ly'])
 
-            except Exception as e:
-                log.error('Unknown problem while processing the queue of the motion controller')
-                log.error(' - Most likely a servo is not able to get to the assigned position')
+        if event['tr']:
+            self.arm_set_range(event['ly'])
 
-    def load_pca9685_boards_configuration(self):
-        self.pca9685_1_address = int(Config().get(Config.MOTION_CONTROLLER_BOARDS_PCA9685_1_ADDRESS), 0)
-        self.pca9685_1_reference_clock_speed = int(Config().get(Config.MOTION_CONTROLLER_BOARDS_PCA9685_1_REFERENCE_CLOCK_SPEED))
-        self.pca9685_1_frequency = int(Config().get(Config.MOTION_CONTROLLER_BOARDS_PCA9685_1_FREQUENCY))
+        if event['tr']:
+            self.arm_set_cam_tilt(event['ry'])
 
-        self.pca9685_2_address = False
-        try:
-            self.pca9685_2_address = int(Config().get(Config.MOTION_CONTROLLER_BOARDS_PCA9685_2_ADDRESS), 0)
+    def schedule(self, delay, step, *args):
 
-            if self.pca9685_2_address:
-                self.pca9685_2_reference_clock_speed = int(Config().get(Config.MOTION_CONTROLLER_BOARDS_PCA9685_2_REFERENCE_CLOCK_SPEED))
-                self.pca9685_2_frequency = int(Config().get(Config.MOTION_CONTROLLER_BOARDS_PCA9685_2_FREQUENCY))
+        # Delayed steps run from the control loop instead of sleeping inside it
+        self._scheduled_steps.append((time.monotonic() + delay, step, args))
 
-        except Exception as e:
+    def run_scheduled_steps(self, now):
+
+        due_steps = [scheduled_step for scheduled_step in self._scheduled_steps if scheduled_step[0] <= now]
+
+        for scheduled_step in due_steps:
+            self._scheduled_steps.remove(scheduled_step)
+            due, step, args = scheduled_step
+            step(*args)
+
+    def control_loop_statistics(self):
+
+        statistics = self._control_loop.statistics()
+        statistics['frame_writer'] = self.frame_writer_statistics()
+        statistics['input_latency'] = self.input_latency.summary()
+        statistics['pose_cache'] = self.pose_cache.statistics()
+
+        return statistics
+
+    def log_statistics(self):
+
+        # Loop timing is logged by the control loop itself, at the same interval
+        statistics = self.control_loop_statistics()
+
+        if self.loop_errors:
+            log.error(str(self.loop_errors) + ' problems in the control loop in the last ' +
+                      str(self._control_loop.statistics_interval) + ' seconds')
+            self.loop_errors = 0
+
+        frame_writer = statistics['frame_writer']
+        log.info('Frame writer: ' + str(frame_writer['transactions']) + ' transactions, ' +
+                 str(frame_writer['writes_issued']) + ' channel writes issued, ' +
+                 str(frame_writer['writes_skipped']) + ' skipped')
+
+        input_latency = statistics['input_latency']
+        if input_latency['count']:
+            log.info('Input latency: ' + str(input_latency['count']) + ' events, p50/p95/p99/max ' +
+                     str(input_latency['p50_ms']) + '/' + str(input_latency['p95_ms']) + '/' +
+                     str(input_latency['p99_ms']) + '/' + str(input_latency['max_ms']) + ' ms')
+
+        pose_cache = statistics['pose_cache']
+        if pose_cache['hits'] or pose_cache['misses']:
+            log.info('Pose cache: ' + str(pose_cache['entries']) + '/' + str(pose_cache['size']) + ' entries, ' +
+                     str(pose_cache['hits']) + ' hits, ' + str(pose_cache['misses']) + ' misses, ' +
+                     str(pose_cache['evictions']) + ' evictions, hit ratio ' + str(pose_cache['hit_ratio']))
+
+        self.schedule(self._control_loop.statistics_interval, self.log_statistics)
+
+    def load_pca9685_boards_configuration(self):
+        boards = Config().boards
+
+        self.pca9685_1_address = boards[1].address
+        self.pca9685_1_reference_clock_speed = boards[1].reference_clock_speed
+        self.pca9685_1_frequency = boards[1].frequency
+
+        self.pca9685_2_address = False
+        if 2 in boards:
+            self.pca9685_2_address = boards[2].address
+            self.pca9685_2_reference_clock_speed = boards[2].reference_clock_speed
+            self.pca9685_2_frequency = boards[2].frequency
+        else:
             log.debug("Only 1 PCA9685 is present in the configuration")
 
     def activate_pca9685_boards(self):
 
-        self.pca9685_1 = PCA9685(self.i2c, address=self.pca9685_1_address,
-                                 reference_clock_speed=self.pca9685_1_reference_clock_speed)
+        self.pca9685_1 = self._hal.pca9685(self.i2c, self.pca9685_1_address, self.pca9685_1_reference_clock_speed)
         self.pca9685_1.frequency = self.pca9685_1_frequency
+        self.pca9685_1_frame_writer = PCA9685FrameWriter(self.pca9685_1)
 
         if self.pca9685_2_address:
-            self.pca9685_2 = PCA9685(self.i2c, address=self.pca9685_2_address,
-                                     reference_clock_speed=self.pca9685_2_reference_clock_speed)
+            self.pca9685_2 = self._hal.pca9685(self.i2c, self.pca9685_2_address,
+                                               self.pca9685_2_reference_clock_speed)
             self.pca9685_2.frequency = self.pca9685_2_frequency
+            self.pca9685_2_frame_writer = PCA9685FrameWriter(self.pca9685_2)
             self.boards = 2
 
         self.is_activated = True
@@ -317,495 +347,177 @@ class MotionController:
                     self.pca9685_2.deinit()
             finally:
                 # self._abort_queue.put(queues.ABORT_CONTROLLER_ACTION_ABORT)
+                self.pca9685_1_frame_writer = None
+                self.pca9685_2_frame_writer = None
                 self.is_activated = False
 
         log.debug(str(self.boards) + ' PCA9685 board(s) deactivated')
 
     def load_servos_configuration(self):
 
-        self.servo_rear_shoulder_left_pca9685 = Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_SHOULDER_LEFT_PCA9685)
-        self.servo_rear_shoulder_left_channel = Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_SHOULDER_LEFT_CHANNEL)
-        self.servo_rear_shoulder_left_min_pulse = Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_SHOULDER_LEFT_MIN_PULSE)
-        self.servo_rear_shoulder_left_max_pulse = Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_SHOULDER_LEFT_MAX_PULSE)
-        self.servo_rear_shoulder_left_rest_angle = Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_SHOULDER_LEFT_REST_ANGLE)
-
-        self.servo_rear_leg_left_pca9685 = Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_LEG_LEFT_PCA9685)
-        self.servo_rear_leg_left_channel = Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_LEG_LEFT_CHANNEL)
-        self.servo_rear_leg_left_min_pulse = Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_LEG_LEFT_MIN_PULSE)
-        self.servo_rear_leg_left_max_pulse = Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_LEG_LEFT_MAX_PULSE)
-        self.servo_rear_leg_left_rest_angle = Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_LEG_LEFT_REST_ANGLE)
-
-        self.servo_rear_feet_left_pca9685 = Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_FEET_LEFT_PCA9685)
-        self.servo_rear_feet_left_channel = Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_FEET_LEFT_CHANNEL)
-        self.servo_rear_feet_left_min_pulse = Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_FEET_LEFT_MIN_PULSE)
-        self.servo_rear_feet_left_max_pulse = Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_FEET_LEFT_MAX_PULSE)
-        self.servo_rear_feet_left_rest_angle = Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_FEET_LEFT_REST_ANGLE)
-
-        self.servo_rear_shoulder_right_pca9685 = Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_SHOULDER_RIGHT_PCA9685)
-        self.servo_rear_shoulder_right_channel = Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_SHOULDER_RIGHT_CHANNEL)
-        self.servo_rear_shoulder_right_min_pulse = Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_SHOULDER_RIGHT_MIN_PULSE)
-        self.servo_rear_shoulder_right_max_pulse = Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_SHOULDER_RIGHT_MAX_PULSE)
-        self.servo_rear_shoulder_right_rest_angle = Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_SHOULDER_RIGHT_REST_ANGLE)
-
-        self.servo_rear_leg_right_pca9685 = Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_LEG_RIGHT_PCA9685)
-        self.servo_rear_leg_right_channel = Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_LEG_RIGHT_CHANNEL)
-        self.servo_rear_leg_right_min_pulse = Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_LEG_RIGHT_MIN_PULSE)
-        self.servo_rear_leg_right_max_pulse = Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_LEG_RIGHT_MAX_PULSE)
-        self.servo_rear_leg_right_rest_angle = Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_LEG_RIGHT_REST_ANGLE)
-
-        self.servo_rear_feet_right_pca9685 = Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_FEET_RIGHT_PCA9685)
-        self.servo_rear_feet_right_channel = Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_FEET_RIGHT_CHANNEL)
-        self.servo_rear_feet_right_min_pulse = Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_FEET_RIGHT_MIN_PULSE)
-        self.servo_rear_feet_right_max_pulse = Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_FEET_RIGHT_MAX_PULSE)
-        self.servo_rear_feet_right_rest_angle = Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_FEET_RIGHT_REST_ANGLE)
-
-        self.servo_front_shoulder_left_pca9685 = Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_SHOULDER_LEFT_PCA9685)
-        self.servo_front_shoulder_left_channel = Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_SHOULDER_LEFT_CHANNEL)
-        self.servo_front_shoulder_left_min_pulse = Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_SHOULDER_LEFT_MIN_PULSE)
-        self.servo_front_shoulder_left_max_pulse = Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_SHOULDER_LEFT_MAX_PULSE)
-        self.servo_front_shoulder_left_rest_angle = Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_SHOULDER_LEFT_REST_ANGLE)
-
-        self.servo_front_leg_left_pca9685 = Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_LEG_LEFT_PCA9685)
-        self.servo_front_leg_left_channel = Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_LEG_LEFT_CHANNEL)
-        self.servo_front_leg_left_min_pulse = Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_LEG_LEFT_MIN_PULSE)
-        self.servo_front_leg_left_max_pulse = Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_LEG_LEFT_MAX_PULSE)
-        self.servo_front_leg_left_rest_angle = Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_LEG_LEFT_REST_ANGLE)
-
-        self.servo_front_feet_left_pca9685 = Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_FEET_LEFT_PCA9685)
-        self.servo_front_feet_left_channel = Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_FEET_LEFT_CHANNEL)
-        self.servo_front_feet_left_min_pulse = Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_FEET_LEFT_MIN_PULSE)
-        self.servo_front_feet_left_max_pulse = Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_FEET_LEFT_MAX_PULSE)
-        self.servo_front_feet_left_rest_angle = Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_FEET_LEFT_REST_ANGLE)
-
-        self.servo_front_shoulder_right_pca9685 = Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_SHOULDER_RIGHT_PCA9685)
-        self.servo_front_shoulder_right_channel = Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_SHOULDER_RIGHT_CHANNEL)
-        self.servo_front_shoulder_right_min_pulse = Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_SHOULDER_RIGHT_MIN_PULSE)
-        self.servo_front_shoulder_right_max_pulse = Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_SHOULDER_RIGHT_MAX_PULSE)
-        self.servo_front_shoulder_right_rest_angle = Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_SHOULDER_RIGHT_REST_ANGLE)
-
-        self.servo_front_leg_right_pca9685 = Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_LEG_RIGHT_PCA9685)
-        self.servo_front_leg_right_channel = Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_LEG_RIGHT_CHANNEL)
-        self.servo_front_leg_right_min_pulse = Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_LEG_RIGHT_MIN_PULSE)
-        self.servo_front_leg_right_max_pulse = Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_LEG_RIGHT_MAX_PULSE)
-        self.servo_front_leg_right_rest_angle = Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_LEG_RIGHT_REST_ANGLE)
-
-        self.servo_front_feet_right_pca9685 = Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_FEET_RIGHT_PCA9685)
-        self.servo_front_feet_right_channel = Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_FEET_RIGHT_CHANNEL)
-        self.servo_front_feet_right_min_pulse = Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_FEET_RIGHT_MIN_PULSE)
-        self.servo_front_feet_right_max_pulse = Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_FEET_RIGHT_MAX_PULSE)
-        self.servo_front_feet_right_rest_angle = Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_FEET_RIGHT_REST_ANGLE)
-
-        self.servo_arm_rotation_pca9685 = Config().get(Config.ARM_CONTROLLER_SERVOS_ARM_ROTATION_PCA9685)
-        self.servo_arm_rotation_channel = Config().get(Config.ARM_CONTROLLER_SERVOS_ARM_ROTATION_CHANNEL)
-        self.servo_arm_rotation_min_pulse = Config().get(Config.ARM_CONTROLLER_SERVOS_ARM_ROTATION_MIN_PULSE)
-        self.servo_arm_rotation_max_pulse = Config().get(Config.ARM_CONTROLLER_SERVOS_ARM_ROTATION_MAX_PULSE)
-        self.servo_arm_rotation_rest_angle = Config().get(Config.MOTION_CONTROLLER_SERVOS_ARM_ROTATION_REST_ANGLE)
-
-        self.servo_arm_lift_pca9685 = Config().get(Config.ARM_CONTROLLER_SERVOS_ARM_LIFT_PCA9685)
-        self.servo_arm_lift_channel = Config().get(Config.ARM_CONTROLLER_SERVOS_ARM_LIFT_CHANNEL)
-        self.servo_arm_lift_min_pulse = Config().get(Config.ARM_CONTROLLER_SERVOS_ARM_LIFT_MIN_PULSE)
-        self.servo_arm_lift_max_pulse = Config().get(Config.ARM_CONTROLLER_SERVOS_ARM_LIFT_MAX_PULSE)
-        self.servo_arm_lift_rest_angle = Config().get(Config.MOTION_CONTROLLER_SERVOS_ARM_LIFT_REST_ANGLE)
-
-        self.servo_arm_range_pca9685 = Config().get(Config.ARM_CONTROLLER_SERVOS_ARM_RANGE_PCA9685)
-        self.servo_arm_range_channel = Config().get(Config.ARM_CONTROLLER_SERVOS_ARM_RANGE_CHANNEL)
-        self.servo_arm_range_min_pulse = Config().get(Config.ARM_CONTROLLER_SERVOS_ARM_RANGE_MIN_PULSE)
-        self.servo_arm_range_max_pulse = Config().get(Config.ARM_CONTROLLER_SERVOS_ARM_RANGE_MAX_PULSE)
-        self.servo_arm_range_rest_angle = Config().get(Config.MOTION_CONTROLLER_SERVOS_ARM_RANGE_REST_ANGLE)
-
-        self.servo_arm_cam_tilt_pca9685 = Config().get(Config.ARM_CONTROLLER_SERVOS_ARM_CAM_TILT_PCA9685)
-        self.servo_arm_cam_tilt_channel = Config().get(Config.ARM_CONTROLLER_SERVOS_ARM_CAM_TILT_CHANNEL)
-        self.servo_arm_cam_tilt_min_pulse = Config().get(Config.ARM_CONTROLLER_SERVOS_ARM_CAM_TILT_MIN_PULSE)
-        self.servo_arm_cam_tilt_max_pulse = Config().get(Config.ARM_CONTROLLER_SERVOS_ARM_CAM_TILT_MAX_PULSE)
-        self.servo_arm_cam_tilt_rest_angle = Config().get(Config.MOTION_CONTROLLER_SERVOS_ARM_CAM_TILT_REST_ANGLE)
+        servos = Config().servos
 
-    def activate_servos(self):
-
-        if self.servo_rear_shoulder_left_pca9685 == 1:
-            self.servo_rear_shoulder_left = servo.Servo(self.pca9685_1.channels[self.servo_rear_shoulder_left_channel])
-        else:
-            self.servo_rear_shoulder_left = servo.Servo(self.pca9685_2.channels[self.servo_rear_shoulder_left_channel])
-        self.servo_rear_shoulder_left.set_pulse_width_range(min_pulse=self.servo_rear_shoulder_left_min_pulse, max_pulse=self.servo_rear_shoulder_left_max_pulse)
-
-        if self.servo_rear_leg_left_pca9685 == 1:
-            self.servo_rear_leg_left = servo.Servo(self.pca9685_1.channels[self.servo_rear_leg_left_channel])
-        else:
-            self.servo_rear_leg_left = servo.Servo(self.pca9685_2.channels[self.servo_rear_leg_left_channel])
-        self.servo_rear_leg_left.set_pulse_width_range(min_pulse=self.servo_rear_leg_left_min_pulse, max_pulse=self.servo_rear_leg_left_max_pulse)
-
-        if self.servo_rear_feet_left_pca9685 == 1:
-            self.servo_rear_feet_left = servo.Servo(self.pca9685_1.channels[self.servo_rear_feet_left_channel])
-        else:
-            self.servo_rear_feet_left = servo.Servo(self.pca9685_2.channels[self.servo_rear_feet_left_channel])
-        self.servo_rear_feet_left.set_pulse_width_range(min_pulse=self.servo_rear_feet_left_min_pulse, max_pulse=self.servo_rear_feet_left_max_pulse)
-
-        if self.servo_rear_shoulder_right_pca9685 == 1:
-            self.servo_rear_shoulder_right = servo.Servo(self.pca9685_1.channels[self.servo_rear_shoulder_right_channel])
-        else:
-            self.servo_rear_shoulder_right = servo.Servo(self.pca9685_2.channels[self.servo_rear_shoulder_right_channel])
-        self.servo_rear_shoulder_right.set_pulse_width_range(min_pulse=self.servo_rear_shoulder_right_min_pulse, max_pulse=self.servo_rear_shoulder_right_max_pulse)
-
-        if self.servo_rear_leg_right_pca9685 == 1:
-            self.servo_rear_leg_right = servo.Servo(self.pca9685_1.channels[self.servo_rear_leg_right_channel])
-        else:
-            self.servo_rear_leg_right = servo.Servo(self.pca9685_2.channels[self.servo_rear_leg_right_channel])
-        self.servo_rear_leg_right.set_pulse_width_range(min_pulse=self.servo_rear_leg_right_min_pulse, max_pulse=self.servo_rear_leg_right_max_pulse)
-
-        if self.servo_rear_feet_right_pca9685 == 1:
-            self.servo_rear_feet_right = servo.Servo(self.pca9685_1.channels[self.servo_rear_feet_right_channel])
-        else:
-            self.servo_rear_feet_right = servo.Servo(self.pca9685_2.channels[self.servo_rear_feet_right_channel])
-        self.servo_rear_feet_right.set_pulse_width_range(min_pulse=self.servo_rear_feet_right_min_pulse, max_pulse=self.servo_rear_feet_right_max_pulse)
-
-        if self.servo_front_shoulder_left_pca9685 == 1:
-            self.servo_front_shoulder_left = servo.Servo(self.pca9685_1.channels[self.servo_front_shoulder_left_channel])
-        else:
-            self.servo_front_shoulder_left = servo.Servo(self.pca9685_2.channels[self.servo_front_shoulder_left_channel])
-        self.servo_front_shoulder_left.set_pulse_width_range(min_pulse=self.servo_front_shoulder_left_min_pulse, max_pulse=self.servo_front_shoulder_left_max_pulse)
+        for joint, joint_name in enumerate(joint_table.JOINTS):
+            servo = servos[joint_name]
+            self.joints.set_joint(joint, servo.pca9685, servo.channel, servo.min_pulse, servo.max_pulse,
+                                  servo.rest_angle, servo.min_angle, servo.max_angle)
 
-        if self.servo_front_leg_left_pca9685 == 1:
-            self.servo_front_leg_left = servo.Servo(self.pca9685_1.channels[self.servo_front_leg_left_channel])
-        else:
-            self.servo_front_leg_left = servo.Servo(self.pca9685_2.channels[self.servo_front_leg_left_channel])
-        self.servo_front_leg_left.set_pulse_width_range(min_pulse=self.servo_front_leg_left_min_pulse, max_pulse=self.servo_front_leg_left_max_pulse)
-
-        if self.servo_front_feet_left_pca9685 == 1:
-            self.servo_front_feet_left = servo.Servo(self.pca9685_1.channels[self.servo_front_feet_left_channel])
-        else:
-            self.servo_front_feet_left = servo.Servo(self.pca9685_2.channels[self.servo_front_feet_left_channel])
-        self.servo_front_feet_left.set_pulse_width_range(min_pulse=self.servo_front_feet_left_min_pulse, max_pulse=self.servo_front_feet_left_max_pulse)
-
-        if self.servo_front_shoulder_right_pca9685 == 1:
-            self.servo_front_shoulder_right = servo.Servo(self.pca9685_1.channels[self.servo_front_shoulder_right_channel])
-        else:
-            self.servo_front_shoulder_right = servo.Servo(
-                self.pca9685_2.channels[self.servo_front_shoulder_right_channel])
-        self.servo_front_shoulder_right.set_pulse_width_range(min_pulse=self.servo_front_shoulder_right_min_pulse, max_pulse=self.servo_front_shoulder_right_max_pulse)
-
-        if self.servo_front_leg_right_pca9685 == 1:
-            self.servo_front_leg_right = servo.Servo(self.pca9685_1.channels[self.servo_front_leg_right_channel])
-        else:
-            self.servo_front_leg_right = servo.Servo(
-                self.pca9685_2.channels[self.servo_front_leg_right_channel])
-        self.servo_front_leg_right.set_pulse_width_range(min_pulse=self.servo_front_leg_right_min_pulse, max_pulse=self.servo_front_leg_right_max_pulse)
-
-        if self.servo_front_feet_right_pca9685 == 1:
-            self.servo_front_feet_right = servo.Servo(self.pca9685_1.channels[self.servo_front_feet_right_channel])
-        else:
-            self.servo_front_feet_right = servo.Servo(self.pca9685_2.channels[self.servo_front_feet_right_channel])
-        self.servo_front_feet_right.set_pulse_width_range(min_pulse=self.servo_front_feet_right_min_pulse, max_pulse=self.servo_front_feet_right_max_pulse)
+    def activate_servos(self):
 
-        if self.servo_arm_rotation_pca9685 == 1:
-            self.servo_arm_rotation = servo.Servo(self.pca9685_1.channels[self.servo_arm_rotation_channel])
-        else:
-            self.servo_arm_rotation = servo.Servo(self.pca9685_2.channels[self.servo_arm_rotation_channel])
-        self.servo_arm_rotation.set_pulse_width_range(min_pulse=self.servo_arm_rotation_min_pulse, max_pulse=self.servo_arm_rotation_max_pulse)
+        self._frame_writers = [(self.pca9685_1_frame_writer, self.joints.joints_of_board(1))]
+        if self.boards == 2:
+            self._frame_writers.append((self.pca9685_2_frame_writer, self.joints.joints_of_board(2)))
 
-        if self.servo_arm_lift_pca9685 == 1:
-            self.servo_arm_lift = servo.Servo(self.pca9685_1.channels[self.servo_arm_lift_channel])
-        else:
-            self.servo_arm_lift = servo.Servo(self.pca9685_2.channels[self.servo_arm_lift_channel])
-        self.servo_arm_lift.set_pulse_width_range(min_pulse=self.servo_arm_lift_min_pulse, max_pulse=self.servo_arm_lift_max_pulse)
+        frequency = np.where(self.joints.board == 1, self.pca9685_1_frame_writer.frequency,
+                             self.pca9685_2_frame_writer.frequency if self.boards == 2 else 0)
+        self.joints.build_ticks_table(frequency)
 
-        if self.servo_arm_range_pca9685 == 1:
-            self.servo_arm_range = servo.Servo(self.pca9685_1.channels[self.servo_arm_range_channel])
-        else:
-            self.servo_arm_range = servo.Servo(self.pca9685_2.channels[self.servo_arm_range_channel])
-        self.servo_arm_range.set_pulse_width_range(min_pulse=self.servo_arm_range_min_pulse, max_pulse=self.servo_arm_range_max_pulse)
-
-        if self.servo_arm_cam_tilt_pca9685 == 1:
-            self.servo_arm_cam_tilt = servo.Servo(self.pca9685_1.channels[self.servo_arm_cam_tilt_channel])
-        else:
-            self.servo_arm_cam_tilt = servo.Servo(self.pca9685_2.channels[self.servo_arm_cam_tilt_channel])
-        self.servo_arm_cam_tilt.set_pulse_width_range(min_pulse=self.servo_arm_cam_tilt_min_pulse, max_pulse=self.servo_arm_cam_tilt_max_pulse)
+        self._out_of_range = np.zeros(len(joint_table.JOINTS), dtype=bool)
 
     def move(self):
 
-        try:
-            self.servo_rear_shoulder_left.angle = self.servo_rear_shoulder_left_rest_angle
-        except ValueError as e:
-            log.error('Impossible servo_rear_shoulder_left angle requested')
+        out_of_range = self.joints.out_of_range()
+        if (out_of_range & ~self._out_of_range).any():
+            for joint in np.flatnonzero(out_of_range & ~self._out_of_range):
+                log.error('Impossible servo_' + joint_table.JOINTS[joint] + ' angle requested')
+        self._out_of_range = out_of_range
 
-        try:
-            self.servo_rear_leg_left.angle = self.servo_rear_leg_left_rest_angle
-        except ValueError as e:
-            log.error('Impossible servo_rear_leg_left angle requested')
+        ticks = self.joints.ticks()
+        if self._tracer:
+            self._tracer.lap(trace.MOTION_POSE_TO_TICKS)
 
-        try:
-            self.servo_rear_feet_left.angle = self.servo_rear_feet_left_rest_angle
-        except ValueError as e:
-            log.error('Impossible servo_rear_feet_left angle requested')
+        # Only channels whose ticks changed are written, as auto-increment block writes per board.
+        # Joints asked for an impossible angle keep what they had.
+        transactions = 0
+        for frame_writer, joints in self._frame_writers:
+            joints = joints[~out_of_range[joints]]
+            frame_writer.set_ticks(self.joints.channel[joints].tolist(), ticks[joints].tolist())
+            transactions -= frame_writer.transactions
+            frame_writer.flush()
+            transactions += frame_writer.transactions
 
-        try:
-            self.servo_rear_shoulder_right.angle = self.servo_rear_shoulder_right_rest_angle
-        except ValueError as e:
-            log.error('Impossible servo_rear_shoulder_right angle requested')
+        if self._tracer:
+            self._tracer.lap(trace.MOTION_I2C_WRITE)
 
-        try:
-            self.servo_rear_leg_right.angle = self.servo_rear_leg_right_rest_angle
-        except ValueError as e:
-            log.error('Impossible servo_rear_leg_right angle requested')
+        if transactions and self._input_pending:
+            self._input_pending = False
+            self.input_latency.add(time.monotonic() - self.last_input_time)
 
-        try:
-            self.servo_rear_feet_right.angle = self.servo_rear_feet_right_rest_angle
-        except ValueError as e:
-            log.error('Impossible servo_rear_feet_right angle requested')
+    def frame_writer_statistics(self):
 
-        try:
-            self.servo_front_shoulder_left.angle = self.servo_front_shoulder_left_rest_angle
-        except ValueError as e:
-            log.error('Impossible servo_front_shoulder_left angle requested')
+        statistics = {'writes_issued': 0, 'writes_skipped': 0, 'transactions': 0}
 
-        try:
-            self.servo_front_leg_left.angle = self.servo_front_leg_left_rest_angle
-        except ValueError as e:
-            log.error('Impossible servo_front_leg_left angle requested')
+        for frame_writer in (self.pca9685_1_frame_writer, self.pca9685_2_frame_writer):
+            if frame_writer:
+                for key, value in frame_writer.statistics().items():
+                    statistics[key] += value
 
-        try:
-            self.servo_front_feet_left.angle = self.servo_front_feet_left_rest_angle
-        except ValueError as e:
-            log.error('Impossible servo_front_feet_left angle requested')
-
-        try:
-            self.servo_front_shoulder_right.angle = self.servo_front_shoulder_right_rest_angle
-        except ValueError as e:
-            log.error('Impossible servo_front_shoulder_right angle requested')
-
-        try:
-            self.servo_front_leg_right.angle = self.servo_front_leg_right_rest_angle
-        except ValueError as e:
-            log.error('Impossible servo_front_leg_right angle requested')
-
-        try:
-            self.servo_front_feet_right.angle = self.servo_front_feet_right_rest_angle
-        except ValueError as e:
-            log.error('Impossible servo_front_feet_right angle requested')
+        return statistics
 
-        try:
-            self.servo_arm_rotation.angle = self.servo_arm_rotation_rest_angle
-        except ValueError as e:
-            log.error('Impossible servo_arm_rotation angle requested')
+    def rest_position(self):
 
-        try:
-            self.servo_arm_lift.angle = self.servo_arm_lift_rest_angle
-        except ValueError as e:
-            log.error('Impossible arm_lift angle requested')
+        self.joints.command[:] = self.joints.rest_angle
+        self.body_pose = kinematics.BodyPose()
 
-        try:
-            self.servo_arm_range.angle = self.servo_arm_range_rest_angle
-        except ValueError as e:
-            log.error('Impossible servo_arm_range angle requested')
+    def set_body_pose(self, body_pose):
 
-        try:
-            self.servo_arm_cam_tilt.angle = self.servo_arm_cam_tilt_rest_angle
-        except ValueError as e:
-            log.error('Impossible servo_arm_cam_tilt angle requested')
+        angles, reachable = self.pose_cache.servo_angles(body_pose)
 
-    def rest_position(self):
+        if not reachable:
+            log.error('Body pose out of reach of the legs, keeping the previous one: ' + str(body_pose))
+            return
 
-        self.servo_rear_shoulder_left_rest_angle = Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_SHOULDER_LEFT_REST_ANGLE)
-        self.servo_rear_leg_left_rest_angle = Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_LEG_LEFT_REST_ANGLE)
-        self.servo_rear_feet_left_rest_angle = Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_FEET_LEFT_REST_ANGLE)
-        self.servo_rear_shoulder_right_rest_angle = Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_SHOULDER_RIGHT_REST_ANGLE)
-        self.servo_rear_leg_right_rest_angle = Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_LEG_RIGHT_REST_ANGLE)
-        self.servo_rear_feet_right_rest_angle = Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_FEET_RIGHT_REST_ANGLE)
-        self.servo_front_shoulder_left_rest_angle = Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_SHOULDER_LEFT_REST_ANGLE)
-        self.servo_front_leg_left_rest_angle = Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_LEG_LEFT_REST_ANGLE)
-        self.servo_front_feet_left_rest_angle = Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_FEET_LEFT_REST_ANGLE)
-        self.servo_front_shoulder_right_rest_angle = Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_SHOULDER_RIGHT_REST_ANGLE)
-        self.servo_front_leg_right_rest_angle = Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_LEG_RIGHT_REST_ANGLE)
-        self.servo_front_feet_right_rest_angle = Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_FEET_RIGHT_REST_ANGLE)
-
-        self.servo_arm_rotation.angle = Config().get(Config.MOTION_CONTROLLER_SERVOS_ARM_ROTATION_REST_ANGLE)
-        self.servo_arm_lift.angle = Config().get(Config.MOTION_CONTROLLER_SERVOS_ARM_LIFT_REST_ANGLE)
-        self.servo_arm_range.angle = Config().get(Config.MOTION_CONTROLLER_SERVOS_ARM_RANGE_REST_ANGLE)
-        self.servo_arm_cam_tilt.angle = Config().get(Config.MOTION_CONTROLLER_SERVOS_ARM_CAM_TILT_REST_ANGLE)
+        self.body_pose = body_pose
+        self.joints.command[kinematics.LEG_JOINTS] = angles
 
     def body_move_body_up_and_down(self, raw_value):
 
         range = 10
         range2 = 15
 
+        # Rear and front: leg left, feet left, leg right, feet right
+        variation = np.array([-range, range2, range, -range2, -range, range2, range, -range2])
+
         if raw_value < 0:
-            self.servo_rear_leg_left_rest_angle -= range
-            self.servo_rear_feet_left_rest_angle += range2
-            self.servo_rear_leg_right_rest_angle += range
-            self.servo_rear_feet_right_rest_angle -= range2
-            self.servo_front_leg_left_rest_angle -= range
-            self.servo_front_feet_left_rest_angle += range2
-            self.servo_front_leg_right_rest_angle += range
-            self.servo_front_feet_right_rest_angle -= range2
+            self.joints.command[joint_table.LEGS_AND_FEET] += variation
 
         elif raw_value > 0:
-            self.servo_rear_leg_left_rest_angle += range
-            self.servo_rear_feet_left_rest_angle -= range2
-            self.servo_rear_leg_right_rest_angle -= range
-            self.servo_rear_feet_right_rest_angle += range2
-            self.servo_front_leg_left_rest_angle += range
-            self.servo_front_feet_left_rest_angle -= range2
-            self.servo_front_leg_right_rest_angle -= range
-            self.servo_front_feet_right_rest_angle += range2
+            self.joints.command[joint_table.LEGS_AND_FEET] -= variation
 
         else:
             self.rest_position()
 
-        print(str(self.servo_rear_leg_left_rest_angle) + ', ' + str(self.servo_rear_feet_left_rest_angle) + ', ' + str(self.servo_rear_leg_right_rest_angle) + ', ' + str(self.servo_rear_feet_right_rest_angle) + ', ' + str(self.servo_front_leg_left_rest_angle) + ', ' + str(self.servo_front_feet_left_rest_angle) + ', ' + str(self.servo_front_leg_right_rest_angle) + ', ' + str(self.servo_front_feet_right_rest_angle))
+        log.debug(', '.join(str(angle) for angle in self.joints.command[joint_table.LEGS_AND_FEET]))
 
     def body_move_body_up_and_down_analog(self, raw_value):
 
-        servo_rear_leg_left_max_angle = 38
-        servo_rear_feet_left_max_angle = 70
-        servo_rear_leg_right_max_angle = 126
-        servo_rear_feet_right_max_angle = 102
-        servo_front_leg_left_max_angle = 57
-        servo_front_feet_left_max_angle = 85
-        servo_front_leg_right_max_angle = 130
-        servo_front_feet_right_max_angle = 120
-
-        delta_rear_leg_left = int(General().maprange((1, -1), (Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_LEG_LEFT_REST_ANGLE), servo_rear_leg_left_max_angle), raw_value))
-        delta_rear_feet_left = int(General().maprange((1, -1), (Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_FEET_LEFT_REST_ANGLE), servo_rear_feet_left_max_angle), raw_value))
-        delta_rear_leg_right = int(General().maprange((1, -1), (Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_LEG_RIGHT_REST_ANGLE), servo_rear_leg_right_max_angle), raw_value))
-        delta_rear_feet_right = int(General().maprange((1, -1), (Config().get(Config.MOTION_CONTROLLER_SERVOS_REAR_FEET_RIGHT_REST_ANGLE), servo_rear_feet_right_max_angle), raw_value))
-        delta_front_leg_left = int(General().maprange((1, -1), (Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_LEG_LEFT_REST_ANGLE), servo_front_leg_left_max_angle), raw_value))
-        delta_front_feet_left = int(General().maprange((1, -1), (Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_FEET_LEFT_REST_ANGLE), servo_front_feet_left_max_angle), raw_value))
-        delta_front_leg_right = int(General().maprange((1, -1), (Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_LEG_RIGHT_REST_ANGLE), servo_front_leg_right_max_angle), raw_value))
-        delta_front_feet_right = int(General().maprange((1, -1), (Config().get(Config.MOTION_CONTROLLER_SERVOS_FRONT_FEET_RIGHT_REST_ANGLE), servo_front_feet_right_max_angle), raw_value))
-
-        self.servo_rear_leg_left_rest_angle = delta_rear_leg_left
-        self.servo_rear_feet_left_rest_angle = delta_rear_feet_left
-        self.servo_rear_leg_right_rest_angle = delta_rear_leg_right
-        self.servo_rear_feet_right_rest_angle = delta_rear_feet_right
-        self.servo_front_leg_left_rest_angle = delta_front_leg_left
-        self.servo_front_feet_left_rest_angle = delta_front_feet_left
-        self.servo_front_leg_right_rest_angle = delta_front_leg_right
-        self.servo_front_feet_right_rest_angle = delta_front_feet_right
+        height = General().maprange((1, -1), (kinematics.NEUTRAL_HEIGHT, BODY_LOWEST_HEIGHT), raw_value)
+        self.set_body_pose(self.body_pose._replace(height=height))
 
     def body_move_body_left_right(self, raw_value):
 
         range = 5
 
+        # Rear shoulder left, rear shoulder right, front shoulder left, front shoulder right
+        variation = np.array([-range, -range, range, range])
+
         if raw_value < 0:
-            self.servo_rear_shoulder_left_rest_angle -= range
-            self.servo_rear_shoulder_right_rest_angle -= range
-            self.servo_front_shoulder_left_rest_angle += range
-            self.servo_front_shoulder_right_rest_angle += range
+            self.joints.command[joint_table.SHOULDERS] += variation
 
         elif raw_value > 0:
-            self.servo_rear_shoulder_left_rest_angle += range
-            self.servo_rear_shoulder_right_rest_angle += range
-            self.servo_front_shoulder_left_rest_angle -= range
-            self.servo_front_shoulder_right_rest_angle -= range
+            self.joints.command[joint_table.SHOULDERS] -= variation
 
         else:
             self.rest_position()
 
     def body_move_body_left_right_analog(self, raw_value):
 
-        delta_a = int(General().maprange((-1, 1), (30, 150), raw_value))
-        delta_b = int(General().maprange((-1, 1), (150, 30), raw_value))
-
-        self.servo_rear_shoulder_left_rest_angle = delta_a
-        self.servo_rear_shoulder_right_rest_angle = delta_a
-        self.servo_front_shoulder_left_rest_angle = delta_b
-        self.servo_front_shoulder_right_rest_angle = delta_b
+        self.set_body_pose(self.body_pose._replace(y=raw_value * BODY_LATERAL_SHIFT))
 
     def standing_position(self):
 
-        variation_leg = 50
-        variation_feet = 70
-
-        self.servo_rear_shoulder_left.angle = self.servo_rear_shoulder_left_rest_angle + 10
-        self.servo_rear_leg_left.angle = self.servo_rear_leg_left_rest_angle - variation_leg
-        self.servo_rear_feet_left.angle = self.servo_rear_feet_left_rest_angle + variation_feet
+        self.body_position(0)
 
-        self.servo_rear_shoulder_right.angle = self.servo_rear_shoulder_right_rest_angle - 10
-        self.servo_rear_leg_right.angle = self.servo_rear_leg_right_rest_angle + variation_leg
-        self.servo_rear_feet_right.angle = self.servo_rear_feet_right_rest_angle - variation_feet
+    def body_move_position_right(self):
 
-        time.sleep(0.05)
+        self.body_position(20)
 
-        self.servo_front_shoulder_left.angle = self.servo_front_shoulder_left_rest_angle - 10
-        self.servo_front_leg_left.angle = self.servo_front_leg_left_rest_angle - variation_leg + 5
-        self.servo_front_feet_left.angle = self.servo_front_feet_left_rest_angle + variation_feet - 5
+    def body_move_position_left(self):
 
-        self.servo_front_shoulder_right.angle = self.servo_front_shoulder_right_rest_angle + 10
-        self.servo_front_leg_right.angle = self.servo_front_leg_right_rest_angle + variation_leg - 5
-        self.servo_front_feet_right.angle = self.servo_front_feet_right_rest_angle - variation_feet + 5
+        self.body_position(-20)
 
-    def body_move_position_right(self):
-
-        move = 20
+    def body_position(self, move):
 
         variation_leg = 50
         variation_feet = 70
 
-        self.servo_rear_shoulder_left.angle = self.servo_rear_shoulder_left_rest_angle + 10 + move
-        self.servo_rear_leg_left.angle = self.servo_rear_leg_left_rest_angle - variation_leg
-        self.servo_rear_feet_left.angle = self.servo_rear_feet_left_rest_angle + variation_feet
-
-        self.servo_rear_shoulder_right.angle = self.servo_rear_shoulder_right_rest_angle - 10 + move
-        self.servo_rear_leg_right.angle = self.servo_rear_leg_right_rest_angle + variation_leg
-        self.servo_rear_feet_right.angle = self.servo_rear_feet_right_rest_angle - variation_feet
+        # Shoulder, leg and feet left, then shoulder, leg and feet right
+        self.joints.command[joint_table.REAR_LEGS] = self.joints.rest_angle[joint_table.REAR_LEGS] + \
+            np.array([10 + move, -variation_leg, variation_feet, -10 + move, variation_leg, -variation_feet])
 
-        time.sleep(0.05)
+        # Front legs follow 50ms later, from the control loop
+        self.schedule(0.05, self.body_position_front, move)
 
-        self.servo_front_shoulder_left.angle = self.servo_front_shoulder_left_rest_angle - 10 - move
-        self.servo_front_leg_left.angle = self.servo_front_leg_left_rest_angle - variation_leg + 5
-        self.servo_front_feet_left.angle = self.servo_front_feet_left_rest_angle + variation_feet - 5
-
-        self.servo_front_shoulder_right.angle = self.servo_front_shoulder_right_rest_angle + 10 - move
-        self.servo_front_leg_right.angle = self.servo_front_leg_right_rest_angle + variation_leg - 5
-        self.servo_front_feet_right.angle = self.servo_front_feet_right_rest_angle - variation_feet + 5
-
-    def body_move_position_left(self):
-
-        move = 20
+    def body_position_front(self, move):
 
         variation_leg = 50
         variation_feet = 70
 
-        self.servo_rear_shoulder_left.angle = self.servo_rear_shoulder_left_rest_angle + 10 - move
-        self.servo_rear_leg_left.angle = self.servo_rear_leg_left_rest_angle - variation_leg
-        self.servo_rear_feet_left.angle = self.servo_rear_feet_left_rest_angle + variation_feet
-
-        self.servo_rear_shoulder_right.angle = self.servo_rear_shoulder_right_rest_angle - 10 - move
-        self.servo_rear_leg_right.angle = self.servo_rear_leg_right_rest_angle + variation_leg
-        self.servo_rear_feet_right.angle = self.servo_rear_feet_right_rest_angle - variation_feet
-
-        time.sleep(0.05)
-
-        self.servo_front_shoulder_left.angle = self.servo_front_shoulder_left_rest_angle - 10 + move
-        self.servo_front_leg_left.angle = self.servo_front_leg_left_rest_angle - variation_leg + 5
-        self.servo_front_feet_left.angle = self.servo_front_feet_left_rest_angle + variation_feet - 5
-
-        self.servo_front_shoulder_right.angle = self.servo_front_shoulder_right_rest_angle + 10 + move
-        self.servo_front_leg_right.angle = self.servo_front_leg_right_rest_angle + variation_leg - 5
-        self.servo_front_feet_right.angle = self.servo_front_feet_right_rest_angle - variation_feet + 5
+        self.joints.command[joint_table.FRONT_LEGS] = self.joints.rest_angle[joint_table.FRONT_LEGS] + \
+            np.array([-10 - move, -variation_leg + 5, variation_feet - 5, 10 - move, variation_leg - 5, -variation_feet + 5])
 
     def arm_set_rotation(self, raw_value):
 
-        left_position = int(General().maprange((-1, 1), (0, 180), raw_value / 2))
-
-        if int(self.servo_arm_rotation.angle) != int(left_position):
-            self.servo_arm_rotation.angle = left_position
+        self.joints.command[joint_table.ARM_ROTATION] = int(General().maprange((-1, 1), (0, 180), raw_value / 2))
 
     def arm_set_lift(self, raw_value):
 
-        lift_position = int(General().maprange((-1, 1), (180, 0), raw_value / 2))
-
-        if int(self.servo_arm_lift.angle) != int(lift_position):
-            self.servo_arm_lift.angle = lift_position
+        self.joints.command[joint_table.ARM_LIFT] = int(General().maprange((-1, 1), (180, 0), raw_value / 2))
 
     def arm_set_range(self, raw_value):
 
-        range_position = int(General().maprange((-1, 1), (180, 0), raw_value / 2))
-
-        if int(self.servo_arm_range.angle) != int(range_position):
-            self.servo_arm_range.angle = range_position
+        self.joints.command[joint_table.ARM_RANGE] = int(General().maprange((-1, 1), (180, 0), raw_value / 2))
 
     def arm_set_cam_tilt(self, raw_value):
 
-        tilt_position = int(General().maprange((-1, 1), (100, 150), raw_value))
-
-        if int(self.servo_arm_cam_tilt.angle) != int(tilt_position):
-            self.servo_arm_cam_tilt.angel = tilt_position
+        self.joints.command[joint_table.ARM_CAM_TILT] = int(General().maprange((-1, 1), (100, 150), raw_value))
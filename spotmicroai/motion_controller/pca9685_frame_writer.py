@@ -0,0 +1,121 @@
+from spotmicroai.utilities.log import Logger
+
+log = Logger().setup_logger('PCA9685 frame writer')
+
+PCA9685_MODE1 = 0x00
+PCA9685_MODE1_AUTO_INCREMENT = 0x20
+PCA9685_LED0_ON_L = 0x06
+
+PCA9685_CHANNELS = 16
+PCA9685_BYTES_PER_CHANNEL = 4
+
+SERVO_ACTUATION_RANGE = 180
+
+
+def angle_to_ticks(angle, min_pulse, max_pulse, frequency, actuation_range=SERVO_ACTUATION_RANGE):
+    # Same integer math as adafruit_motor.servo + adafruit_pca9685.PWMChannel, so the
+    # registers end up with exactly the values the per servo path used to write
+    if angle < 0 or angle > actuation_range:
+        raise ValueError('Angle out of range')
+
+    min_duty = int((min_pulse * frequency) / 1000000 * 0xFFFF)
+    max_duty = (max_pulse * frequency) / 1000000 * 0xFFFF
+    duty_range = int(max_duty - min_duty)
+
+    duty_cycle = min_duty + int(angle / actuation_range * duty_range)
+
+    if duty_cycle >= 0xFFFF:
+        return 0x1000
+
+    return (duty_cycle + 1) >> 4
+
+
+class PCA9685FrameWriter:
+    """
+    Keeps the 16 channel frame of one PCA9685 board and the ticks last written to it. On flush only
+    the channels whose ticks changed are sent, neighbouring dirty channels merged into a single
+    auto-increment block write, so a full pose costs one transaction per run of contiguous channels.
+    Channels never given ticks, with no servo configured, are never written.
+    """
+
+    def __init__(self, pca9685, i2c_device=None, frequency=None):
+        self._i2c_device = i2c_device if i2c_device is not None else pca9685.i2c_device
+        self.frequency = frequency if frequency is not None else pca9685.frequency
+
+        # None until a servo of the channel gets ticks
+        self.ticks = [None] * PCA9685_CHANNELS
+        self._written_ticks = [None] * PCA9685_CHANNELS
+
+        self.writes_issued = 0
+        self.writes_skipped = 0
+        self.transactions = 0
+
+        self.enable_auto_increment()
+
+    def enable_auto_increment(self):
+        with self._i2c_device as i2c:
+            mode1 = bytearray(1)
+            i2c.write_then_readinto(bytes([PCA9685_MODE1]), mode1)
+            if not mode1[0] & PCA9685_MODE1_AUTO_INCREMENT:
+                i2c.write(bytes([PCA9685_MODE1, mode1[0] | PCA9685_MODE1_AUTO_INCREMENT]))
+
+    def set_angle(self, channel, angle, min_pulse, max_pulse):
+        self.ticks[channel] = angle_to_ticks(angle, min_pulse, max_pulse, self.frequency)
+
+    def set_ticks(self, channels, ticks):
+        for channel, channel_ticks in zip(channels, ticks):
+            self.ticks[channel] = channel_ticks
+
+    def invalidate(self):
+        # Forget what the board holds, next flush writes the whole frame
+        self._written_ticks = [None] * PCA9685_CHANNELS
+
+    def flush(self):
+        ticks = self.ticks
+        written_ticks = self._written_ticks
+
+        channel = 0
+        while channel < PCA9685_CHANNELS:
+
+            if ticks[channel] is None:
+                channel += 1
+                continue
+
+            if ticks[channel] == written_ticks[channel]:
+                self.writes_skipped += 1
+                channel += 1
+                continue
+
+            first_channel = channel
+            while channel < PCA9685_CHANNELS and ticks[channel] is not None and \
+                    ticks[channel] != written_ticks[channel]:
+                channel += 1
+
+            self._write_channels(first_channel, channel)
+
+    def _write_channels(self, first_channel, last_channel):
+        buffer = bytearray(1 + (last_channel - first_channel) * PCA9685_BYTES_PER_CHANNEL)
+        buffer[0] = PCA9685_LED0_ON_L + first_channel * PCA9685_BYTES_PER_CHANNEL
+
+        offset = 1
+        for ticks in self.ticks[first_channel:last_channel]:
+            if ticks & 0x1000:
+                # Full ON: ON count bit 12 set, OFF count 0
+                buffer[offset + 1] = 0x10
+            else:
+                buffer[offset + 2] = ticks & 0xFF
+                buffer[offset + 3] = (ticks >> 8) & 0x0F
+            offset += PCA9685_BYTES_PER_CHANNEL
+
+        with self._i2c_device as i2c:
+            i2c.write(buffer)
+
+        self._written_ticks[first_channel:last_channel] = self.ticks[first_channel:last_channel]
+
+        self.writes_issued += last_channel - first_channel
+        self.transactions += 1
+
+    def statistics(self):
+        return {'writes_issued': self.writes_issued,
+                'writes_skipped': self.writes_skipped,
+                'transactions': self.transactions}
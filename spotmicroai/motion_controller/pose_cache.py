@@ -0,0 +1,70 @@
+import collections
+
+import numpy as np
+
+from spotmicroai.motion_controller.kinematics import BodyPose
+
+POSE_CACHE_SIZE = 1024
+
+
+class PoseCache:
+    """
+    Servo angles of body poses, least recently used first out. Poses are snapped to a grid, height and x/y shift
+    in millimeters, roll, pitch and yaw in radians, and every pose of a cell gets the angles of its grid point:
+    a stick held still, or back where it was, costs a dictionary lookup instead of a solve.
+    """
+
+    def __init__(self, leg_kinematics, size=POSE_CACHE_SIZE, height_step=1.0, angle_step=0.01, shift_step=1.0):
+        self.leg_kinematics = leg_kinematics
+        self.size = size
+        self.steps = BodyPose(height_step, angle_step, angle_step, angle_step, shift_step, shift_step)
+
+        # Quantized pose to (servo angles, reachable), the most recently used last
+        self._entries = collections.OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def quantize(self, body_pose):
+        return tuple(round(value / step) for value, step in zip(body_pose, self.steps))
+
+    def servo_angles(self, body_pose):
+        # Servo degrees of the leg joints, truncated as they are commanded, and whether the legs reach the pose
+        key = self.quantize(body_pose)
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+
+        angles, reachable = self.leg_kinematics.servo_angles(BodyPose(*(index * step for index, step in
+                                                                         zip(key, self.steps))))
+        angles = np.trunc(angles)
+        # Shared by every later hit, nobody writes into it
+        angles.flags.writeable = False
+        entry = (angles, bool(reachable))
+
+        if self.size > 0:
+            self._entries[key] = entry
+            if len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+        return entry
+
+    def clear(self):
+        self._entries.clear()
+
+    def statistics(self):
+        lookups = self.hits + self.misses
+
+        return {'size': self.size,
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0}
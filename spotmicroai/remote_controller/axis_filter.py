@@ -0,0 +1,123 @@
+import math
+
+# Held still, the filtered value closer than this to the stick position is snapped to it, below the published
+# resolution
+SETTLE_TOLERANCE = 0.0005
+
+
+class AxisFilter:
+    """
+    Cleans up one joystick axis before its value is published: deadzone with hysteresis around the centre,
+    a one euro low-pass filter (a plain EMA when beta is 0) and a minimum change to report.
+    update() returns the value to publish, or None when the change is not worth an update. The kernel sends
+    nothing while the stick is held still, settle() keeps the low-pass moving towards the last position until
+    it gets there.
+    """
+
+    def __init__(self, deadzone=0.0, hysteresis=0.0, min_cutoff=None, beta=0.0, derivative_cutoff=1.0,
+                 threshold=0.0):
+        self.deadzone = deadzone
+        self.hysteresis = hysteresis
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.derivative_cutoff = derivative_cutoff
+        self.threshold = threshold
+
+        self.reset()
+
+    @classmethod
+    def from_config(cls, axis_filter_config):
+        return cls(**axis_filter_config._asdict())
+
+    def reset(self):
+        self.published = 0.0
+        self._in_deadzone = True
+        # Stick position after the deadzone, and the low-pass output following it
+        self._input = 0.0
+        self._value = None
+        self._derivative = 0.0
+        self._timestamp = None
+
+    @property
+    def settling(self):
+        return self.min_cutoff is not None and self._value is not None and self._value != self._input
+
+    def update(self, value, timestamp):
+        value = self._input = self._apply_deadzone(value)
+
+        # Centre and full deflection go through as they are, the filter must never leave the stick half released
+        resting = value == 0.0 or abs(value) >= 1.0
+        if resting:
+            self._value = value
+            self._derivative = 0.0
+        elif self.min_cutoff is not None:
+            value = self._low_pass(value, timestamp)
+
+        self._timestamp = timestamp
+
+        return self._publish(value, resting)
+
+    def settle(self, period):
+        # Seconds since the last update or settle, with the stick where the last event left it
+        if not self.settling:
+            return None
+
+        timestamp = self._timestamp + period
+        value = self._low_pass(self._input, timestamp)
+        self._timestamp = timestamp
+
+        # Where the stick rests goes through whatever the threshold
+        resting = abs(value - self._input) < SETTLE_TOLERANCE
+        if resting:
+            value = self._value = self._input
+            self._derivative = 0.0
+
+        return self._publish(value, resting)
+
+    def _publish(self, value, resting):
+        value = round(value, 3)
+        if value == self.published:
+            return None
+        if abs(value - self.published) < self.threshold and not resting:
+            return None
+
+        self.published = value
+        return value
+
+    def _apply_deadzone(self, value):
+        magnitude = abs(value)
+
+        # Leaving the deadzone takes a bit more than entering it, noise on the edge doesn't flicker
+        if self._in_deadzone:
+            self._in_deadzone = magnitude <= self.deadzone + self.hysteresis
+        else:
+            self._in_deadzone = magnitude < self.deadzone
+
+        if self._in_deadzone:
+            return 0.0
+
+        # Rescaled so the output still starts at 0 and reaches 1
+        return math.copysign(min((magnitude - self.deadzone) / (1.0 - self.deadzone), 1.0), value)
+
+    def _low_pass(self, value, timestamp):
+        if self._value is None or self._timestamp is None:
+            self._value = value
+            return value
+
+        period = timestamp - self._timestamp
+        if period <= 0:
+            # Same millisecond (or the event clock wrapped), nothing to integrate over
+            return self._value
+
+        derivative = (value - self._value) / period
+        self._derivative += _smoothing(period, self.derivative_cutoff) * (derivative - self._derivative)
+
+        cutoff = self.min_cutoff + self.beta * abs(self._derivative)
+        self._value += _smoothing(period, cutoff) * (value - self._value)
+
+        return self._value
+
+
+def _smoothing(period, cutoff):
+    tau = 1.0 / (2 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / period)
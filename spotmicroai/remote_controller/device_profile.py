@@ -0,0 +1,155 @@
+import array
+from fcntl import ioctl
+from typing import NamedTuple, Tuple
+
+from spotmicroai.utilities.log import Logger
+
+log = Logger().setup_logger('Device profile')
+
+# These constants were borrowed from linux/input.h
+AXIS_NAMES = {
+    0x00: 'lx',
+    0x01: 'ly',
+    0x02: 'lz',
+    0x03: 'rx',
+    0x04: 'ry',
+    0x05: 'rz',
+    0x06: 'trottle',
+    0x07: 'rudder',
+    0x08: 'wheel',
+    0x09: 'gas',
+    0x0a: 'brake',
+    0x10: 'hat0x',
+    0x11: 'hat0y',
+    0x12: 'hat1x',
+    0x13: 'hat1y',
+    0x14: 'hat2x',
+    0x15: 'hat2y',
+    0x16: 'hat3x',
+    0x17: 'hat3y',
+    0x18: 'pressure',
+    0x19: 'distance',
+    0x1a: 'tilt_x',
+    0x1b: 'tilt_y',
+    0x1c: 'tool_width',
+    0x20: 'volume',
+    0x28: 'misc',
+}
+
+BUTTON_NAMES = {
+    0x120: 'trigger',
+    0x121: 'thumb',
+    0x122: 'thumb2',
+    0x123: 'top',
+    0x124: 'top2',
+    0x125: 'pinkie',
+    0x126: 'base',
+    0x127: 'base2',
+    0x128: 'base3',
+    0x129: 'base4',
+    0x12a: 'base5',
+    0x12b: 'base6',
+    0x12f: 'dead',
+    0x130: 'a',
+    0x131: 'b',
+    0x132: 'c',
+    0x133: 'x',
+    0x134: 'y',
+    0x135: 'z',
+    0x136: 'tl',
+    0x137: 'tr',
+    0x138: 'tl2',
+    0x139: 'tr2',
+    0x13a: 'select',
+    0x13b: 'start',
+    0x13c: 'mode',
+    0x13d: 'thumbl',
+    0x13e: 'thumbr',
+
+    0x220: 'dpad_up',
+    0x221: 'dpad_down',
+    0x222: 'dpad_left',
+    0x223: 'dpad_right',
+
+    # XBox 360 controller uses these codes.
+    0x2c0: 'dpad_left',
+    0x2c1: 'dpad_right',
+    0x2c2: 'dpad_up',
+    0x2c3: 'dpad_down',
+}
+
+# linux/joystick.h
+JSIOCGAXES = 0x80016a11
+JSIOCGBUTTONS = 0x80016a12
+JSIOCGAXMAP = 0x80406a32
+JSIOCGBTNMAP = 0x80406a34
+
+JS_NAME_LENGTH = 64
+
+
+def JSIOCGNAME(length):
+    return 0x80006a13 + (0x10000 * length)
+
+
+class DeviceProfile(NamedTuple):
+    name: str
+    # Event number to axis/button name, what the event loop indexes for every event
+    axis_map: Tuple[str, ...]
+    button_map: Tuple[str, ...]
+
+
+class DeviceProfiles:
+    """
+    Axis and button maps of the joysticks seen so far, keyed by the name the driver reports.
+    Reconnecting a known joystick costs the name ioctl only.
+    """
+
+    def __init__(self, ioctl=ioctl):
+        self._ioctl = ioctl
+        self._profiles = {}
+
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, jsdev):
+        name = self.read_name(jsdev)
+
+        profile = self._profiles.get(name)
+        if profile is not None:
+            self.hits += 1
+            return profile
+
+        self.misses += 1
+        log.debug('Reading the axis and button maps of ' + name)
+        profile = self.read_profile(jsdev, name)
+        self._profiles[name] = profile
+
+        return profile
+
+    def read_name(self, jsdev):
+        buf = array.array('B', [0] * JS_NAME_LENGTH)
+        self._ioctl(jsdev, JSIOCGNAME(len(buf)), buf)
+        return buf.tobytes().rstrip(b'\x00').decode('utf-8')
+
+    def read_profile(self, jsdev, name):
+
+        # Get number of axes and buttons.
+        buf = array.array('B', [0])
+        self._ioctl(jsdev, JSIOCGAXES, buf)
+        num_axes = buf[0]
+
+        buf = array.array('B', [0])
+        self._ioctl(jsdev, JSIOCGBUTTONS, buf)
+        num_buttons = buf[0]
+
+        # Get the axis map.
+        buf = array.array('B', [0] * 0x40)
+        self._ioctl(jsdev, JSIOCGAXMAP, buf)
+        axis_map = tuple(AXIS_NAMES.get(axis, 'unknown(0x%02x)' % axis) for axis in buf[:num_axes])
+
+        # Get the button map.
+        buf = array.array('H', [0] * 200)
+        self._ioctl(jsdev, JSIOCGBTNMAP, buf)
+        button_map = tuple(BUTTON_NAMES.get(btn, 'unknown(0x%03x)' % btn) for btn in buf[:num_buttons])
+
+        return DeviceProfile(name, axis_map, button_map)
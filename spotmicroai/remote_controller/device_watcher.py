@@ -0,0 +1,116 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import time
+
+from spotmicroai.utilities.log import Logger
+
+log = Logger().setup_logger('Device watcher')
+
+INPUT_DIRECTORY = '/dev/input'
+
+# linux/inotify.h
+IN_ATTRIB = 0x00000004
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+POLLING_INTERVAL = 0.1
+
+
+def create_device_watcher(device, directory=INPUT_DIRECTORY):
+    try:
+        return InotifyDeviceWatcher(device, directory)
+    except (OSError, AttributeError) as e:
+        log.info('inotify not available, polling ' + directory + ' for ' + device + ' instead (' + str(e) + ')')
+        return PollingDeviceWatcher(device, directory)
+
+
+class PollingDeviceWatcher:
+    """
+    Waits for the joystick device node to appear or disappear by checking for it every POLLING_INTERVAL.
+    """
+
+    def __init__(self, device, directory=INPUT_DIRECTORY, polling_interval=POLLING_INTERVAL):
+        self.device = device
+        self.directory = directory
+        self.path = os.path.join(directory, device)
+        self.polling_interval = polling_interval
+
+    def is_present(self):
+        return os.path.exists(self.path)
+
+    def wait(self, present=True, timeout=None):
+        # Blocks until the device presence is the one asked for or the timeout expires, returns the presence
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while self.is_present() != present:
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return not present
+                time.sleep(min(self.polling_interval, remaining))
+            else:
+                time.sleep(self.polling_interval)
+
+        return present
+
+    def close(self):
+        pass
+
+
+class InotifyDeviceWatcher(PollingDeviceWatcher):
+    """
+    Same as PollingDeviceWatcher but sleeps on inotify events of the input directory, so it wakes up
+    as soon as the device node is created, removed or gets its permissions from udev.
+    """
+
+    def __init__(self, device, directory=INPUT_DIRECTORY):
+        super().__init__(device, directory)
+
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+
+        mask = IN_CREATE | IN_DELETE | IN_ATTRIB | IN_MOVED_TO | IN_MOVED_FROM
+        if libc.inotify_add_watch(self._fd, os.fsencode(directory), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, os.strerror(errno), directory)
+
+    def wait(self, present=True, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        # The watch is in place before checking, a change in between is queued and not missed
+        while self.is_present() != present:
+            remaining = None
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return not present
+
+            readable, _, _ = select.select([self._fd], [], [], remaining)
+            if readable:
+                self._drain_events()
+
+        return present
+
+    def _drain_events(self):
+        # The events only wake us up, the presence check after them is what counts
+        try:
+            while os.read(self._fd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
@@ -1,25 +1,54 @@
 import time
 import os
 import struct
-import array
-from fcntl import ioctl
+import select
 import signal
 import sys
 from spotmicroai.utilities.log import Logger
 from spotmicroai.utilities.config import Config
+from spotmicroai.hal.hal import load_hal
 import spotmicroai.utilities.queues as queues
+import spotmicroai.utilities.status_board as status_board
+import spotmicroai.utilities.trace as trace
+from spotmicroai.remote_controller.device_watcher import create_device_watcher, INPUT_DIRECTORY
+from spotmicroai.remote_controller.device_profile import DeviceProfiles
+from spotmicroai.remote_controller.axis_filter import AxisFilter
+from spotmicroai.remote_controller.session_log import SessionRecorder
 
 log = Logger().setup_logger('Remote controller')
 
+# struct js_event from linux/joystick.h: time, value, type, number
+JS_EVENT = struct.Struct('IhBB')
+JS_EVENT_SIZE = JS_EVENT.size
+JS_EVENT_BUTTON = 0x01
+JS_EVENT_AXIS = 0x02
+JS_EVENT_INIT = 0x80
+
+# The kernel keeps up to 64 events queued per reader
+JS_EVENTS_PER_READ = 64
+
+DEVICE_ATTACH_RETRY_INTERVAL = 0.05
+
+FILTER_STATISTICS_INTERVAL = 60
+
+# Filters still catching up with a stick held still are stepped at the pace of the motion loop
+FILTER_SETTLE_INTERVAL = 0.01
+
 
 class RemoteControllerController:
 
+    # Records the joystick session when record_sessions is configured
+    _session_recorder = None
+
     def __init__(self, communication_queues):
 
         try:
 
             log.debug('Starting controller...')
 
+            # Before anything that can fail, the handler below reports to it
+            self._status_board = communication_queues[queues.STATUS_BOARD]
+
             signal.signal(signal.SIGINT, self.exit_gracefully)
             signal.signal(signal.SIGTERM, self.exit_gracefully)
 
@@ -27,216 +56,233 @@ class RemoteControllerController:
             self.connected_device = False
             self.axis_states = {}
             self.button_states = {}
+            # Presses counted since the start, a press and release in the same read still reaches the motion loop
+            self.button_presses = {}
             self.button_map = []
             self.axis_map = []
             self.jsdev = None
-            self.previous_fvalue = 0
 
-            self._abort_queue = communication_queues[queues.ABORT_CONTROLLER]
-            self._motion_queue = communication_queues[queues.MOTION_CONTROLLER]
-            self._lcd_screen_queue = communication_queues[queues.LCD_SCREEN_CONTROLLER]
+            # The device node and its ioctls, or a scripted joystick off the robot
+            self._joystick = load_hal().joystick(str(Config().remote_controller_controller.device))
+            self._device_profiles = DeviceProfiles(ioctl=self._joystick.ioctl)
+
+            self._axis_filters = {axis: AxisFilter.from_config(axis_filter) for axis, axis_filter
+                                  in Config().remote_controller_controller.axis_filters.items()}
+            self.axis_updates = 0
+            self.suppressed_axis_updates = 0
+            # A device name lives in /dev/input, the simulated joystick is a FIFO with its own directory
+            self._device_watcher = create_device_watcher(os.path.basename(self._joystick.path),
+                                                         os.path.dirname(self._joystick.path) or INPUT_DIRECTORY)
+
+            # Every read as it came from the device, to replay the session later
+            record_sessions = Config().remote_controller_controller.record_sessions
+            if record_sessions:
+                self._session_recorder = SessionRecorder.create(os.path.expanduser(record_sessions))
+                log.info('Recording the joystick session to ' + self._session_recorder.path)
+
+            self._abort_signal = communication_queues[queues.ABORT_SIGNAL]
+            self._motion_mailbox = communication_queues[queues.MOTION_CONTROLLER]
+            self._tracer = trace.create_tracer(communication_queues, trace.REMOTE_CONTROLLER)
 
         except Exception as e:
-            self._lcd_screen_queue.put(queues.LCD_SCREEN_SHOW_REMOTE_CONTROLLER_CONTROLLER_NOK)
             log.error('Remote controller controller initialization problem', e)
+            self._status_board.set(status_board.REMOTE_CONTROLLER_CONTROLLER, status_board.STATUS_NOK)
             sys.exit(1)
 
     def exit_gracefully(self, signum, frame):
-        log.info('Terminated')
-        sys.exit(0)
+        try:
+            if self._session_recorder:
+                self._session_recorder.close()
+            self._joystick.close()
+        finally:
+            log.info('Terminated')
+            sys.exit(0)
 
     def do_process_events_from_queues(self):
 
         remote_controller_connected_already = False
+        searching = False
 
         while True:
 
             if self.connected_device and not remote_controller_connected_already:
-                self._lcd_screen_queue.put(queues.LCD_SCREEN_CONTROLLER_ACTION_ON)
-                self._lcd_screen_queue.put(queues.LCD_SCREEN_SHOW_REMOTE_CONTROLLER_CONTROLLER_OK)
+                self._status_board.set(status_board.LCD_SCREEN_CONTROLLER, status_board.STATUS_ON)
+                self._status_board.set(status_board.REMOTE_CONTROLLER_CONTROLLER, status_board.STATUS_OK)
                 remote_controller_connected_already = True
-            else:
-                time.sleep(2.5)
-                self._abort_queue.put(queues.ABORT_CONTROLLER_ACTION_ABORT)
-                self._lcd_screen_queue.put(queues.LCD_SCREEN_SHOW_REMOTE_CONTROLLER_CONTROLLER_SEARCHING)
+            elif not self.connected_device:
+                # Abort and tell once, then sleep until the device node shows up
+                if not searching:
+                    self._abort_signal.trip()
+                    self._status_board.set(status_board.REMOTE_CONTROLLER_CONTROLLER, status_board.STATUS_SEARCHING)
+                    searching = True
                 remote_controller_connected_already = False
-                self.check_for_connected_devices()
+                self._device_watcher.wait(present=True)
+                self.attach_device()
                 continue
 
+            searching = False
+            next_filter_statistics = time.monotonic() + FILTER_STATISTICS_INTERVAL
+            filtered_at = time.monotonic()
+            tracer = self._tracer
+
             # Main event loop
-            i = 0
             while True:
 
                 try:
-                    evbuf = self.jsdev.read(8)
-                    if evbuf:
-                        buftime, value, type, number = struct.unpack('IhBB', evbuf)
+                    # Wait for the device, then take every pending event in one read
+                    settling = any(axis_filter.settling for axis_filter in self._axis_filters.values())
+                    readable, writable, exceptional = select.select([self.jsdev], [], [],
+                                                                    FILTER_SETTLE_INTERVAL if settling else None)
+
+                    if not readable:
+                        # No event while a stick is held still, the filters go on towards where it is
+                        now = time.monotonic()
+                        if self.settle_filters(now - filtered_at):
+                            self._motion_mailbox.publish(self.axis_states, self.button_states, now,
+                                                         self.button_presses)
+                        filtered_at = now
+                        continue
+
+                    if tracer:
+                        tracer.begin()
+
+                    try:
+                        events = os.read(self.jsdev, JS_EVENT_SIZE * JS_EVENTS_PER_READ)
+                    except BlockingIOError:
+                        continue
+                    read_at = filtered_at = time.monotonic()
+
+                    if tracer:
+                        tracer.lap(trace.REMOTE_JSDEV_READ)
+
+                    if not events:
+                        raise IOError('The remote controller device was closed')
+
+                    if self._session_recorder:
+                        self._session_recorder.record_events(events)
+
+                    # A whole burst of stick events is one state update for the motion controller
+                    updated = self.process_events(events)
+                    if tracer:
+                        tracer.lap(trace.REMOTE_PROCESS_EVENTS)
+
+                    sequence = 0
+                    if updated:
+                        sequence = self._motion_mailbox.publish(self.axis_states, self.button_states, read_at,
+                                                                self.button_presses)
+
+                    if tracer:
+                        # Tagged with the mailbox sequence the motion controller reads the state with
+                        if updated:
+                            tracer.lap(trace.REMOTE_MAILBOX_PUBLISH)
+                        tracer.commit(sequence)
+
+                    if time.monotonic() >= next_filter_statistics:
+                        next_filter_statistics = time.monotonic() + FILTER_STATISTICS_INTERVAL
+                        self.log_filter_statistics()
 
-                        if type & 0x80:
-                            continue
+                except Exception as e:
+                    log.error('Unknown problem while processing the queue of the remote controller controller', e)
+                    self._abort_signal.trip()
+                    remote_controller_connected_already = False
+                    self.attach_device()
+                    break
+
+    def attach_device(self):
+
+        try:
+            self.check_for_connected_devices()
+        except OSError as e:
+            # The node shows up before udev gives it its permissions, try again shortly
+            log.debug('The remote controller is not ready yet: ' + str(e))
+            self.connected_device = False
+            time.sleep(DEVICE_ATTACH_RETRY_INTERVAL)
 
-                        if type & 0x01:
-                            button = self.button_map[number]
-                            if button:
-                                self.button_states[button] = value
+    def log_filter_statistics(self):
 
-                        if type & 0x02:
-                            axis = self.axis_map[number]
-                            if axis:
-                                i += 1
-                                fvalue = round(value / 32767.0, 3)
+        log.info('Axis updates published: ' + str(self.axis_updates) + ', suppressed by the filters: ' +
+                 str(self.suppressed_axis_updates))
 
-                                #if self.previous_fvalue == fvalue:
-                                #    continue
+    def process_events(self, events):
 
-                                self.axis_states[axis] = fvalue
-                                self.previous_fvalue = fvalue
+        updated = False
 
-                                if axis in ['lx', 'ly', 'lz', 'rx', 'ry', 'rz']:
-                                    if i >= 6:
-                                        i = 0
-                                    else:
-                                        continue
+        for buftime, value, type, number in JS_EVENT.iter_unpack(events):
 
-                    states = {}
-                    states.update(self.button_states)
-                    states.update(self.axis_states)
+            if type & JS_EVENT_INIT:
+                continue
 
-                    # log.debug(states)
+            if type & JS_EVENT_BUTTON:
+                button = self.button_map[number]
+                if button:
+                    self.button_states[button] = value
+                    if value:
+                        self.button_presses[button] = self.button_presses.get(button, 0) + 1
+                    updated = True
+
+            if type & JS_EVENT_AXIS:
+                axis = self.axis_map[number]
+                if axis:
+                    fvalue = round(value / 32767.0, 3)
+
+                    axis_filter = self._axis_filters.get(axis)
+                    if axis_filter is not None:
+                        # Event time is in milliseconds
+                        fvalue = axis_filter.update(fvalue, buftime / 1000.0)
+                        if fvalue is None:
+                            self.suppressed_axis_updates += 1
+                            continue
 
-                    self._motion_queue.put(states)
+                    self.axis_states[axis] = fvalue
+                    self.axis_updates += 1
+                    updated = True
 
-                except Exception as e:
-                    log.error('Unknown problem while processing the queue of the remote controller controller', e)
-                    self._abort_queue.put(queues.ABORT_CONTROLLER_ACTION_ABORT)
-                    remote_controller_connected_already = False
-                    self.check_for_connected_devices()
-                    break
+        return updated
 
-    def check_for_connected_devices(self):
+    def settle_filters(self, period):
+
+        updated = False
+
+        for axis, axis_filter in self._axis_filters.items():
+            fvalue = axis_filter.settle(period)
+            if fvalue is not None and axis in self.axis_states:
+                self.axis_states[axis] = fvalue
+                self.axis_updates += 1
+                updated = True
 
-        connected_device = Config().get(Config.REMOTE_CONTROLLER_CONTROLLER_DEVICE)
+        return updated
+
+    def check_for_connected_devices(self):
 
         log.info('The remote controller is not detected, looking for connected devices')
         self.connected_device = False
-        for fn in os.listdir('/dev/input'):
-            # if fn.startswith('js'):
-            if fn.startswith(str(connected_device)):
-                self.connected_device = True
-
-                # These constants were borrowed from linux/input.h
-                axis_names = {
-                    0x00: 'lx',
-                    0x01: 'ly',
-                    0x02: 'lz',
-                    0x03: 'rx',
-                    0x04: 'ry',
-                    0x05: 'rz',
-                    0x06: 'trottle',
-                    0x07: 'rudder',
-                    0x08: 'wheel',
-                    0x09: 'gas',
-                    0x0a: 'brake',
-                    0x10: 'hat0x',
-                    0x11: 'hat0y',
-                    0x12: 'hat1x',
-                    0x13: 'hat1y',
-                    0x14: 'hat2x',
-                    0x15: 'hat2y',
-                    0x16: 'hat3x',
-                    0x17: 'hat3y',
-                    0x18: 'pressure',
-                    0x19: 'distance',
-                    0x1a: 'tilt_x',
-                    0x1b: 'tilt_y',
-                    0x1c: 'tool_width',
-                    0x20: 'volume',
-                    0x28: 'misc',
-                }
-
-                button_names = {
-                    0x120: 'trigger',
-                    0x121: 'thumb',
-                    0x122: 'thumb2',
-                    0x123: 'top',
-                    0x124: 'top2',
-                    0x125: 'pinkie',
-                    0x126: 'base',
-                    0x127: 'base2',
-                    0x128: 'base3',
-                    0x129: 'base4',
-                    0x12a: 'base5',
-                    0x12b: 'base6',
-                    0x12f: 'dead',
-                    0x130: 'a',
-                    0x131: 'b',
-                    0x132: 'c',
-                    0x133: 'x',
-                    0x134: 'y',
-                    0x135: 'z',
-                    0x136: 'tl',
-                    0x137: 'tr',
-                    0x138: 'tl2',
-                    0x139: 'tr2',
-                    0x13a: 'select',
-                    0x13b: 'start',
-                    0x13c: 'mode',
-                    0x13d: 'thumbl',
-                    0x13e: 'thumbr',
-
-                    0x220: 'dpad_up',
-                    0x221: 'dpad_down',
-                    0x222: 'dpad_left',
-                    0x223: 'dpad_right',
-
-                    # XBox 360 controller uses these codes.
-                    0x2c0: 'dpad_left',
-                    0x2c1: 'dpad_right',
-                    0x2c2: 'dpad_up',
-                    0x2c3: 'dpad_down',
-                }
-
-                # Open the joystick device.
-                fn = '/dev/input/' + str(connected_device)
-
-                log.debug(('Opening %s...' % fn))
-                self.jsdev = open(fn, 'rb')
-
-                # Get the device name.
-                # buf = bytearray(63)
-                buf = array.array('B', [0] * 64)
-                ioctl(self.jsdev, 0x80006a13 + (0x10000 * len(buf)), buf)  # JSIOCGNAME(len)
-                js_name = buf.tostring().rstrip(b'\x00').decode('utf-8')
-                log.info(('Connected to device: %s' % js_name))
-
-                # Get number of axes and buttons.
-                buf = array.array('B', [0])
-                ioctl(self.jsdev, 0x80016a11, buf)  # JSIOCGAXES
-                num_axes = buf[0]
-
-                buf = array.array('B', [0])
-                ioctl(self.jsdev, 0x80016a12, buf)  # JSIOCGBUTTONS
-                num_buttons = buf[0]
-
-                # Get the axis map.
-                buf = array.array('B', [0] * 0x40)
-                ioctl(self.jsdev, 0x80406a32, buf)  # JSIOCGAXMAP
-
-                for axis in buf[:num_axes]:
-                    axis_name = axis_names.get(axis, 'unknown(0x%02x)' % axis)
-                    self.axis_map.append(axis_name)
-                    self.axis_states[axis_name] = 0.0
-
-                # Get the button map.
-                buf = array.array('H', [0] * 200)
-                ioctl(self.jsdev, 0x80406a34, buf)  # JSIOCGBTNMAP
-
-                for btn in buf[:num_buttons]:
-                    btn_name = button_names.get(btn, 'unknown(0x%03x)' % btn)
-                    self.button_map.append(btn_name)
-                    self.button_states[btn_name] = 0
-
-                log.info(('%d axes found: %s' % (num_axes, ', '.join(self.axis_map))))
-                log.info(('%d buttons found: %s' % (num_buttons, ', '.join(self.button_map))))
-
-                break
+        if not self._device_watcher.is_present():
+            return
+
+        self.connected_device = True
+
+        # Open the joystick device.
+        fn = self._device_watcher.path
+
+        log.debug(('Opening %s...' % fn))
+        if self.jsdev is not None:
+            os.close(self.jsdev)
+            self.jsdev = None
+        self.jsdev = os.open(fn, os.O_RDONLY | os.O_NONBLOCK)
+
+        # Known devices only cost the name ioctl, their maps come from the profile cache
+        profile = self._device_profiles.load(self.jsdev)
+        log.info(('Connected to device: %s' % profile.name))
+
+        self.axis_map = profile.axis_map
+        self.button_map = profile.button_map
+
+        if self._session_recorder:
+            self._session_recorder.record_device(profile)
+        self.axis_states = {axis_name: 0.0 for axis_name in self.axis_map}
+        for axis_filter in self._axis_filters.values():
+            axis_filter.reset()
+        self.button_states = {btn_name: 0 for btn_name in self.button_map}
+
+        log.info(('%d axes found: %s' % (len(self.axis_map), ', '.join(self.axis_map))))
+        log.info(('%d buttons found: %s' % (len(self.button_map), ', '.join(self.button_map))))
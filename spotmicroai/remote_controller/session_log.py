@@ -0,0 +1,84 @@
+import datetime
+import json
+import os
+import struct
+
+# Joystick sessions as the remote controller read them: the js_event records of every read, untouched, and the
+# device they came from. Append only, a session cut short by a power loss keeps everything written before.
+MAGIC = b'SMJS'
+VERSION = 1
+_FILE_HEADER = struct.Struct('<4sH')
+
+# Kind, then the length: bytes of a device frame, js_event records of an events frame
+_FRAME = struct.Struct('<BH')
+FRAME_DEVICE = 1
+FRAME_EVENTS = 2
+
+JS_EVENT_SIZE = 8
+
+
+class SessionRecorder:
+
+    def __init__(self, path):
+        self.path = path
+
+        # Unbuffered, a frame is a single write
+        self._file = open(path, 'ab', buffering=0)
+        if self._file.tell() == 0:
+            self._file.write(_FILE_HEADER.pack(MAGIC, VERSION))
+
+        self.frames = 0
+        self.events = 0
+
+    @classmethod
+    def create(cls, directory):
+        os.makedirs(directory, exist_ok=True)
+        return cls(os.path.join(directory, 'joystick_' + datetime.datetime.now().strftime('%Y%m%d_%H%M%S') + '.js'))
+
+    def record_device(self, profile):
+        device = json.dumps({'name': profile.name, 'axes': list(profile.axis_map),
+                             'buttons': list(profile.button_map)}).encode('utf-8')
+        self._file.write(_FRAME.pack(FRAME_DEVICE, len(device)) + device)
+        self.frames += 1
+
+    def record_events(self, events):
+        count = len(events) // JS_EVENT_SIZE
+        self._file.write(_FRAME.pack(FRAME_EVENTS, count) + events[:count * JS_EVENT_SIZE])
+        self.frames += 1
+        self.events += count
+
+    def close(self):
+        self._file.close()
+
+
+def read_session(path):
+    """
+    Frames of a session log, one at a time: ('device', {'name', 'axes', 'buttons'}) when a joystick was
+    connected, ('events', js_event records) for every read. Streamed, the log is never loaded whole.
+    """
+    with open(path, 'rb') as session_file:
+        header = session_file.read(_FILE_HEADER.size)
+        if len(header) < _FILE_HEADER.size or _FILE_HEADER.unpack(header)[0] != MAGIC:
+            raise ValueError(path + ' is not a joystick session log')
+        if _FILE_HEADER.unpack(header)[1] != VERSION:
+            raise ValueError('Unsupported joystick session log version ' + str(_FILE_HEADER.unpack(header)[1]))
+
+        while True:
+            frame = session_file.read(_FRAME.size)
+            if len(frame) < _FRAME.size:
+                return
+
+            kind, length = _FRAME.unpack(frame)
+            if kind == FRAME_DEVICE:
+                payload = session_file.read(length)
+                if len(payload) < length:
+                    return
+                yield 'device', json.loads(payload.decode('utf-8'))
+            elif kind == FRAME_EVENTS:
+                payload = session_file.read(length * JS_EVENT_SIZE)
+                # Whole records only, the last frame of a session cut short may be partial
+                yield 'events', payload[:len(payload) - len(payload) % JS_EVENT_SIZE]
+                if len(payload) < length * JS_EVENT_SIZE:
+                    return
+            else:
+                raise ValueError('Unknown frame ' + str(kind) + ' in ' + path)
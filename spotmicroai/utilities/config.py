@@ -1,14 +1,112 @@
+import copy
 import json
 import sys
 import os
+import logging
 from spotmicroai.utilities.log import Logger
 import jmespath  # http://jmespath.org/tutorial.html
 import shutil
 from pathlib import Path
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Optional
 
 log = Logger().setup_logger('Configuration')
 
 
+class BoardConfig(NamedTuple):
+    address: int
+    reference_clock_speed: int
+    frequency: int
+
+
+class ServoConfig(NamedTuple):
+    name: str
+    pca9685: int
+    channel: int
+    min_pulse: int
+    max_pulse: int
+    rest_angle: float
+    min_angle: Optional[float]
+    max_angle: Optional[float]
+
+
+class DeadManSwitchConfig(NamedTuple):
+    deadline: float = 0.1
+    jitter_budget: float = 0.02
+    late_beats: int = 3
+
+
+class AbortControllerConfig(NamedTuple):
+    gpio_port: Optional[int]
+    dead_man_switch: DeadManSwitchConfig = DeadManSwitchConfig()
+
+
+class LCDScreenControllerConfig(NamedTuple):
+    address: Optional[int]
+
+
+class AxisFilterConfig(NamedTuple):
+    deadzone: float = 0.0
+    hysteresis: float = 0.0
+    min_cutoff: Optional[float] = None
+    beta: float = 0.0
+    derivative_cutoff: float = 1.0
+    threshold: float = 0.0
+
+
+class RemoteControllerControllerConfig(NamedTuple):
+    device: Optional[str]
+    axis_filters: Mapping[str, AxisFilterConfig] = MappingProxyType({})
+    # Directory to record the joystick sessions to, see spotmicroai.remote_controller.session_log
+    record_sessions: Optional[str] = None
+
+
+class PoseCacheConfig(NamedTuple):
+    # Entries, 0 solves every pose. Grid of the poses: millimeters for the height and the shifts, radians otherwise
+    size: int = 1024
+    height_step: float = 1.0
+    angle_step: float = 0.01
+    shift_step: float = 1.0
+
+
+class MotionControllerConfig(NamedTuple):
+    control_loop_frequency: Optional[int]
+    control_loop_statistics_interval: Optional[int]
+    pose_cache: PoseCacheConfig = PoseCacheConfig()
+
+
+class HALConfig(NamedTuple):
+    backend: str = 'raspberry_pi'
+    # Simulated backend only: cost of an I2C transaction, fixed part and per byte (100kHz, 9 clocks a byte)
+    i2c_transaction_latency: float = 0.0001
+    i2c_byte_latency: float = 0.00009
+    joystick_script: Optional[str] = None
+    # Simulated backend only: joystick session log played instead of the script, at speed times its pace,
+    # 0 for as fast as it is read
+    joystick_replay: Optional[str] = None
+    joystick_replay_speed: float = 1.0
+
+
+class TraceConfig(NamedTuple):
+    enabled: bool = False
+    records: int = 16384
+
+
+class I2CJournalConfig(NamedTuple):
+    enabled: bool = False
+    directory: str = '~/spotmicroai_i2c_journal'
+    # 24 bytes a record: 3MB segments, 8 of them per controller
+    segment_records: int = 131072
+    segments: int = 8
+
+
+class I2CBusControllerConfig(NamedTuple):
+    enabled: bool = False
+    # Bytes of an LCD screen write sent before servo frames get a chance to go first, 0.8ms at 100kHz
+    lcd_chunk_size: int = 8
+    statistics_interval: int = 60
+
+
 class Singleton(type):
     _instances = {}
 
@@ -19,9 +117,17 @@ class Singleton(type):
 
 
 class Config(metaclass=Singleton):
+    HAL = 'hal[0]'
+    TRACE = 'trace[0]'
+    I2C_JOURNAL = 'i2c_journal[0]'
+    I2C_BUS_CONTROLLER = 'i2c_bus_controller[0]'
+
     ABORT_CONTROLLER_GPIO_PORT = 'abort_controller[0].gpio_port'
+    ABORT_CONTROLLER_DEAD_MAN_SWITCH = 'abort_controller[0].dead_man_switch[0]'
     LCD_SCREEN_CONTROLLER_I2C_ADDRESS = 'lcd_screen_controller[0].lcd_screen[0].address'
     REMOTE_CONTROLLER_CONTROLLER_DEVICE = 'remote_controller_controller[0].remote_controller[0].device'
+    REMOTE_CONTROLLER_CONTROLLER_FILTERS = 'remote_controller_controller[0].remote_controller[0].filters[0]'
+    REMOTE_CONTROLLER_CONTROLLER_RECORD_SESSIONS = 'remote_controller_controller[0].remote_controller[0].record_sessions'
 
     MOTION_CONTROLLER_BOARDS_PCA9685_1_ADDRESS = 'motion_controller[*].boards[*].pca9685_1[*].address | [0] | [0] | [0]'
     MOTION_CONTROLLER_BOARDS_PCA9685_1_REFERENCE_CLOCK_SPEED = 'motion_controller[*].boards[*].pca9685_1[*].reference_clock_speed | [0] | [0] | [0]'
@@ -30,6 +136,10 @@ class Config(metaclass=Singleton):
     MOTION_CONTROLLER_BOARDS_PCA9685_2_REFERENCE_CLOCK_SPEED = 'motion_controller[*].boards[*].pca9685_2[*].reference_clock_speed | [0] | [0] | [0]'
     MOTION_CONTROLLER_BOARDS_PCA9685_2_FREQUENCY = 'motion_controller[*].boards[*].pca9685_2[*].frequency | [0] | [0] | [0]'
 
+    MOTION_CONTROLLER_CONTROL_LOOP_FREQUENCY = 'motion_controller[*].control_loop[*].frequency | [0] | [0]'
+    MOTION_CONTROLLER_CONTROL_LOOP_STATISTICS_INTERVAL = 'motion_controller[*].control_loop[*].statistics_interval | [0] | [0]'
+    MOTION_CONTROLLER_POSE_CACHE = 'motion_controller[0].pose_cache[0]'
+
     MOTION_CONTROLLER_SERVOS_REAR_SHOULDER_LEFT_PCA9685 = 'motion_controller[*].servos[*].rear_shoulder_left[*].pca9685 | [0] | [0] | [0]'
     MOTION_CONTROLLER_SERVOS_REAR_SHOULDER_LEFT_CHANNEL = 'motion_controller[*].servos[*].rear_shoulder_left[*].channel | [0] | [0] | [0]'
     MOTION_CONTROLLER_SERVOS_REAR_SHOULDER_LEFT_MIN_PULSE = 'motion_controller[*].servos[*].rear_shoulder_left[*].min_pulse | [0] | [0] | [0]'
@@ -128,6 +238,21 @@ class Config(metaclass=Singleton):
 
     values = {}
 
+    # Compiled once from values, read as plain attributes by the controllers
+    boards = MappingProxyType({})
+    servos = MappingProxyType({})
+    hal = HALConfig()
+    trace = TraceConfig()
+    i2c_journal = I2CJournalConfig()
+    i2c_bus_controller = I2CBusControllerConfig()
+    abort_controller = AbortControllerConfig(None)
+    lcd_screen_controller = LCDScreenControllerConfig(None)
+    remote_controller_controller = RemoteControllerControllerConfig(None)
+    motion_controller = MotionControllerConfig(None, None)
+
+    _expressions = {}
+    _results = {}
+
     def __init__(self):
 
         try:
@@ -137,7 +262,9 @@ class Config(metaclass=Singleton):
             self.list_modules()
 
         except Exception as e:
+            # A half compiled configuration would leave the controllers without boards or servos
             log.error('Problem while loading the configuration file', e)
+            raise
 
     def load_config(self):
         try:
@@ -153,6 +280,55 @@ class Config(metaclass=Singleton):
             log.error("Configuration file don't exist or is not a valid json, aborting.")
             sys.exit(1)
 
+        self._results = {}
+        self.compile_config()
+
+    def compile_config(self):
+
+        boards = {}
+        for board in (1, 2):
+            board_configuration = 'motion_controller[*].boards[*].pca9685_' + str(board) + '[*].{} | [0] | [0] | [0]'
+            address = self.get(board_configuration.format('address'))
+            if address:
+                boards[board] = BoardConfig(int(address, 0),
+                                            int(self.get(board_configuration.format('reference_clock_speed'))),
+                                            int(self.get(board_configuration.format('frequency'))))
+        self.boards = MappingProxyType(boards)
+
+        servos = {}
+        for name in (self.get('motion_controller[0].servos[0]') or {}).keys():
+            servo_configuration = 'motion_controller[*].servos[*].' + name + '[*].{} | [0] | [0] | [0]'
+            servos[name] = ServoConfig(name,
+                                       self.get(servo_configuration.format('pca9685')),
+                                       self.get(servo_configuration.format('channel')),
+                                       self.get(servo_configuration.format('min_pulse')),
+                                       self.get(servo_configuration.format('max_pulse')),
+                                       self.get(servo_configuration.format('rest_angle')),
+                                       self.get(servo_configuration.format('min_angle')),
+                                       self.get(servo_configuration.format('max_angle')))
+        self.servos = MappingProxyType(servos)
+
+        self.hal = HALConfig(**(self.get(self.HAL) or {}))
+        self.trace = TraceConfig(**(self.get(self.TRACE) or {}))
+        self.i2c_journal = I2CJournalConfig(**(self.get(self.I2C_JOURNAL) or {}))
+        self.i2c_bus_controller = I2CBusControllerConfig(**(self.get(self.I2C_BUS_CONTROLLER) or {}))
+
+        lcd_screen_address = self.get(self.LCD_SCREEN_CONTROLLER_I2C_ADDRESS)
+
+        self.abort_controller = AbortControllerConfig(self.get(self.ABORT_CONTROLLER_GPIO_PORT),
+                                                      DeadManSwitchConfig(**(self.get(self.ABORT_CONTROLLER_DEAD_MAN_SWITCH) or {})))
+        self.lcd_screen_controller = LCDScreenControllerConfig(int(lcd_screen_address, 0) if lcd_screen_address else None)
+        axis_filters = {}
+        for axis, axis_filter in (self.get(self.REMOTE_CONTROLLER_CONTROLLER_FILTERS) or {}).items():
+            axis_filters[axis] = AxisFilterConfig(**axis_filter[0])
+
+        self.remote_controller_controller = RemoteControllerControllerConfig(self.get(self.REMOTE_CONTROLLER_CONTROLLER_DEVICE),
+                                                                             MappingProxyType(axis_filters),
+                                                                             self.get(self.REMOTE_CONTROLLER_CONTROLLER_RECORD_SESSIONS))
+        self.motion_controller = MotionControllerConfig(self.get(self.MOTION_CONTROLLER_CONTROL_LOOP_FREQUENCY),
+                                                        self.get(self.MOTION_CONTROLLER_CONTROL_LOOP_STATISTICS_INTERVAL),
+                                                        PoseCacheConfig(**(self.get(self.MOTION_CONTROLLER_POSE_CACHE) or {})))
+
     def list_modules(self):
         log.info('Detected configuration for the modules: ' + ', '.join(self.values.keys()))
 
@@ -164,8 +340,29 @@ class Config(metaclass=Singleton):
             log.error("Problem saving the configuration file", e)
 
     def get(self, search_pattern):
-        log.debug(search_pattern + ': ' + str(jmespath.search(search_pattern, self.values)))
-        return jmespath.search(search_pattern, self.values)
+        try:
+            result = self._results[search_pattern]
+        except KeyError:
+            result = self._lookup(search_pattern)
+
+        # Sections and lists are copies, the cached ones stay as the file says
+        if isinstance(result, (dict, list)):
+            return copy.deepcopy(result)
+
+        return result
+
+    def _lookup(self, search_pattern):
+
+        expression = self._expressions.get(search_pattern)
+        if expression is None:
+            expression = self._expressions[search_pattern] = jmespath.compile(search_pattern)
+
+        result = self._results[search_pattern] = expression.search(self.values)
+
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug(search_pattern + ': ' + str(result))
+
+        return result
 
     def get_by_section_name(self, search_pattern):
 
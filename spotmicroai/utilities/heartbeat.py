@@ -0,0 +1,64 @@
+import struct
+from multiprocessing import shared_memory
+from typing import NamedTuple
+
+from spotmicroai.utilities.seqlock import SeqlockSlot
+
+# Beats so far, monotonic time of the last beat, work time of the previous tick, how late the last tick started
+_HEARTBEAT = struct.Struct('<Iddd')
+
+HEARTBEAT_SIZE = SeqlockSlot.size(_HEARTBEAT)
+
+
+class HeartbeatState(NamedTuple):
+    beats: int
+    beat_at: float
+    loop_time: float
+    jitter: float
+
+
+class Heartbeat:
+    """
+    Proof of life of the motion loop: it beats once per tick with its timing, the abort controller reads the
+    newest beat and cuts the servos when it is late. Single writer checksummed seqlock, a torn beat never reaches
+    the dead man switch.
+    Times come from time.monotonic(), which all the processes share.
+    """
+
+    def __init__(self, name=None, create=False):
+        self._shared_memory = shared_memory.SharedMemory(name=name, create=create, size=HEARTBEAT_SIZE)
+        self._buffer = self._shared_memory.buf
+        self._heartbeat = SeqlockSlot(self._buffer, 0, _HEARTBEAT)
+
+        if create:
+            self._heartbeat.initialize()
+
+    def __reduce__(self):
+        return self.__class__, (self._shared_memory.name,)
+
+    @property
+    def name(self):
+        return self._shared_memory.name
+
+    def beat(self, beat_at, loop_time, jitter):
+        # Only the motion loop writes, the beats it wrote last are the ones in the slot
+        sequence, heartbeat = self._heartbeat.read()
+        beats = heartbeat[0] if heartbeat else 0
+
+        self._heartbeat.write((beats + 1) & 0xFFFFFFFF, beat_at, loop_time, jitter)
+
+    def read(self):
+        # Newest HeartbeatState, None before the first beat or if the writer died half way one
+        sequence, heartbeat = self._heartbeat.read()
+        if heartbeat is None or not heartbeat[0]:
+            return None
+
+        return HeartbeatState(*heartbeat)
+
+    def close(self):
+        self._heartbeat = None
+        self._buffer = None
+        self._shared_memory.close()
+
+    def unlink(self):
+        self._shared_memory.unlink()
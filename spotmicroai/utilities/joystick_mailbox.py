@@ -0,0 +1,116 @@
+import struct
+from multiprocessing import shared_memory
+
+from spotmicroai.utilities.seqlock import SeqlockSlot
+
+# Axis and button names the remote controller can report, as named from linux/input.h.
+# Their position is their slot in the mailbox, both ends must agree on it.
+AXES = ('lx', 'ly', 'lz', 'rx', 'ry', 'rz', 'trottle', 'rudder', 'wheel', 'gas', 'brake',
+        'hat0x', 'hat0y', 'hat1x', 'hat1y', 'hat2x', 'hat2y', 'hat3x', 'hat3y',
+        'pressure', 'distance', 'tilt_x', 'tilt_y', 'tool_width', 'volume', 'misc')
+
+BUTTONS = ('trigger', 'thumb', 'thumb2', 'top', 'top2', 'pinkie',
+           'base', 'base2', 'base3', 'base4', 'base5', 'base6', 'dead',
+           'a', 'b', 'c', 'x', 'y', 'z', 'tl', 'tr', 'tl2', 'tr2',
+           'select', 'start', 'mode', 'thumbl', 'thumbr',
+           'dpad_up', 'dpad_down', 'dpad_left', 'dpad_right')
+
+_AXIS_SLOTS = {axis: slot for slot, axis in enumerate(AXES)}
+_BUTTON_SLOTS = {button: slot for slot, button in enumerate(BUTTONS)}
+_BUTTON_BITS = {button: 1 << bit for bit, button in enumerate(BUTTONS)}
+
+# The state: one float per axis, one bit per button, how many times each button was pressed so far and the
+# monotonic time the remote controller read the events from the device
+_STATE = struct.Struct('<' + 'f' * len(AXES) + 'Q' + 'H' * len(BUTTONS) + 'd')
+_PRESSES = slice(len(AXES) + 1, len(AXES) + 1 + len(BUTTONS))
+
+MAILBOX_SIZE = SeqlockSlot.size(_STATE)
+
+
+class JoystickMailbox:
+    """
+    Latest value channel for the joystick state between the remote controller and the motion controller.
+
+    The state lives in a fixed layout shared memory block guarded by a checksummed seqlock. Publishing never
+    blocks and nothing is pickled, a slow reader just skips the intermediate states. Button presses are counted,
+    so a press released before the reader got to see it still shows up once.
+    """
+
+    def __init__(self, name=None, create=False):
+        self._shared_memory = shared_memory.SharedMemory(name=name, create=create, size=MAILBOX_SIZE)
+        self._buffer = self._shared_memory.buf
+        self._state = SeqlockSlot(self._buffer, 0, _STATE)
+        self._last_read_sequence = 0
+        # Press counters of the state read_newer() returned last
+        self._last_read_presses = (0,) * len(BUTTONS)
+
+        # Of the state read_newer() returned last
+        self.event_time = 0.0
+
+        if create:
+            self._state.initialize()
+
+    def __reduce__(self):
+        # Processes get the mailbox by name and attach to the same block
+        return self.__class__, (self._shared_memory.name,)
+
+    @property
+    def name(self):
+        return self._shared_memory.name
+
+    @property
+    def sequence(self):
+        # Of the state read_newer() returned last, publish() returns the one of the state it wrote
+        return self._last_read_sequence
+
+    def publish(self, axis_states, button_states, event_time=0.0, button_presses=None):
+        # button_presses: presses of each button since the remote controller started, wrapping at 16 bits
+        axes = [0.0] * len(AXES)
+        for axis, value in axis_states.items():
+            slot = _AXIS_SLOTS.get(axis)
+            if slot is not None:
+                axes[slot] = value
+
+        buttons = 0
+        for button, value in button_states.items():
+            if value:
+                buttons |= _BUTTON_BITS.get(button, 0)
+
+        presses = [0] * len(BUTTONS)
+        for button, count in (button_presses or {}).items():
+            slot = _BUTTON_SLOTS.get(button)
+            if slot is not None:
+                presses[slot] = count & 0xFFFF
+
+        return self._state.write(*axes, buttons, *presses, event_time)
+
+    def read(self):
+        # Newest consistent (sequence, state) pair, (None, None) if the writer stalled half way a publish
+        return self._state.read()
+
+    def read_newer(self):
+        # The state as the dictionary the remote controller used to send, None if nothing new was published.
+        # A button is 1 while held and also when it was pressed since the last state returned.
+        sequence, state = self.read()
+        if sequence is None or sequence == self._last_read_sequence:
+            return None
+
+        self._last_read_sequence = sequence
+
+        event = dict(zip(AXES, state))
+        buttons = state[len(AXES)]
+        presses = state[_PRESSES]
+        self.event_time = state[-1]
+        for (button, bit), count, last_count in zip(_BUTTON_BITS.items(), presses, self._last_read_presses):
+            event[button] = 1 if buttons & bit or count != last_count else 0
+        self._last_read_presses = presses
+
+        return event
+
+    def close(self):
+        self._state = None
+        self._buffer = None
+        self._shared_memory.close()
+
+    def unlink(self):
+        self._shared_memory.unlink()
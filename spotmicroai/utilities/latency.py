@@ -0,0 +1,64 @@
+SUB_BUCKETS = 8
+BUCKETS = 512
+
+
+def _bucket(microseconds):
+    # Log-linear buckets: exact below 16 us, then 8 buckets per power of 2 (~12% resolution)
+    if microseconds < 2 * SUB_BUCKETS:
+        return microseconds
+    shift = microseconds.bit_length() - 4
+    return min(shift * SUB_BUCKETS + (microseconds >> shift), BUCKETS - 1)
+
+
+def _bucket_upper_bound(bucket):
+    if bucket < 2 * SUB_BUCKETS:
+        return bucket
+    shift = bucket // SUB_BUCKETS - 1
+    return ((bucket % SUB_BUCKETS + SUB_BUCKETS + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """
+    Fixed size histogram of durations, cheap enough to feed from the control loops.
+    Values are added in seconds and reported back in milliseconds.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.buckets = [0] * BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        if seconds < 0:
+            seconds = 0.0
+
+        self.buckets[_bucket(int(seconds * 1000000))] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, percentile):
+        if not self.count:
+            return 0.0
+
+        wanted = self.count * percentile / 100.0
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= wanted:
+                return min(_bucket_upper_bound(bucket) / 1000000.0, self.max)
+
+        return self.max
+
+    def summary(self):
+        return {'count': self.count,
+                'mean_ms': round(self.total / self.count * 1000, 3) if self.count else 0.0,
+                'p50_ms': round(self.percentile(50) * 1000, 3),
+                'p95_ms': round(self.percentile(95) * 1000, 3),
+                'p99_ms': round(self.percentile(99) * 1000, 3),
+                'max_ms': round(self.max * 1000, 3)}
@@ -10,17 +10,20 @@ ABORT_CONTROLLER = 'abort_controller'
 LCD_SCREEN_CONTROLLER = 'lcd_screen_controller'
 MOTION_CONTROLLER = 'motion_controller'
 REMOTE_CONTROLLER_CONTROLLER = 'remote_controller_controller'
+# Owns the I2C bus when enabled, see spotmicroai.i2c_bus_controller.i2c_bus
+I2C_BUS_CONTROLLER = 'i2c_bus_controller'
 
-LCD_SCREEN_SHOW_ABORT_CONTROLLER_OK_ON = ABORT_CONTROLLER + ' OK ON'
-LCD_SCREEN_SHOW_ABORT_CONTROLLER_OK_OFF = ABORT_CONTROLLER + ' OK OFF'
-LCD_SCREEN_SHOW_ABORT_CONTROLLER_NOK = ABORT_CONTROLLER + ' NOK'
+# Status of the components, shown by the LCD screen, see spotmicroai.utilities.status_board
+STATUS_BOARD = 'status_board'
 
-LCD_SCREEN_SHOW_REMOTE_CONTROLLER_CONTROLLER_OK = REMOTE_CONTROLLER_CONTROLLER + ' OK'
-LCD_SCREEN_SHOW_REMOTE_CONTROLLER_CONTROLLER_SEARCHING = REMOTE_CONTROLLER_CONTROLLER + ' SEARCHING'
-LCD_SCREEN_SHOW_REMOTE_CONTROLLER_CONTROLLER_NOK = REMOTE_CONTROLLER_CONTROLLER + ' NOK'
+# Fast path to cut the servos from any process, see spotmicroai.abort_controller.abort_signal
+ABORT_SIGNAL = 'abort_signal'
 
-LCD_SCREEN_CONTROLLER_ACTION_ON = LCD_SCREEN_CONTROLLER + ' ON'
-LCD_SCREEN_CONTROLLER_ACTION_OFF = LCD_SCREEN_CONTROLLER + ' OFF'
+# Motion loop proof of life watched by the abort controller, see spotmicroai.utilities.heartbeat
+MOTION_HEARTBEAT = 'motion_heartbeat'
+
+# Stage timings of the control pipeline when tracing is on, see spotmicroai.utilities.trace
+TRACE = 'trace'
 
 ABORT_CONTROLLER_ACTION_ABORT = 'abort'
 ABORT_CONTROLLER_ACTION_ACTIVATE = 'activate'
\ No newline at end of file
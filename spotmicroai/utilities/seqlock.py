@@ -0,0 +1,72 @@
+import struct
+import zlib
+
+_SEQUENCE = struct.Struct('<I')
+_CHECKSUM = struct.Struct('<I')
+
+# A writer dying half way leaves an odd sequence behind, give up instead of spinning forever
+READ_RETRIES = 100
+
+
+class SeqlockSlot:
+    """
+    One record of a shared memory block written by a single writer and read from other processes without locks:
+    a sequence, the record packed with a struct, and the CRC32 of the record. The writer makes the sequence odd,
+    writes the record and its checksum and makes the sequence even again. Readers copy the slot and retry when the
+    sequence was odd, moved while they copied, or the copy does not match its checksum.
+
+    Plain memoryview stores are not ordered for the other cores on ARM, a reader may see the new sequence before
+    the record it guards: the checksum catches those torn copies.
+    """
+
+    def __init__(self, buffer, offset, record):
+        self._buffer = buffer
+        self._offset = offset
+        self._record = record
+        self._checksum_offset = offset + _SEQUENCE.size + record.size
+        self._end = self._checksum_offset + _CHECKSUM.size
+
+    @staticmethod
+    def size(record):
+        return _SEQUENCE.size + record.size + _CHECKSUM.size
+
+    def initialize(self):
+        # An all zero record at sequence 0, readable as such
+        self._write(0, bytes(self._record.size))
+
+    def sequence(self):
+        return _SEQUENCE.unpack_from(self._buffer, self._offset)[0]
+
+    def write(self, *values):
+        # Returns the sequence of the record written
+        sequence = self.sequence()
+
+        _SEQUENCE.pack_into(self._buffer, self._offset, (sequence + 1) & 0xFFFFFFFF)
+        self._write((sequence + 2) & 0xFFFFFFFF, self._record.pack(*values))
+
+        return (sequence + 2) & 0xFFFFFFFF
+
+    def _write(self, sequence, record):
+        self._buffer[self._offset + _SEQUENCE.size:self._checksum_offset] = record
+        _CHECKSUM.pack_into(self._buffer, self._checksum_offset, zlib.crc32(record))
+        _SEQUENCE.pack_into(self._buffer, self._offset, sequence)
+
+    def read(self):
+        # Newest consistent (sequence, values), (None, None) if the writer stalled half way a write
+        for retry in range(READ_RETRIES):
+            sequence = self.sequence()
+            if sequence & 1:
+                continue
+
+            record = bytes(self._buffer[self._offset + _SEQUENCE.size:self._end])
+
+            if self.sequence() != sequence:
+                continue
+
+            # Torn copy, stores seen out of order
+            if zlib.crc32(record[:self._record.size]) != _CHECKSUM.unpack_from(record, self._record.size)[0]:
+                continue
+
+            return sequence, self._record.unpack_from(record)
+
+        return None, None
@@ -0,0 +1,92 @@
+import struct
+import threading
+import time
+from multiprocessing import shared_memory
+
+from spotmicroai.utilities.seqlock import SeqlockSlot
+
+# One slot per component, each one written by a single process, its owner
+ABORT_CONTROLLER = 'abort_controller'
+REMOTE_CONTROLLER_CONTROLLER = 'remote_controller_controller'
+# Both written by the motion controller
+MOTION_CONTROLLER_1 = 'motion_controller_1'
+MOTION_CONTROLLER_2 = 'motion_controller_2'
+# Whether the screen is asked to be on, written by the remote controller when the gamepad connects and read
+# by the LCD screen controller
+LCD_SCREEN_CONTROLLER = 'lcd_screen_controller'
+
+COMPONENTS = (ABORT_CONTROLLER, REMOTE_CONTROLLER_CONTROLLER, MOTION_CONTROLLER_1, MOTION_CONTROLLER_2,
+              LCD_SCREEN_CONTROLLER)
+
+STATUS_UNKNOWN = 0
+STATUS_OK = 1
+STATUS_NOK = 2
+STATUS_SEARCHING = 3
+# Abort controller: servos powered or cut. LCD screen: asked to be on or off.
+STATUS_ON = 4
+STATUS_OFF = 5
+
+STATUS_NAMES = ('UNKNOWN', 'OK', 'NOK', 'SEARCHING', 'ON', 'OFF')
+
+# Slot: status code, wall clock time of the last update
+_SLOT = struct.Struct('<Id')
+
+BOARD_SIZE = SeqlockSlot.size(_SLOT) * len(COMPONENTS)
+
+
+class StatusBoard:
+    """
+    Status of every component in a fixed slot of shared memory, replacing the status strings that went through
+    the LCD screen queue. Writers overwrite their slot and never block, whatever the readers do. Readers (LCD,
+    web, tests) poll version() and read the slots when it moved.
+
+    Each slot is a checksummed seqlock: its sequence is odd while the writer is in it and grows by 2 per update,
+    so the sum of the sequences is a version of the whole board. Readers in any process retry torn copies. A
+    seqlock takes one writer at a time: every slot is written by its owner process only, and the threads of that
+    process take turns on a lock.
+    """
+
+    def __init__(self, name=None, create=False):
+        self._shared_memory = shared_memory.SharedMemory(name=name, create=create, size=BOARD_SIZE)
+        self._buffer = self._shared_memory.buf
+        self._slots = {component: SeqlockSlot(self._buffer, slot * SeqlockSlot.size(_SLOT), _SLOT)
+                       for slot, component in enumerate(COMPONENTS)}
+        # Writers of this process only, each process attaches with its own
+        self._lock = threading.Lock()
+
+        if create:
+            for slot in self._slots.values():
+                slot.initialize()
+
+    def __reduce__(self):
+        return self.__class__, (self._shared_memory.name,)
+
+    @property
+    def name(self):
+        return self._shared_memory.name
+
+    def set(self, component, status):
+        with self._lock:
+            self._slots[component].write(status, time.time())
+
+    def get(self, component):
+        # (status, timestamp) of a component, (STATUS_UNKNOWN, 0.0) until it reports
+        sequence, slot = self._slots[component].read()
+        if slot is None:
+            return STATUS_UNKNOWN, 0.0
+
+        return slot
+
+    def version(self):
+        return sum(slot.sequence() for slot in self._slots.values())
+
+    def snapshot(self):
+        return {component: self.get(component) for component in COMPONENTS}
+
+    def close(self):
+        self._slots = None
+        self._buffer = None
+        self._shared_memory.close()
+
+    def unlink(self):
+        self._shared_memory.unlink()
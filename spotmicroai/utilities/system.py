@@ -1,10 +1,20 @@
-import json
+import glob
 import os
+import time
 from spotmicroai.utilities.log import Logger
-import jmespath  # http://jmespath.org/tutorial.html
 
 log = Logger().setup_logger('System')
 
+THERMAL_ZONES = '/sys/class/thermal/thermal_zone*'
+LOADAVG = '/proc/loadavg'
+MEMINFO = '/proc/meminfo'
+STAT = '/proc/stat'
+
+# Seconds a sample is served from the cache before the file is read again
+METRICS_TTL = 1.0
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+
 
 class Singleton(type):
     _instances = {}
@@ -16,21 +26,136 @@ class Singleton(type):
 
 
 class System(metaclass=Singleton):
+    """
+    System metrics read straight from /sys and /proc through descriptors that stay open, each value cached
+    for METRICS_TTL. Nothing spawns a process. Metrics whose file doesn't exist come back as None.
+    """
 
-    def __init__(self):
+    def __init__(self, ttl=METRICS_TTL, clock=time.monotonic):
 
         try:
             log.debug('Loading system...')
 
+            self.ttl = ttl
+            self._clock = clock
+            self._cache = {}
+            self._files = {}
+            self._pid = os.getpid()
+
+            self.thermal_zone = self._find_cpu_thermal_zone()
+
         except Exception as e:
-            log.error('Problem while loading the configuration file', e)
+            log.error('Problem while loading the system metrics', e)
+
+    def _find_cpu_thermal_zone(self):
+        # The SoC zone when there are several, the first one otherwise
+        zones = sorted(glob.glob(THERMAL_ZONES))
+        for zone in zones:
+            try:
+                with open(zone + '/type') as zone_type:
+                    if 'cpu' in zone_type.read():
+                        return zone + '/temp'
+            except OSError:
+                pass
+
+        return zones[0] + '/temp' if zones else None
+
+    def _read(self, path):
+        # Descriptors opened before a fork belong to the parent's /proc/self, start over in the child
+        if self._pid != os.getpid():
+            self.close()
+            self._cache = {}
+            self._pid = os.getpid()
+
+        fd = self._files.get(path)
+        try:
+            if fd is None:
+                fd = self._files[path] = os.open(path, os.O_RDONLY)
+            return os.pread(fd, 4096, 0).decode('ascii', 'replace')
+        except OSError:
+            if fd is not None:
+                os.close(fd)
+            self._files.pop(path, None)
+            return None
+
+    def _cached(self, name, sample):
+        now = self._clock()
+
+        cached = self._cache.get(name)
+        if cached is not None and cached[0] > now:
+            return cached[1]
 
-    def temperature(self):
         try:
-            temp = os.popen("vcgencmd measure_temp").readline()
-            # log.debug("System temperature: " + temp.replace("temp=", "")[:-5])
-            return temp.replace("temp=", "")[:-5]
-        except:
-            return '000'
+            value = sample()
+        except (ValueError, IndexError):
+            value = None
+
+        self._cache[name] = (now + self.ttl, value)
+        return value
+
+    def cpu_temperature(self):
+        # Degrees celsius
+        def sample():
+            if self.thermal_zone is None:
+                return None
+            millidegrees = self._read(self.thermal_zone)
+            return int(millidegrees) / 1000.0 if millidegrees else None
+
+        return self._cached('cpu_temperature', sample)
+
+    def temperature(self):
+        # Whole degrees as text, what vcgencmd measure_temp used to give the LCD
+        temperature = self.cpu_temperature()
+        return None if temperature is None else str(int(temperature))
+
+    def load_average(self):
+        def sample():
+            loadavg = self._read(LOADAVG)
+            return tuple(float(load) for load in loadavg.split()[:3]) if loadavg else None
+
+        return self._cached('load_average', sample)
+
+    def memory(self):
+        # MemTotal, MemAvailable... in kB
+        def sample():
+            meminfo = self._read(MEMINFO)
+            if not meminfo:
+                return None
+            memory = {}
+            for line in meminfo.splitlines():
+                name, _, value = line.partition(':')
+                memory[name] = int(value.split()[0])
+            return memory
+
+        return self._cached('memory', sample)
+
+    def cpu_times(self):
+        # Seconds spent by all the cpus in user, nice, system, idle, iowait, irq, softirq and steal
+        def sample():
+            stat = self._read(STAT)
+            if not stat:
+                return None
+            ticks = stat.split('\n', 1)[0].split()[1:9]
+            return dict(zip(('user', 'nice', 'system', 'idle', 'iowait', 'irq', 'softirq', 'steal'),
+                            (int(tick) / CLOCK_TICKS for tick in ticks)))
+
+        return self._cached('cpu_times', sample)
+
+    def process_cpu_time(self, pid=None):
+        # Seconds of user and system time of a process, this one by default
+        pid = os.getpid() if pid is None else pid
+
+        def sample():
+            stat = self._read('/proc/' + str(pid) + '/stat')
+            if not stat:
+                return None
+            # The command name can hold spaces, the fields start after its closing parenthesis
+            fields = stat[stat.rindex(')') + 2:].split()
+            return {'user': int(fields[11]) / CLOCK_TICKS, 'system': int(fields[12]) / CLOCK_TICKS}
 
+        return self._cached('process_cpu_time ' + str(pid), sample)
 
+    def close(self):
+        for fd in self._files.values():
+            os.close(fd)
+        self._files = {}
@@ -0,0 +1,178 @@
+import struct
+import time
+from multiprocessing import shared_memory
+from typing import NamedTuple
+
+import spotmicroai.utilities.queues as queues
+
+# Known name, the tracing tool attaches to the buffer of the running robot
+TRACE_BUFFER_NAME = 'spotmicroai_trace'
+
+# One region per writing process, each with a single writer: nothing to lock
+REMOTE_CONTROLLER = 0
+MOTION_CONTROLLER = 1
+WRITERS = ('remote_controller', 'motion_controller')
+
+# Stages, in pipeline order
+REMOTE_JSDEV_READ = 0
+REMOTE_PROCESS_EVENTS = 1
+REMOTE_MAILBOX_PUBLISH = 2
+MOTION_MAILBOX_READ = 3
+MOTION_PROCESS_EVENT = 4
+MOTION_SCHEDULED_STEPS = 5
+MOTION_POSE_TO_TICKS = 6
+MOTION_I2C_WRITE = 7
+STAGES = ('remote.jsdev_read', 'remote.process_events', 'remote.mailbox_publish', 'motion.mailbox_read',
+          'motion.process_event', 'motion.scheduled_steps', 'motion.pose_to_ticks', 'motion.i2c_write')
+
+DEFAULT_RECORDS = 16384
+
+# Stages of the busiest loop
+MAX_LAPS = 8
+
+# Records per writer
+_HEADER = struct.Struct('<I')
+# Records written so far, the slot of the next one is that count modulo the records per writer
+_COUNT = struct.Struct('<Q')
+# Stage, tag, monotonic start and end
+_RECORD = struct.Struct('<IIdd')
+
+
+class TraceRecord(NamedTuple):
+    writer: int
+    stage: int
+    tag: int
+    start: float
+    end: float
+
+
+def _region_size(records):
+    return _COUNT.size + records * _RECORD.size
+
+
+def _attach(name):
+    # Not tracked: the robot owns the buffer, a tool attaching to it must not unlink it on exit
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        from multiprocessing import resource_tracker
+        attached = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(attached._name, 'shared_memory')
+        return attached
+
+
+class TraceBuffer:
+    """
+    Preallocated ring buffers of stage timings, one per process, in shared memory. A writer stores the record
+    then bumps its count, readers copy a region and keep only the records the writer can't have overwritten
+    meanwhile. Tracing never blocks nor allocates in the control loops, the oldest records are overwritten.
+    """
+
+    def __init__(self, name=TRACE_BUFFER_NAME, create=False, records=DEFAULT_RECORDS, owner=True):
+        if create:
+            size = _HEADER.size + len(WRITERS) * _region_size(records)
+            try:
+                self._shared_memory = shared_memory.SharedMemory(name=name, create=True, size=size)
+            except FileExistsError:
+                # Left behind by a run that didn't get to clean up
+                _attach(name).unlink()
+                self._shared_memory = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+            self._shared_memory.buf[:size] = bytes(size)
+            _HEADER.pack_into(self._shared_memory.buf, 0, records)
+        elif owner:
+            self._shared_memory = shared_memory.SharedMemory(name=name)
+        else:
+            self._shared_memory = _attach(name)
+
+        self._buffer = self._shared_memory.buf
+        self.records = _HEADER.unpack_from(self._buffer)[0]
+
+    def __reduce__(self):
+        return self.__class__, (self._shared_memory.name,)
+
+    @property
+    def name(self):
+        return self._shared_memory.name
+
+    def _region(self, writer):
+        return _HEADER.size + writer * _region_size(self.records)
+
+    def tracer(self, writer):
+        return Tracer(self, writer)
+
+    def write(self, writer, stage, tag, start, end):
+        region = self._region(writer)
+        count = _COUNT.unpack_from(self._buffer, region)[0]
+
+        _RECORD.pack_into(self._buffer, region + _COUNT.size + (count % self.records) * _RECORD.size,
+                          stage, tag, start, end)
+        _COUNT.pack_into(self._buffer, region, count + 1)
+
+    def read(self, writer):
+        # Records still in the ring of a writer, oldest first
+        region = self._region(writer)
+        records_start = region + _COUNT.size
+
+        count = _COUNT.unpack_from(self._buffer, region)[0]
+        ring = bytes(self._buffer[records_start:records_start + self.records * _RECORD.size])
+        count_after = _COUNT.unpack_from(self._buffer, region)[0]
+
+        # Slots written again while copying, and the one being written, are lost
+        first = max(0, count_after + 1 - self.records)
+
+        trace = []
+        for index in range(first, count):
+            stage, tag, start, end = _RECORD.unpack_from(ring, (index % self.records) * _RECORD.size)
+            trace.append(TraceRecord(writer, stage, tag, start, end))
+
+        return trace
+
+    def close(self):
+        self._buffer = None
+        self._shared_memory.close()
+
+    def unlink(self):
+        self._shared_memory.unlink()
+
+
+class Tracer:
+    """
+    Stage timings of one process. begin() marks the start of a loop iteration, every lap() ends a stage where
+    the previous one ended, and commit() writes them with the tag tying them to the other processes' stages.
+    """
+
+    def __init__(self, trace_buffer, writer):
+        self._trace_buffer = trace_buffer
+        self._writer = writer
+
+        self._laps = [(0, 0.0, 0.0)] * MAX_LAPS
+        self._lap_count = 0
+        self._last = 0.0
+
+    def begin(self, at=None):
+        self._lap_count = 0
+        self._last = time.monotonic() if at is None else at
+
+    def lap(self, stage):
+        now = time.monotonic()
+        if self._lap_count < MAX_LAPS:
+            self._laps[self._lap_count] = (stage, self._last, now)
+            self._lap_count += 1
+        self._last = now
+
+    def skip(self):
+        # Whatever ran since the last lap is not a stage of its own
+        self._last = time.monotonic()
+
+    def commit(self, tag=0):
+        for lap in range(self._lap_count):
+            stage, start, end = self._laps[lap]
+            self._trace_buffer.write(self._writer, stage, tag, start, end)
+        self._lap_count = 0
+
+
+def create_tracer(communication_queues, writer):
+    # None when tracing is off, the control loops check for it before taking any timestamp
+    trace_buffer = communication_queues.get(queues.TRACE)
+    return trace_buffer.tracer(writer) if trace_buffer is not None else None
@@ -0,0 +1,96 @@
+#!/home/pi/spotmicroai/venv/bin/python3 -u
+
+import argparse
+import json
+import sys
+
+from spotmicroai.utilities.latency import LatencyHistogram
+import spotmicroai.utilities.trace as trace
+
+# Dumps the stage timings of the running robot and breaks its latency down per stage.
+# Tracing must be enabled in ~/spotmicroai.json: "trace": [{"enabled": true}]
+
+# Cross-process spans, from the mailbox sequence shared by the remote controller and the motion controller
+MAILBOX_HANDOFF = 'mailbox.handoff'
+INPUT_TO_SERVO = 'input_to_servo'
+
+
+def read_trace(name):
+    try:
+        trace_buffer = trace.TraceBuffer(name, owner=False)
+    except FileNotFoundError:
+        print('No trace buffer ' + name + ', is SpotMicro running with tracing enabled?', file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        return [record for writer in range(len(trace.WRITERS)) for record in trace_buffer.read(writer)]
+    finally:
+        trace_buffer.close()
+
+
+def dump(records):
+    print('writer,stage,tag,start,end,duration_ms')
+    for record in sorted(records, key=lambda record: record.start):
+        print(trace.WRITERS[record.writer] + ',' + trace.STAGES[record.stage] + ',' + str(record.tag) + ',' +
+              '%.6f' % record.start + ',' + '%.6f' % record.end + ',' +
+              '%.3f' % ((record.end - record.start) * 1000))
+
+
+def breakdown(records):
+    stages = {stage: LatencyHistogram() for stage in trace.STAGES}
+    spans = {MAILBOX_HANDOFF: LatencyHistogram(), INPUT_TO_SERVO: LatencyHistogram()}
+
+    tagged = {}
+    for record in records:
+        stages[trace.STAGES[record.stage]].add(record.end - record.start)
+        if record.tag:
+            tagged.setdefault(record.tag, {})[record.stage] = record
+
+    for tag_records in tagged.values():
+        published = tag_records.get(trace.REMOTE_MAILBOX_PUBLISH)
+        mailbox_read = tag_records.get(trace.MOTION_MAILBOX_READ)
+        if published is None or mailbox_read is None:
+            continue
+
+        # Waiting for the next motion loop tick, then reading the state
+        spans[MAILBOX_HANDOFF].add(mailbox_read.end - published.end)
+
+        jsdev_read = tag_records.get(trace.REMOTE_JSDEV_READ)
+        i2c_write = tag_records.get(trace.MOTION_I2C_WRITE)
+        if jsdev_read is not None and i2c_write is not None:
+            spans[INPUT_TO_SERVO].add(i2c_write.end - jsdev_read.start)
+
+    statistics = {name: histogram.summary() for name, histogram in stages.items() if histogram.count}
+    statistics.update({name: histogram.summary() for name, histogram in spans.items() if histogram.count})
+
+    return statistics
+
+
+def print_breakdown(statistics):
+    print('%-26s %8s %9s %9s %9s %9s %9s' % ('stage', 'count', 'mean ms', 'p50 ms', 'p95 ms', 'p99 ms', 'max ms'))
+    for name, summary in statistics.items():
+        print('%-26s %8d %9.3f %9.3f %9.3f %9.3f %9.3f' % (name, summary['count'], summary['mean_ms'],
+                                                           summary['p50_ms'], summary['p95_ms'],
+                                                           summary['p99_ms'], summary['max_ms']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SpotMicro control pipeline tracing')
+    parser.add_argument('command', nargs='?', choices=('stats', 'dump'), default='stats',
+                        help='per stage latency breakdown, or every record as CSV')
+    parser.add_argument('--json', action='store_true', help='breakdown as JSON')
+    parser.add_argument('--name', default=trace.TRACE_BUFFER_NAME, help='shared memory name of the trace buffer')
+    arguments = parser.parse_args()
+
+    records = read_trace(arguments.name)
+
+    if arguments.command == 'dump':
+        dump(records)
+    elif arguments.json:
+        print(json.dumps(breakdown(records), indent=4))
+    else:
+        print_breakdown(breakdown(records))
+
+
+if __name__ == '__main__':
+    main()
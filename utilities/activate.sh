@@ -7,4 +7,4 @@ source venv/bin/activate
 
 curl https://bootstrap.pypa.io/get-pip.py | python
 
-python3 -m pip install --upgrade pip setuptools jmespath throttle adafruit-circuitpython-motor adafruit-circuitpython-pca9685 inputs smbus RPi.GPIO inputs websockets flask
+python3 -m pip install --upgrade pip setuptools jmespath numpy throttle adafruit-circuitpython-motor adafruit-circuitpython-pca9685 inputs smbus RPi.GPIO inputs websockets flask
@@ -10,6 +10,7 @@ curl https://bootstrap.pypa.io/get-pip.py | python
 
 python3 -m pip install --upgrade pip setuptools
 python3 -m pip install --upgrade jmespath
+python3 -m pip install --upgrade numpy
 python3 -m pip install --upgrade adafruit-circuitpython-motor
 python3 -m pip install --upgrade adafruit-circuitpython-pca9685
 python3 -m pip install --upgrade inputs